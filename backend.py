@@ -0,0 +1,51 @@
+# This script picks the compiled bitboard core when it can be built and falls back on the Python one otherwise
+from typing import Union
+from helper_classes import GameState, AlphaBetaAnalyzer, TranspositionTable, SolveResult
+import helper_classes
+
+try:
+    import pyximport
+    pyximport.install(language_level=3)
+    import bitboards  # compiled on the first import, pyximport reports a failed build as an ImportError
+except ImportError:
+    bitboards = None
+
+NATIVE: bool = bitboards is not None
+
+
+class PythonSolver:
+    """The fallback for bitboards.Solver: exact solves with AlphaBetaAnalyzer that keep its table between solves"""
+    analyzer: AlphaBetaAnalyzer
+
+    def __init__(self, table_size: int = TranspositionTable.DEFAULT_SIZE):
+        """
+        Args:
+            table_size (int, optional): the number of slots in the transposition table
+        """
+        self.analyzer = AlphaBetaAnalyzer(GameState(), table_size=table_size)
+
+    @property
+    def nodes(self) -> int:
+        return self.analyzer.nodes
+
+    def clear(self) -> None:
+        self.analyzer.transposition_table.clear()
+
+    def solve(self, position: Union[helper_classes.Position, 'bitboards.Position']) -> SolveResult:
+        """This function is AlphaBetaAnalyzer.null_window_solve
+
+        Args:
+            position (Position): the position to solve, of either backend
+
+        Returns:
+            SolveResult: the score for the player to move, the column that achieves it and the nodes searched
+        """
+        copy = helper_classes.Position()
+        copy.mask, copy.current, copy.moves = position.mask, position.current, position.moves
+        self.analyzer.position = copy
+        return self.analyzer.null_window_solve()
+
+
+# the classes of the backend in use, both have the same methods and give the same scores
+Position = bitboards.Position if NATIVE else helper_classes.Position
+Solver = bitboards.Solver if NATIVE else PythonSolver
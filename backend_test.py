@@ -0,0 +1,91 @@
+# This is the unittest script that checks the compiled bitboard core against the Python one
+
+import random
+import unittest
+from typing import List
+from backend import *
+
+
+def random_positions(count: int, min_moves: int, seed: int = 7, max_moves: int = 40) -> List[str]:
+    """Move strings of random games cut off between min_moves and max_moves, before anybody has won"""
+    rng = random.Random(seed)
+    positions: List[str] = []
+    while len(positions) < count:
+        position = helper_classes.Position()
+        moves = ''
+        cutoff = rng.randint(min_moves, max_moves)
+        while position.moves < cutoff:
+            column = rng.choice([column for column in range(7) if position.can_play(column)])
+            if position.is_winning_move(column):
+                break
+            position.play(column)
+            moves += str(column)
+        else:
+            positions.append(moves)
+
+    return positions
+
+
+class TestPythonSolver(unittest.TestCase):
+
+    def test_solves(self):
+        solver = PythonSolver(10007)
+        for moves in random_positions(10, 30):
+            game_state = GameState.from_moves(moves)
+            expected = AlphaBetaAnalyzer(game_state, table_size=10007).solve()[0]
+            self.assertEqual(solver.solve(helper_classes.Position.from_game_state(game_state)).score, expected, moves)
+
+
+@unittest.skipUnless(NATIVE, 'the compiled bitboard core could not be built')
+class TestNativeBackend(unittest.TestCase):
+
+    def test_position_matches(self):
+        for moves in random_positions(100, 0):
+            game_state = GameState.from_moves(moves)
+            python = helper_classes.Position.from_game_state(game_state)
+            native = bitboards.Position.from_game_state(game_state)
+            for column in range(7):
+                self.assertEqual(native.can_play(column), python.can_play(column), moves)
+                if python.can_play(column):
+                    self.assertEqual(native.is_winning_move(column), python.is_winning_move(column), moves)
+                    python.play(column)
+                    native.play(column)
+                    self.assertEqual((native.mask, native.current, native.moves),
+                                     (python.mask, python.current, python.moves), moves)
+                    self.assertEqual(native.canonical_key(), python.canonical_key(), moves)
+                    python.undo(column)
+                    native.undo(column)
+            self.assertEqual(native.key(), python.key(), moves)
+            self.assertEqual(native.possible(), python.possible(), moves)
+            self.assertEqual(native.winning_moves(), python.winning_moves(), moves)
+            if not python.winning_moves():
+                self.assertEqual(native.non_losing_moves(), python.non_losing_moves(), moves)
+            self.assertEqual(native.to_game_state(), game_state, moves)
+
+    def test_solves_match(self):
+        # one table for all of them, as in the opening book builder
+        native = bitboards.Solver(10007)
+        # end games and positions with one cell left reach the bounds at the very end of the board
+        positions = random_positions(60, 24) + random_positions(20, 36, max_moves=41) + random_positions(10, 41, 3, 41)
+        for moves in positions:
+            game_state = GameState.from_moves(moves)
+            python = AlphaBetaAnalyzer(game_state, table_size=10007).null_window_solve()
+            result = native.solve(bitboards.Position.from_game_state(game_state))
+            self.assertEqual(result.score, python.score, moves)
+            self.assertTrue(game_state.valid_drop(result.column), moves)
+            # the column must achieve the score
+            child = GameState.from_moves(moves + str(result.column))
+            if child.end() == -1:
+                self.assertEqual(-bitboards.Solver(10007).solve(Position.from_game_state(child)).score,
+                                 result.score, moves)
+
+    def test_same_search(self):
+        # with a fresh table both backends visit exactly the same nodes
+        positions = random_positions(10, 26, seed=11) + random_positions(10, 36, 5, 41) + random_positions(5, 41, 9, 41)
+        for moves in positions:
+            position = helper_classes.Position.from_game_state(GameState.from_moves(moves))
+            self.assertEqual(bitboards.Solver(10007).solve(position), PythonSolver(10007).solve(position), moves)
+
+
+if __name__ == '__main__':
+    unittest.main()
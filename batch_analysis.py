@@ -0,0 +1,132 @@
+# This script scores many positions at once across a pool of processes
+import sys
+import json
+import signal
+import argparse
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, Optional, TextIO
+from helper_classes import GameState, Position, AlphaBetaAnalyzer, TranspositionTable
+from backend import Solver
+
+# every worker process keeps one analyzer, so its transposition table carries over between positions
+_analyzer: Optional[AlphaBetaAnalyzer] = None
+_solver: Optional[Solver] = None
+_max_time: Optional[float] = None
+
+
+def init_worker(table_size: int, max_time: Optional[float], book_path: Optional[str]) -> None:
+    """This function sets up the analyzer of a worker process
+
+    Args:
+        table_size (int): the number of slots in the worker's transposition table
+        max_time (float, optional): the seconds each position may take, None to solve every position exactly
+        book_path (str, optional): an opening book to open in the worker
+    """
+    global _analyzer, _solver, _max_time
+    # a worker forked from the game inherits the handler pygame puts on SIGTERM, and the pool stops its workers with
+    # SIGTERM when it closes, so it would wait on them forever
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    book = None
+    if book_path is not None:
+        from opening_book import OpeningBook
+        book = OpeningBook(book_path)
+    # exact solves without a book go to the compiled solver when there is one
+    if max_time is None and book is None:
+        _solver = Solver(table_size)
+    else:
+        _analyzer = AlphaBetaAnalyzer(GameState(), table_size=table_size, book=book)
+    _max_time = max_time
+
+
+def analyze_moves(moves: str) -> Dict:
+    """This function scores a single position in a worker process
+
+    Args:
+        moves (str): the column numbers played from the empty board
+
+    Returns:
+        Dict: the moves with the score for the player to move, the best column and the nodes searched, or with an
+              error message if the position cannot be analyzed
+    """
+    game_state: Optional[GameState] = GameState.from_moves(moves)
+    if game_state is None:
+        return {'moves': moves, 'error': 'illegal move string'}
+    if game_state.end() != -1:
+        return {'moves': moves, 'error': 'game is over'}
+
+    if _solver is not None:
+        score, column, nodes = _solver.solve(Position.from_game_state(game_state))
+        return {'moves': moves, 'score': score, 'column': column, 'nodes': nodes}
+
+    _analyzer.load(game_state)
+    start_nodes: int = _analyzer.nodes
+    if _max_time is None:
+        score, column = _analyzer.solve()
+        result: Dict = {'moves': moves, 'score': score, 'column': column}
+    else:
+        score, column, depth = _analyzer.iterative_deepening(max_time=_max_time)
+        result = {'moves': moves, 'score': score, 'column': column, 'depth': depth}
+    result['nodes'] = _analyzer.nodes - start_nodes
+
+    return result
+
+
+def analyze_batch(move_strings: Iterable[str], workers: Optional[int] = None,
+                  table_size: int = TranspositionTable.DEFAULT_SIZE, max_time: Optional[float] = None,
+                  book_path: Optional[str] = None, chunksize: int = 16) -> Iterator[Dict]:
+    """This function scores positions across a pool of processes and yields the results in input order as they
+    become ready
+
+    Args:
+        move_strings (Iterable[str]): the positions as column numbers played from the empty board
+        workers (int, optional): the number of processes, defaults to one per core
+        table_size (int, optional): the number of slots in each worker's transposition table
+        max_time (float, optional): the seconds each position may take, None to solve every position exactly
+        book_path (str, optional): an opening book for the workers to use
+        chunksize (int, optional): the number of positions handed to a worker at a time
+
+    Yields:
+        Dict: one result per position, see analyze_moves
+    """
+    with Pool(workers, initializer=init_worker, initargs=(table_size, max_time, book_path)) as pool:
+        yield from pool.imap(analyze_moves, move_strings, chunksize)
+
+
+def read_move_strings(fp: TextIO) -> Iterator[str]:
+    """This function yields the non-blank lines of a file without their whitespace
+
+    Args:
+        fp (TextIO): the file to read
+
+    Yields:
+        str: one move string per line
+    """
+    for line in fp:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score positions given as move strings, one per line')
+    parser.add_argument('input', nargs='?', default='-', help='the file of move strings, - for stdin')
+    parser.add_argument('--workers', type=int, default=None, help='the number of processes, one per core by default')
+    parser.add_argument('--table-size', type=int, default=TranspositionTable.DEFAULT_SIZE,
+                        help='the number of transposition table slots per worker')
+    parser.add_argument('--max-time', type=float, default=None,
+                        help='the seconds each position may take instead of solving it exactly')
+    parser.add_argument('--book', default=None, help='an opening book file')
+    args = parser.parse_args()
+
+    fp: TextIO = sys.stdin if args.input == '-' else open(args.input)
+    try:
+        for result in analyze_batch(read_move_strings(fp), args.workers, args.table_size, args.max_time, args.book):
+            sys.stdout.write(json.dumps(result) + '\n')
+            sys.stdout.flush()
+    finally:
+        if fp is not sys.stdin:
+            fp.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# This is the unittest script for the batch analysis across a pool of processes
+
+import io
+import time
+import signal
+import unittest
+from typing import List
+from batch_analysis import *
+
+# end games that solve quickly, the first ones take far more nodes than the last so the workers finish out of order
+POSITIONS: List[str] = [
+    '2455156244405515422003',
+    '5000155505050163261412221122664',
+    '52413042433456134400662562553',
+    '154265360652564534224421205403',
+    '3333332410221220000041116565',
+    '010101',
+    '110331550514506566006210253323',
+    '45511366102565524061100501230',
+]
+
+
+class TestBatchAnalysis(unittest.TestCase):
+
+    def test_exact_scores_in_input_order(self):
+        results = list(analyze_batch(POSITIONS, workers=2, table_size=10007, chunksize=1))
+        self.assertEqual([result['moves'] for result in results], POSITIONS)
+        for result in results:
+            expected = AlphaBetaAnalyzer(GameState.from_moves(result['moves']), table_size=10007).solve()
+            self.assertEqual(result['score'], expected[0], result['moves'])
+            # the column must achieve the score
+            child = GameState.from_moves(result['moves'] + str(result['column']))
+            if child.end() == -1:
+                self.assertEqual(-AlphaBetaAnalyzer(child, table_size=10007).solve()[0], result['score'])
+            self.assertIn('nodes', result)
+
+    def test_errors(self):
+        results = list(analyze_batch(['0000000', '0101010', '33'], workers=2, table_size=10007, max_time=0.05))
+        self.assertEqual(results[0], {'moves': '0000000', 'error': 'illegal move string'})
+        self.assertEqual(results[1], {'moves': '0101010', 'error': 'game is over'})
+        self.assertNotIn('error', results[2])
+
+    def test_timed(self):
+        results = list(analyze_batch(['', '33', '010101'], workers=2, table_size=10007, max_time=0.05))
+        self.assertEqual([result['moves'] for result in results], ['', '33', '010101'])
+        for result in results:
+            self.assertIn(result['column'], range(7))
+            self.assertGreaterEqual(result['depth'], 1)
+        self.assertEqual(results[2]['column'], 0)
+
+    def test_inherited_sigterm_handler(self):
+        # pygame catches SIGTERM in the game process, the pool must still stop the workers forked from it
+        previous = signal.signal(signal.SIGTERM, lambda *_: None)
+        try:
+            # the empty board takes far too long to solve, so its worker is still busy when the batch is dropped
+            results = analyze_batch(['010101', ''], workers=2, table_size=10007, chunksize=1)
+            self.assertEqual(next(results)['column'], 0)
+            start = time.perf_counter()
+            results.close()
+            self.assertLess(time.perf_counter() - start, 10)
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+
+    def test_read_move_strings(self):
+        self.assertEqual(list(read_move_strings(io.StringIO('33\n\n  010101 \n'))), ['33', '010101'])
+
+
+if __name__ == '__main__':
+    unittest.main()
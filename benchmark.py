@@ -0,0 +1,310 @@
+# This script benchmarks how fast the search can walk the game tree
+import sys
+import json
+import time
+import platform
+import argparse
+from typing import Dict, List, Optional, Tuple
+from helper_classes import GameState, Position, AlphaBetaAnalyzer, TranspositionTable
+import backend
+
+# move strings in the format read by connect4.read_board_string
+POSITIONS: List[str] = [
+    '',
+    '3333332410221220000041116565',
+    '3521325263332411011102',
+    '24545613316351055105004434',
+]
+
+# mid-game positions that every move ordering can solve within seconds
+ORDERING_POSITIONS: List[str] = [
+    '2455156244405515422003',
+    '46620350655646350524',
+    '353541346654035063',
+    '3115565016211621',
+    '455602160213056000',
+    '55551125300412566434',
+    '561320603061513335',
+    '301103311240204065',
+    '26362314206252200640',
+    '646131400660406012',
+]
+
+# positions about ten moves from the end
+END_GAME_POSITIONS: List[str] = [
+    '5000155505050163261412221122664',
+    '52413042433456134400662562553',
+    '154265360652564534224421205403',
+    '114664560610420014651622034104',
+    '004135144663003401414210165663',
+    '110331550514506566006210253323',
+    '311501102050634205505256146431',
+    '45511366102565524061100501230',
+    '25000024604366012663321115455',
+    '4565664645501214534120162562231',
+]
+
+# positions twelve moves in, each takes the Python search a second or two
+EARLY_POSITIONS: List[str] = [
+    '365302603102',
+    '424206342034',
+    '350142150443',
+    '430341365135',
+]
+
+# the graded sets of the suite, easiest first
+POSITION_SETS: Dict[str, List[str]] = {
+    'end_game': END_GAME_POSITIONS,
+    'mid_game': ORDERING_POSITIONS,
+    'early': EARLY_POSITIONS,
+}
+
+
+def clone_walk(game_state: GameState, depth: int) -> int:
+    """This function visits every node up to some depth the way the old search did, with clone() and drop()
+
+    Args:
+        game_state (GameState): the root of the walk
+        depth (int): the number of moves to look ahead
+
+    Returns:
+        int: the number of nodes visited
+    """
+    if depth == 0:
+        return 1
+    nodes: int = 1
+    for column in game_state.valid_columns:
+        child: GameState = game_state.clone()
+        child.drop(column)
+        nodes += clone_walk(child, depth - 1)
+
+    return nodes
+
+
+def play_undo_walk(position: Position, depth: int) -> int:
+    """This function visits every node up to some depth by playing and taking back moves on one Position
+
+    Args:
+        position (Position): the root of the walk
+        depth (int): the number of moves to look ahead
+
+    Returns:
+        int: the number of nodes visited
+    """
+    if depth == 0:
+        return 1
+    nodes: int = 1
+    for column in range(7):
+        if position.can_play(column):
+            position.play(column)
+            nodes += play_undo_walk(position, depth - 1)
+            position.undo(column)
+
+    return nodes
+
+
+def nodes_per_second(walk, root, depth: int) -> Tuple[int, float]:
+    """This function times a tree walk
+
+    Args:
+        walk (function): either clone_walk or play_undo_walk
+        root (GameState or Position): the root handed to the walk
+        depth (int): the number of moves to look ahead
+
+    Returns:
+        nodes, rate (Tuple[int, float]): the number of nodes visited and the nodes visited per second
+    """
+    start: float = time.perf_counter()
+    nodes: int = walk(root, depth)
+    elapsed: float = time.perf_counter() - start
+
+    return nodes, nodes / elapsed
+
+
+def main(depth: int = 4):
+    for moves in POSITIONS:
+        game_state: GameState = GameState.from_moves(moves)
+        clone_nodes, clone_rate = nodes_per_second(clone_walk, game_state, depth)
+        play_nodes, play_rate = nodes_per_second(play_undo_walk, Position.from_game_state(game_state), depth)
+        assert clone_nodes == play_nodes
+        print(f'{moves or "(empty)":<30} {clone_nodes:>7} nodes  clone/drop {clone_rate:>10.0f}/s  '
+              f'play/undo {play_rate:>10.0f}/s  speedup {play_rate / clone_rate:.1f}x')
+
+    # full solves with the make/unmake search
+    for moves in POSITIONS[1:]:
+        analyzer = AlphaBetaAnalyzer(GameState.from_moves(moves))
+        start: float = time.perf_counter()
+        value, column = analyzer.solve()
+        elapsed: float = time.perf_counter() - start
+        print(f'{moves:<30} score {value:>3} column {column}  {analyzer.nodes:>7} nodes  '
+              f'{analyzer.nodes / elapsed:>10.0f}/s')
+
+
+def compare_orderings(orderings: Tuple[str, ...] = ('natural', 'center', 'threat', 'killer')):
+    """This function solves the same positions with each move ordering and reports the nodes searched
+
+    Args:
+        orderings (tuple, optional): the move_ordering values to compare
+    """
+    for ordering in orderings:
+        total_nodes: int = 0
+        start: float = time.perf_counter()
+        for moves in ORDERING_POSITIONS:
+            analyzer = AlphaBetaAnalyzer(GameState.from_moves(moves), move_ordering=ordering)
+            analyzer.solve()
+            total_nodes += analyzer.nodes
+        elapsed: float = time.perf_counter() - start
+        print(f'{ordering:<10} {total_nodes:>10} nodes  {elapsed:>7.2f}s')
+
+
+def compare_solvers(solvers: Tuple[str, ...] = ('full_window', 'null_window')):
+    """This function solves the same positions with each root solver and reports the nodes searched
+
+    Args:
+        solvers (tuple, optional): the solver values to compare
+    """
+    for solver in solvers:
+        total_nodes: int = 0
+        start: float = time.perf_counter()
+        for moves in ORDERING_POSITIONS:
+            analyzer = AlphaBetaAnalyzer(GameState.from_moves(moves), solver=solver)
+            analyzer.solve()
+            total_nodes += analyzer.nodes
+        elapsed: float = time.perf_counter() - start
+        print(f'{solver:<12} {total_nodes:>10} nodes  {elapsed:>7.2f}s')
+
+
+def compare_backends():
+    """This function solves the same positions with the Python and the compiled solver and reports their speed"""
+    solvers = [('python', backend.PythonSolver)]
+    if backend.NATIVE:
+        solvers.append(('native', backend.bitboards.Solver))
+    for name, solver_class in solvers:
+        total_nodes: int = 0
+        start: float = time.perf_counter()
+        for moves in ORDERING_POSITIONS:
+            total_nodes += solver_class().solve(Position.from_game_state(GameState.from_moves(moves))).nodes
+        elapsed: float = time.perf_counter() - start
+        print(f'{name:<8} {total_nodes:>10} nodes  {elapsed:>7.2f}s  {total_nodes / elapsed:>10.0f}/s')
+
+
+def run_suite(set_names: Optional[List[str]] = None,
+              table_size: int = TranspositionTable.DEFAULT_SIZE) -> Dict:
+    """This function solves every position of the graded sets with a fresh AlphaBetaAnalyzer each
+
+    Args:
+        set_names (List[str], optional): the keys of POSITION_SETS to run, all of them by default
+        table_size (int, optional): the number of slots in the transposition tables
+
+    Returns:
+        Dict: the machine the suite ran on and, per set, the mean solve time, the nodes searched, the nodes per
+              second and the share of table probes that hit
+    """
+    report: Dict = {'python': platform.python_version(), 'machine': platform.machine(), 'sets': {}}
+    for name in set_names or list(POSITION_SETS):
+        positions: List[str] = POSITION_SETS[name]
+        seconds: float = 0
+        nodes: int = 0
+        hits: int = 0
+        probes: int = 0
+        for moves in positions:
+            analyzer = AlphaBetaAnalyzer(GameState.from_moves(moves), table_size=table_size)
+            start: float = time.perf_counter()
+            analyzer.solve()
+            seconds += time.perf_counter() - start
+            nodes += analyzer.nodes
+            table: TranspositionTable = analyzer.transposition_table
+            hits += table.hits
+            probes += table.hits + table.misses
+        report['sets'][name] = {
+            'positions': len(positions),
+            'mean_seconds': seconds / len(positions),
+            'nodes': nodes,
+            'nodes_per_second': nodes / seconds,
+            'tt_hit_rate': hits / probes if probes else 0.0,
+        }
+
+    return report
+
+
+def find_regressions(report: Dict, baseline: Dict, tolerance: float = 0.1) -> List[str]:
+    """This function compares a report of run_suite against an earlier one. The node counts do not depend on the
+    machine, so any growth counts, the timings only count once they are worse by more than the tolerance
+
+    Args:
+        report (Dict): the new report
+        baseline (Dict): the report to compare against
+        tolerance (float, optional): the share by which timings may get worse before they are flagged
+
+    Returns:
+        List[str]: one line per regression, empty if there are none
+    """
+    regressions: List[str] = []
+    for name, current in report['sets'].items():
+        previous: Optional[Dict] = baseline['sets'].get(name)
+        if previous is None:
+            continue
+        if current['nodes'] > previous['nodes']:
+            regressions.append(f'{name}: nodes {previous["nodes"]} -> {current["nodes"]}')
+        if current['mean_seconds'] > previous['mean_seconds'] * (1 + tolerance):
+            regressions.append(f'{name}: mean solve time {previous["mean_seconds"]:.4f}s -> '
+                               f'{current["mean_seconds"]:.4f}s')
+        if current['nodes_per_second'] < previous['nodes_per_second'] * (1 - tolerance):
+            regressions.append(f'{name}: nodes/s {previous["nodes_per_second"]:.0f} -> '
+                               f'{current["nodes_per_second"]:.0f}')
+
+    return regressions
+
+
+def suite(args: argparse.Namespace) -> int:
+    """This function runs the suite for the command line, writes the report and checks it against a baseline
+
+    Args:
+        args (argparse.Namespace): the parsed command line
+
+    Returns:
+        int: the exit code, 1 if there was a regression
+    """
+    report: Dict = run_suite(args.sets.split(',') if args.sets else None)
+    for name, result in report['sets'].items():
+        print(f'{name:<10} {result["positions"]:>3} positions  {result["mean_seconds"]:>8.4f}s mean  '
+              f'{result["nodes"]:>9} nodes  {result["nodes_per_second"]:>9.0f}/s  '
+              f'{result["tt_hit_rate"]:>6.1%} table hits', file=sys.stderr)
+    if args.json is not None:
+        with open(args.json, 'w') as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as fp:
+        regressions: List[str] = find_regressions(report, json.load(fp), args.tolerance)
+    for line in regressions:
+        print(f'REGRESSION {line}', file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the Connect 4 search')
+    parser.add_argument('--orderings', action='store_true', help='compare node counts of the move orderings')
+    parser.add_argument('--solvers', action='store_true', help='compare node counts of the root solvers')
+    parser.add_argument('--backends', action='store_true', help='compare the Python and the compiled solver')
+    parser.add_argument('--suite', action='store_true', help='solve the graded position sets and report as JSON')
+    parser.add_argument('--sets', default=None, help='comma separated sets for --suite: ' + ','.join(POSITION_SETS))
+    parser.add_argument('--json', default=None, help='write the --suite report to this file instead of stdout')
+    parser.add_argument('--baseline', default=None, help='an earlier --suite report to flag regressions against')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='how much worse timings may get before --baseline flags them')
+    args = parser.parse_args()
+    if args.suite:
+        sys.exit(suite(args))
+    elif args.orderings:
+        compare_orderings()
+    elif args.solvers:
+        compare_solvers()
+    elif args.backends:
+        compare_backends()
+    else:
+        main()
@@ -0,0 +1,36 @@
+# This is the unittest script for the benchmark suite
+
+import unittest
+from benchmark import *
+
+
+class TestSuite(unittest.TestCase):
+
+    def test_positions_playable(self):
+        for name, positions in POSITION_SETS.items():
+            for moves in positions:
+                game_state = GameState.from_moves(moves)
+                self.assertIsNotNone(game_state, (name, moves))
+                self.assertEqual(game_state.end(), -1, (name, moves))
+
+    def test_report(self):
+        report = run_suite(['end_game'], table_size=10007)
+        result = report['sets']['end_game']
+        self.assertEqual(result['positions'], len(END_GAME_POSITIONS))
+        self.assertGreater(result['nodes'], 0)
+        self.assertGreater(result['nodes_per_second'], 0)
+        self.assertTrue(0 <= result['tt_hit_rate'] <= 1)
+        self.assertEqual(find_regressions(report, report), [])
+
+    def test_regressions(self):
+        baseline = {'sets': {'mid_game': {'mean_seconds': 1.0, 'nodes': 1000, 'nodes_per_second': 1000.0}}}
+        report = {'sets': {'mid_game': {'mean_seconds': 1.05, 'nodes': 1001, 'nodes_per_second': 950.0},
+                           'early': {'mean_seconds': 9.0, 'nodes': 9000, 'nodes_per_second': 1000.0}}}
+        # only the extra node counts, the timings are within the tolerance and early has no baseline
+        self.assertEqual(len(find_regressions(report, baseline)), 1)
+        report['sets']['mid_game'].update(mean_seconds=1.5, nodes_per_second=500.0)
+        self.assertEqual(len(find_regressions(report, baseline)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,19 +1,367 @@
-# This is the Cython file to create the bitboards to represent the gamestate
+# This is the Cython file for the compiled bitboard core, backend.py builds it on import when it can
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True, initializedcheck=False
 
-import cython
+from libc.stdint cimport uint64_t
+from libc.stdlib cimport calloc, free
+from helper_classes import SolveResult, TranspositionTable
+import helper_classes
 
-cdef class BitBoard:
-    cdef list internal
+cdef extern from *:
+    int __builtin_popcountll(unsigned long long) nogil
+
+# the same board geometry as helper_classes: bit (7 * column) + row with row 0 at the top and a spare seventh bit
+cdef uint64_t TOP_CELLS[7]
+cdef uint64_t COLUMN_MASKS[7]
+cdef uint64_t COLUMN_BITS[7]
+cdef int CENTER_ORDER[7]
+cdef uint64_t TOP_ROW_MASK = 0
+cdef uint64_t BOARD_MASK = 0
+cdef int _column
+for _column in range(7):
+    TOP_CELLS[_column] = (<uint64_t> 1) << (7 * _column)
+    COLUMN_MASKS[_column] = (<uint64_t> 0b111111) << (7 * _column)
+    COLUMN_BITS[_column] = (<uint64_t> 0b1111111) << (7 * _column)
+    CENTER_ORDER[_column] = helper_classes.CENTER_ORDER[_column]
+    TOP_ROW_MASK |= TOP_CELLS[_column]
+    BOARD_MASK |= COLUMN_MASKS[_column]
+
+cdef enum:
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+    VALUE_OFFSET = 1 << 15
+
+
+cdef inline uint64_t winning_squares(uint64_t internal, uint64_t mask) nogil:
+    """This function is helper_classes.winning_squares on 64-bit words"""
+    cdef uint64_t squares = (internal >> 1) & (internal >> 2) & (internal >> 3)
+    cdef uint64_t pair
+
+    pair = (internal << 7) & (internal << 14)
+    squares |= pair & (internal << 21)
+    squares |= pair & (internal >> 7)
+    pair = (internal >> 7) & (internal >> 14)
+    squares |= pair & (internal << 7)
+    squares |= pair & (internal >> 21)
+
+    pair = (internal << 6) & (internal << 12)
+    squares |= pair & (internal << 18)
+    squares |= pair & (internal >> 6)
+    pair = (internal >> 6) & (internal >> 12)
+    squares |= pair & (internal << 6)
+    squares |= pair & (internal >> 18)
+
+    pair = (internal << 8) & (internal << 16)
+    squares |= pair & (internal << 24)
+    squares |= pair & (internal >> 8)
+    pair = (internal >> 8) & (internal >> 16)
+    squares |= pair & (internal << 8)
+    squares |= pair & (internal >> 24)
+
+    return squares & (BOARD_MASK ^ mask)
+
+
+cdef inline uint64_t playable_cells(uint64_t mask) nogil:
+    return (((~mask & BOARD_MASK) + TOP_ROW_MASK) >> 1) & BOARD_MASK
+
+
+cdef inline uint64_t non_losing(uint64_t current, uint64_t mask) nogil:
+    """This function is Position.non_losing_moves on 64-bit words"""
+    cdef uint64_t possible = playable_cells(mask)
+    cdef uint64_t opponent_wins = winning_squares(current ^ mask, mask)
+    cdef uint64_t forced = possible & opponent_wins
+    if forced:
+        if forced & (forced - 1):
+            return 0
+        possible = forced
+    return possible & ~(opponent_wins << 1)
+
+
+cdef inline uint64_t mirror_columns(uint64_t bits) nogil:
+    return (((bits & COLUMN_BITS[0]) << 42) | ((bits & COLUMN_BITS[1]) << 28) | ((bits & COLUMN_BITS[2]) << 14) |
+            (bits & COLUMN_BITS[3]) |
+            ((bits & COLUMN_BITS[4]) >> 14) | ((bits & COLUMN_BITS[5]) >> 28) | ((bits & COLUMN_BITS[6]) >> 42))
+
+
+cdef inline int lowest_column(uint64_t cells) nogil:
+    cdef int column
+    for column in range(7):
+        if cells & COLUMN_MASKS[column]:
+            return column
+    return -1
+
+
+cdef class Position:
+    """helper_classes.Position with the two boards kept in machine words"""
+    cdef public uint64_t mask
+    cdef public uint64_t current
+    cdef public int moves
 
     def __init__(self):
-        temp_array = [0] * 49
-        self.internal = temp_array
+        self.mask = 0
+        self.current = 0
+        self.moves = 0
 
-    cdef char win(self):
-        for Function function in [horizonal, vertical, diag1, diag2]:
-            cdef char win = self.function()
-            if win:
-                break
-        else:
+    @classmethod
+    def from_game_state(cls, game_state):
+        cdef Position to_return = cls()
+        bboard_1, bboard_2 = game_state.bitboards
+        to_return.mask = bboard_1.internal | bboard_2.internal
+        to_return.current = bboard_1.internal if game_state.current_turn == 1 else bboard_2.internal
+        to_return.moves = game_state.total_moves
+        return to_return
+
+    def to_game_state(self):
+        position = helper_classes.Position()
+        position.mask, position.current, position.moves = self.mask, self.current, self.moves
+        return position.to_game_state()
+
+    def can_play(self, int column):
+        return not self.mask & TOP_CELLS[column]
+
+    def move_bit(self, int column):
+        return (((~self.mask & COLUMN_MASKS[column]) + TOP_CELLS[column]) >> 1) & COLUMN_MASKS[column]
+
+    def is_winning_move(self, int column):
+        return bool(winning_squares(self.current, self.mask) & self.move_bit(column))
+
+    def possible(self):
+        return playable_cells(self.mask)
+
+    def non_losing_moves(self):
+        return non_losing(self.current, self.mask)
+
+    def winning_moves(self):
+        return winning_squares(self.current, self.mask) & playable_cells(self.mask)
+
+    def play(self, int column):
+        cdef uint64_t move = (((~self.mask & COLUMN_MASKS[column]) + TOP_CELLS[column]) >> 1) & COLUMN_MASKS[column]
+        self.current ^= self.mask
+        self.mask |= move
+        self.moves += 1
+
+    def undo(self, int column):
+        cdef uint64_t column_bits = self.mask & COLUMN_MASKS[column]
+        self.mask ^= column_bits & (~column_bits + 1)
+        self.current ^= self.mask
+        self.moves -= 1
+
+    def key(self):
+        return (self.current << 1) | ((~self.mask & BOARD_MASK) + TOP_ROW_MASK)
+
+    def canonical_key(self):
+        cdef uint64_t key = (self.current << 1) | ((~self.mask & BOARD_MASK) + TOP_ROW_MASK)
+        cdef uint64_t mirrored = mirror_columns(key)
+        if mirrored < key:
+            return mirrored, True
+        return key, False
+
+
+cdef class Solver:
+    """The null-window solver of AlphaBetaAnalyzer with its threat ordering and a private transposition table in
+    the same packing as TranspositionTable. It only does exact solves, there are no budgets, books or evaluators.
+    The table is kept between solves."""
+    cdef uint64_t *keys
+    cdef uint64_t *entries
+    cdef uint64_t size
+    cdef uint64_t mask
+    cdef uint64_t current
+    cdef int moves
+    cdef public long long nodes
+
+    def __cinit__(self, uint64_t table_size=TranspositionTable.DEFAULT_SIZE):
+        self.size = table_size
+        self.keys = <uint64_t *> calloc(table_size, sizeof(uint64_t))
+        self.entries = <uint64_t *> calloc(table_size, sizeof(uint64_t))
+        if self.keys == NULL or self.entries == NULL:
+            raise MemoryError()
+        self.nodes = 0
+
+    def __dealloc__(self):
+        free(self.keys)
+        free(self.entries)
+
+    def clear(self):
+        cdef uint64_t idx
+        for idx in range(self.size):
+            self.keys[idx] = 0
+            self.entries[idx] = 0
+
+    cdef inline void store(self, uint64_t key, int value, int bound, int column, int depth):
+        cdef uint64_t idx = key % self.size
+        if self.keys[idx] and self.keys[idx] != key and <int> (self.entries[idx] >> 22) > depth:
+            return
+        self.keys[idx] = key
+        self.entries[idx] = ((<uint64_t> (value + VALUE_OFFSET)) | ((<uint64_t> bound) << 16) |
+                             ((<uint64_t> (column + 1)) << 18) | ((<uint64_t> depth) << 22))
+
+    cdef int order(self, int first, uint64_t candidates, int *columns):
+        """This function is AlphaBetaAnalyzer.threat_order, it fills columns and returns how many there are"""
+        cdef int priorities[7]
+        cdef int count = 0
+        cdef int i, j, column, priority
+        cdef uint64_t move
+        for i in range(7):
+            column = CENTER_ORDER[i]
+            move = candidates & COLUMN_MASKS[column]
+            if not move:
+                continue
+            if column == first:
+                priority = 1000
+            else:
+                priority = __builtin_popcountll(winning_squares(self.current | move, self.mask | move))
+            # insertion sort that keeps ties in center order
+            j = count
+            while j > 0 and priorities[j - 1] < priority:
+                priorities[j] = priorities[j - 1]
+                columns[j] = columns[j - 1]
+                j -= 1
+            priorities[j] = priority
+            columns[j] = column
+            count += 1
+        return count
+
+    cdef int negamax(self, int alpha, int beta):
+        cdef uint64_t mask = self.mask
+        cdef uint64_t current = self.current
+        cdef int moves = self.moves
+        cdef uint64_t candidates, key, mirrored_key, entry, idx, move
+        cdef bint mirrored
+        cdef int tt_column = -1
+        cdef int value, bound, score, best, window_alpha, min_score, max_score, i, count, column
+        cdef int columns[7]
+        self.nodes += 1
+
+        if moves == 42:
             return 0
-        return 1
+        if winning_squares(current, mask) & playable_cells(mask):
+            return (43 - moves) // 2
+        candidates = non_losing(current, mask)
+        if not candidates:
+            return -((42 - moves) // 2)
+
+        key = (current << 1) | ((~mask & BOARD_MASK) + TOP_ROW_MASK)
+        mirrored_key = mirror_columns(key)
+        mirrored = mirrored_key < key
+        if mirrored:
+            key = mirrored_key
+
+        # every entry is an exact solve, so all of them are deep enough
+        idx = key % self.size
+        if self.keys[idx] == key:
+            entry = self.entries[idx]
+            value = <int> (entry & 0xFFFF) - VALUE_OFFSET
+            bound = (entry >> 16) & 0b11
+            tt_column = <int> ((entry >> 18) & 0b1111) - 1
+            if mirrored and tt_column != -1:
+                tt_column = 6 - tt_column
+            if bound == EXACT:
+                return value
+            if bound == LOWER:
+                if value >= beta:
+                    return value
+                if value > alpha:
+                    alpha = value
+            else:
+                if value <= alpha:
+                    return value
+                if value < beta:
+                    beta = value
+
+        min_score = -((40 - moves) // 2)
+        if alpha < min_score:
+            alpha = min_score
+            if alpha >= beta:
+                return alpha
+        max_score = (41 - moves) // 2
+        if beta > max_score:
+            beta = max_score
+            if alpha >= beta:
+                return beta
+
+        window_alpha = alpha
+        value = -999999
+        best = -1
+        count = self.order(tt_column, candidates, columns)
+        for i in range(count):
+            column = columns[i]
+            move = candidates & COLUMN_MASKS[column]
+            self.current = current ^ mask
+            self.mask = mask | move
+            self.moves = moves + 1
+            score = -self.negamax(-beta, -alpha)
+            self.mask = mask
+            self.current = current
+            self.moves = moves
+
+            if score > value:
+                value = score
+                best = column
+            if value >= beta:
+                self.store(key, value, LOWER, 6 - best if mirrored else best, 42 - moves)
+                return value
+            if value > alpha:
+                alpha = value
+
+        bound = EXACT if value > window_alpha else UPPER
+        self.store(key, value, bound, 6 - best if mirrored else best, 42 - moves)
+        return value
+
+    def solve(self, position):
+        """This function is AlphaBetaAnalyzer.null_window_solve
+
+        Args:
+            position: a helper_classes.Position or a Position of this module
+
+        Returns:
+            SolveResult: the score for the player to move, the column that achieves it and the nodes searched
+        """
+        cdef long long start_nodes = self.nodes
+        cdef uint64_t winning, candidates, mask, current
+        cdef int moves, lower, upper, guess, result, score, best, count, i
+        cdef int columns[7]
+        self.mask = position.mask
+        self.current = position.current
+        self.moves = position.moves
+
+        winning = winning_squares(self.current, self.mask) & playable_cells(self.mask)
+        if winning:
+            return SolveResult((43 - self.moves) // 2, lowest_column(winning), 0)
+
+        lower = -((42 - self.moves) // 2)
+        upper = (43 - self.moves) // 2
+        while lower < upper:
+            guess = lower + (upper - lower) // 2
+            if guess <= 0 and int(lower / 2) < guess:
+                guess = int(lower / 2)
+            elif guess >= 0 and int(upper / 2) > guess:
+                guess = int(upper / 2)
+            result = self.negamax(guess, guess + 1)
+            if result <= guess:
+                upper = result
+            else:
+                lower = result
+        score = lower
+
+        best = -1
+        # when every move loses the solver still picks the one that loses slowest
+        candidates = non_losing(self.current, self.mask)
+        if not candidates:
+            candidates = playable_cells(self.mask)
+        count = self.order(-1, candidates, columns)
+        mask = self.mask
+        current = self.current
+        moves = self.moves
+        for i in range(count):
+            self.current = current ^ mask
+            self.mask = mask | (candidates & COLUMN_MASKS[columns[i]])
+            self.moves = moves + 1
+            result = self.negamax(-score, -score + 1)
+            self.mask = mask
+            self.current = current
+            self.moves = moves
+            if result <= -score:
+                best = columns[i]
+                break
+
+        return SolveResult(score, best, self.nodes - start_nodes)
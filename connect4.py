@@ -1,102 +1,160 @@
 # This script will just be a visual game of Connect 4
 # Author: Caleb Bitting
 # Date: 05/25/2021
-import pickle
 import sys
 import time
 import math
 import pygame
-from functools import wraps
-from helper_classes import GameState, AlphaBetaAnalyzer
-from typing import Optional
-
-
-# decorator to trace execution of recursive function
-def trace(func):
-    # cache func name, which will be used for trace print
-    func_name = func.__name__
-    # define the separator, which will indicate current recursion level (repeated N times)
-    separator = '|  '
-
-    # current recursion depth
-    trace.recursion_depth = 0
-
-    @wraps(func)
-    def traced_func(*args, **kwargs):
-        # repeat separator N times (where N is recursion depth)
-        # `map(str, args)` prepares the iterable with str representation of positional arguments
-        # `", ".join(map(str, args))` will generate comma-separated list of positional arguments
-        # `"x"*5` will print `"xxxxx"` - so we can use multiplication operator to repeat separator
-        print(f'{separator * trace.recursion_depth}|-- {func_name}({", ".join(map(str, args))})')
-        # we're diving in
-        trace.recursion_depth += 1
-        result = func(*args, **kwargs)
-        # going out of that level of recursion
-        trace.recursion_depth -= 1
-        # result is printed on the next level
-        print(f'{separator * (trace.recursion_depth + 1)}|-- return {result}')
-
-        return result
-
-    return traced_func
-
-
-# helper_classes.AlphaBetaAnalyzer.alpha_beta = trace(helper_classes.AlphaBetaAnalyzer.alpha_beta)
-
-
-def draw_board(game_state: GameState, screen: pygame.display, first_draw: bool = False) -> None:
-    """This function draws the game board
-
-    Args:
-        game_state (GameState): this object contains all the information needed to rebuild the game state
-        screen (pygame.screen): the screen on which to draw the information
-        first_draw (bool, optional): is this the first draw or not?
-    """
-    # draw an empty board if it is the first time
-    if first_draw:
+from helper_classes import GameState
+from engine_server import EngineProcess
+from game_records import position_at
+from typing import Dict, List, Optional, Tuple
+
+# seconds the AI may think about a move before it has to answer
+AI_MOVE_TIME: float = 1.0
+# a file that keeps what the AI has searched between games, None keeps it in memory for this game only
+AI_TABLE_PATH: Optional[str] = None
+
+
+# the board is drawn in squares of this many pixels, 7 columns wide and 6 rows high
+SQUARE: int = 100
+TOKEN_RADIUS: int = 45
+BOARD_COLOR: List[int] = [69, 69, 69]
+EMPTY_COLOR: List[int] = [0, 0, 0]
+# yellowish for player 1 and reddish for player 2
+PLAYER_COLORS: Dict[int, List[int]] = {1: [250, 255, 92], 2: [230, 69, 69]}
+
+
+class BoardRenderer:
+    """Draws a game onto a surface one change at a time. The empty board is drawn once and kept as a background,
+    the renderer remembers which tokens are already on the surface and each draw only paints the squares that
+    changed since the last one. present then updates just those squares on the display. A headless renderer draws
+    onto a surface of its own without opening a window, for tests and benchmarks."""
+    surface: pygame.Surface
+    background: pygame.Surface
+    headless: bool
+    drawn: Tuple[int, int]
+    dirty: List[pygame.Rect]
+
+    def __init__(self, surface: Optional[pygame.Surface] = None, headless: bool = False):
+        """
+        Args:
+            surface (pygame.Surface, optional): the display surface to draw on, required unless headless
+            headless (bool, optional): draw onto an off-screen surface and never touch the display
+        """
+        if surface is None:
+            if not headless:
+                raise ValueError('a renderer needs a surface unless it is headless')
+            surface = pygame.Surface((7 * SQUARE, 6 * SQUARE))
+        self.surface = surface
+        self.headless = headless
+        self.background = pygame.Surface((7 * SQUARE, 6 * SQUARE))
         for c in range(7):
             for r in range(6):
-                # set up a rectangle
-                rect = pygame.Rect(c * 100, r * 100, (c + 1) * 100, (r + 1) * 100)
-                pygame.draw.rect(screen, [69, 69, 69], rect)
-                # this is an ugly draw statement that draws a black circle in the middle of each square
-                pygame.draw.circle(screen, [0, 0, 0], (int((c * 100) + 50), int((r * 100) + 50)), 45)
-
-    # every time get the bitboards for each player
-    bboard_1, bboard_2 = game_state.bitboards
-
-    # draw the tokens for each player in the correct location if the corresponding bit is high
-    for idx, position in enumerate(reversed(bboard_1.binary_array)):
-        if position == 1:
-            row = idx % 7  # modulo gets the row
-            column = idx // 7  # integer division gets the column
-            draw_token(screen, row, column, 1)
-
-    for idx, position in enumerate(reversed(bboard_2.binary_array)):
-        if position == 1:
-            row = idx % 7  # modulo gets the row
-            column = idx // 7  # integer division gets the column
-            draw_token(screen, row, column, 2)
-
-
-def draw_token(screen: pygame.display, row: int, column: int, player: int) -> None:
+                pygame.draw.rect(self.background, BOARD_COLOR, self.square(r, c))
+                pygame.draw.circle(self.background, EMPTY_COLOR, self.square(r, c).center, TOKEN_RADIUS)
+        self.reset()
+
+    @staticmethod
+    def square(row: int, column: int) -> pygame.Rect:
+        """This function finds the square of the board a token is drawn in
+
+        Args:
+            row (int): the row, 0 at the top
+            column (int): the column
+
+        Returns:
+            pygame.Rect: the square
+        """
+        return pygame.Rect(column * SQUARE, row * SQUARE, SQUARE, SQUARE)
+
+    def reset(self) -> None:
+        """This function clears the surface back to the empty board and marks all of it for the next present"""
+        self.surface.blit(self.background, (0, 0))
+        self.drawn = (0, 0)
+        self.dirty = [self.surface.get_rect()]
+
+    def draw(self, game_state: GameState) -> List[pygame.Rect]:
+        """This function brings the surface up to date with a game state. Only tokens that were dropped or taken
+        back since the last draw are painted, so a frame in which nothing happened costs two comparisons
+
+        Args:
+            game_state (GameState): the game state to show, e.g. the next or the previous one in a replay
+
+        Returns:
+            List[pygame.Rect]: the squares painted by this draw
+        """
+        painted: List[pygame.Rect] = []
+        for player, (bboard, drawn) in enumerate(zip(game_state.bitboards, self.drawn), start=1):
+            # tokens taken back get their square of the background back, new ones are painted over it
+            changed: int = bboard.internal ^ drawn
+            while changed:
+                bit: int = changed & -changed
+                index: int = bit.bit_length() - 1
+                rect = self.square(index % 7, index // 7)
+                if bboard.internal & bit:
+                    draw_token(self.surface, index % 7, index // 7, player)
+                else:
+                    self.surface.blit(self.background, rect, rect)
+                painted.append(rect)
+                changed ^= bit
+        self.drawn = (game_state.bboard_1.internal, game_state.bboard_2.internal)
+        self.dirty.extend(painted)
+
+        return painted
+
+    def present(self) -> List[pygame.Rect]:
+        """This function shows the squares painted since the last present, without redrawing the rest of the window
+
+        Returns:
+            List[pygame.Rect]: the squares updated, empty if nothing changed
+        """
+        dirty: List[pygame.Rect] = self.dirty
+        self.dirty = []
+        if dirty and not self.headless:
+            pygame.display.update(dirty)
+
+        return dirty
+
+
+def draw_token(screen: pygame.Surface, row: int, column: int, player: int) -> None:
     """This function draws a player token.
 
     Args:
-        screen (pygame.screen): the screen on which to draw
+        screen (pygame.Surface): the surface on which to draw
         row (int): the row in which to drop the token
         column (int): the column into which to drop the token
         player (int): the plays whose turn it is
     """
     # find the center of the circle
-    x_center = 50 + 100 * column
-    y_center = 50 + 100 * row
-
-    # yellowish for player 1 and reddish for player 2
-    color = [250, 255, 92] if player == 1 else [230, 69, 69]
+    x_center = SQUARE // 2 + SQUARE * column
+    y_center = SQUARE // 2 + SQUARE * row
 
     # draw the circle
-    pygame.draw.circle(screen, color, (x_center, y_center), 45)
+    pygame.draw.circle(screen, PLAYER_COLORS[player], (x_center, y_center), TOKEN_RADIUS)
+
+
+def replay(moves: str, renderer: BoardRenderer) -> int:
+    """This function plays a game onto a renderer one move at a time, as a spectator window would show it. With a
+    headless renderer it measures the cost of drawing without a display
+
+    Args:
+        moves (str): the columns played from the empty board
+        renderer (BoardRenderer): the renderer to draw on
+
+    Returns:
+        int: the number of squares updated over the whole replay
+    """
+    game_state = GameState()
+    renderer.reset()
+    updated: int = len(renderer.present())
+    for char in moves:
+        if not game_state.drop(int(char)):
+            break
+        renderer.draw(game_state)
+        updated += len(renderer.present())
+
+    return updated
 
 
 def read_board_string(board_info: str) -> Optional[GameState]:
@@ -108,13 +166,7 @@ def read_board_string(board_info: str) -> Optional[GameState]:
     Returns:
         GameState: the game state object or a NoneType object
     """
-    to_return: GameState = GameState()
-    for char in board_info:
-        successful_drop: bool = to_return.drop(int(char))
-        if not successful_drop:
-            return None
-
-    return to_return
+    return GameState.from_moves(board_info)
 
 
 def main():
@@ -128,8 +180,16 @@ def main():
     game_state = read_board_string('3333332410221220000041116565')
     # game_state = read_board_string('33333320')
 
+    # the engine searches in its own process so the window keeps responding. It keeps one transposition table for
+    # the whole game and ponders while the player thinks, so every AI move starts from what was searched before
+    engine = EngineProcess(AI_TABLE_PATH)
+    ai_request: Optional[int] = None
+    ponder_request: Optional[int] = None
+    clock = pygame.time.Clock()
+
     # draw the board
-    draw_board(game_state, screen, first_draw=True)
+    renderer = BoardRenderer(screen)
+    renderer.draw(game_state)
 
     # run pygame
     game_over = False
@@ -138,6 +198,7 @@ def main():
         for event in pygame.event.get():
             # exit
             if event.type == pygame.QUIT:
+                engine.close()
                 sys.exit()
 
             # player clicked
@@ -148,8 +209,12 @@ def main():
                     dropped = game_state.drop(drop_column)
 
                     if dropped:
-                        # redraw the player tokens
-                        draw_board(game_state, screen)
+                        # whatever the ponder search found stays in the engine's table
+                        if ponder_request is not None:
+                            engine.cancel(ponder_request)
+                            ponder_request = None
+                        # draw the new token
+                        renderer.draw(game_state)
                         # check for game end
                         end = game_state.end()
                         if end == 1:  # player one victory
@@ -164,12 +229,19 @@ def main():
                         else:  # game not over
                             pass
                             # print(f'if player 1: {game_state.bboard_1.win_this_move(game_state.top_row_by_column)}\nif player 2: {game_state.bboard_2.win_this_move(game_state.top_row_by_column)}')
-        if game_state.current_turn == 2:
-            ab_analyzer = AlphaBetaAnalyzer(game_state)
-            ai_col = ab_analyzer.best_column()
-            # print(f'{ai_col = }')
+        if game_state.end() == -1:
+            if game_state.current_turn == 2 and ai_request is None:
+                ai_request = engine.submit(game_state, max_time=AI_MOVE_TIME)
+            elif game_state.current_turn == 1 and ponder_request is None and ai_request is None:
+                ponder_request = engine.submit(game_state)
+
+        # answers to cancelled ponder searches are dropped, only the AI move matters
+        answer = engine.poll()
+        if answer is not None and answer['id'] == ai_request:
+            ai_request = None
+            ai_col = answer['column']
             game_state.drop(ai_col)
-            draw_board(game_state, screen)
+            renderer.draw(game_state)
             end = game_state.end()
             if end == 1:  # player one victory
                 print('Player 1 won!')
@@ -183,26 +255,31 @@ def main():
             else:  # game not over
                 pass
 
-        pygame.display.flip()  # update display
-    # once game over sleep for a bit then quit
+        renderer.present()  # update the squares that changed
+        clock.tick(60)
+    # once game over show the last move, sleep for a bit then quit
+    renderer.present()
+    engine.close()
     time.sleep(1)
     sys.exit()
 
+
 def debug():
     # set up pygame
     pygame.init()
     screen = pygame.display.set_mode((700, 600))
     current_state = 0
 
-    # set up objects
-    with open('game_states.pickle', 'rb') as fp:
-        game_states = pickle.load(fp)
-    game_state = game_states[current_state]
+    # set up objects, the positions are read from the file one at a time as they are stepped through
+    fp = open('game_states.c4r', 'rb')
+    game_state = position_at(fp, current_state).to_game_state()
 
     # draw the board
-    draw_board(game_state, screen, first_draw=True)
+    renderer = BoardRenderer(screen)
+    renderer.draw(game_state)
 
     # run pygame
+    clock = pygame.time.Clock()
     while True:
         # check for events
         for event in pygame.event.get():
@@ -214,16 +291,18 @@ def debug():
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_n:
                     current_state += 1
-                    if current_state == len(game_states):
+                    if position_at(fp, current_state) is None:
                         print('Out of game states')
-                        current_state = len(game_states) - 1
+                        current_state -= 1
                 if event.key == pygame.K_b:
                     current_state -= 1
                     current_state = max(current_state, 0)
-                game_state = game_states[current_state]
-                draw_board(game_state, screen, first_draw=True)
+                game_state = position_at(fp, current_state).to_game_state()
+                # only the tokens that differ from the last position are redrawn
+                renderer.draw(game_state)
 
-        pygame.display.flip()  # update display
+        renderer.present()  # update the squares that changed
+        clock.tick(60)
     # once game over sleep for a bit then quit
     time.sleep(1)
     sys.exit()
@@ -84,5 +84,33 @@ class TestBoardStates(unittest.TestCase):
                 self.assertEqual(expected, 1, f'Board:\n{board}')
 
 
+class TestBoardRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.renderer = BoardRenderer(headless=True)
+        self.renderer.present()
+
+    def test_only_new_tokens_drawn(self):
+        game_state = GameState.from_moves('33')
+        self.assertEqual(len(self.renderer.draw(game_state)), 2)
+        self.assertEqual(self.renderer.draw(game_state), [])
+        game_state.drop(4)
+        painted = self.renderer.draw(game_state)
+        self.assertEqual(painted, [BoardRenderer.square(5, 4)])
+        self.assertEqual(self.renderer.surface.get_at(painted[0].center)[:3], tuple(PLAYER_COLORS[1]))
+        self.assertEqual(len(self.renderer.present()), 3)
+        self.assertEqual(self.renderer.present(), [])
+
+    def test_taken_back(self):
+        self.renderer.draw(GameState.from_moves('334'))
+        painted = self.renderer.draw(GameState.from_moves('33'))
+        self.assertEqual(painted, [BoardRenderer.square(5, 4)])
+        self.assertEqual(self.renderer.surface.get_at(painted[0].center)[:3], tuple(EMPTY_COLOR))
+
+    def test_replay(self):
+        # one full update for the empty board, then one square per move
+        self.assertEqual(replay('3333332410221220000041116565', self.renderer), 1 + 28)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,469 @@
+# This script runs the engine in background processes and serves it to the game and to other tools over asyncio
+import json
+import queue
+import signal
+import asyncio
+import argparse
+import threading
+from multiprocessing import Process, Pipe
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional, Set, Tuple, Union
+from helper_classes import GameState, Position, AlphaBetaAnalyzer, TranspositionTable, SearchTimeout
+from evaluation import evaluate
+from session import AnalyzerSession
+
+
+def analyze_request(analyzer: AlphaBetaAnalyzer, request: Dict) -> Dict:
+    """This function answers one analysis request in a worker process
+
+    Args:
+        analyzer (AlphaBetaAnalyzer): the analyzer of the worker
+        request (Dict): the position as 'moves' or as a Position 'key', and the limits 'max_time', 'max_depth' and
+                        'exact', see EngineProcess.submit
+
+    Returns:
+        Dict: the best column, the score for the player to move, the depth searched, the nodes searched and
+              whether the search was cancelled, or an error message
+    """
+    max_time, max_depth = request.get('max_time'), request.get('max_depth')
+    if max_time is not None and (isinstance(max_time, bool) or not isinstance(max_time, (int, float))):
+        return {'error': 'bad max_time'}
+    if max_depth is not None and (isinstance(max_depth, bool) or not isinstance(max_depth, int)):
+        return {'error': 'bad max_depth'}
+    if 'key' in request:
+        key = request['key']
+        if isinstance(key, bool) or not isinstance(key, int) or not 0 < key < 1 << 49:
+            return {'error': 'bad key'}
+        position: Position = Position.from_key(key)
+        # every column needs its marker bit and the player to move has as many tokens as the other one or one fewer
+        if position.key() != key or bin(position.current).count('1') != position.moves // 2:
+            return {'error': 'bad key'}
+        game_state: Optional[GameState] = position.to_game_state()
+    else:
+        moves = request.get('moves', '')
+        game_state = GameState.from_moves(moves) if isinstance(moves, str) else None
+    if game_state is None:
+        return {'error': 'illegal move string'}
+    if game_state.end() != -1:
+        return {'error': 'game is over'}
+
+    analyzer.load(game_state)
+    start_nodes: int = analyzer.nodes
+    if request.get('exact'):
+        try:
+            value, column = analyzer.solve()
+        except SearchTimeout:
+            return {'cancelled': True, 'nodes': analyzer.nodes - start_nodes}
+        depth: int = 42 - game_state.total_moves
+    else:
+        value, column, depth = analyzer.iterative_deepening(max_time, None, max_depth)
+        value = value if analyzer.score_unit == 1 else value / analyzer.score_unit
+
+    return {'column': column, 'score': value, 'depth': depth, 'cancelled': analyzer.stop_requested,
+            'nodes': analyzer.nodes - start_nodes}
+
+
+def worker_main(conn: Connection, table_path: Optional[str], table_size: int, heuristic: bool) -> None:
+    """This function is the body of an engine process. A listener thread takes every message off the pipe so that
+    a cancel reaches the search while it runs, the main thread works through the requests one at a time
+
+    Args:
+        conn (Connection): the worker's end of the pipe
+        table_path (str, optional): a file to keep the transposition table in, see AnalyzerSession
+        table_size (int): the number of slots in the transposition table
+        heuristic (bool): whether timed searches score their horizon with evaluation.evaluate
+    """
+    session = AnalyzerSession(table_path, table_size, evaluator=evaluate if heuristic else None)
+    analyzer: AlphaBetaAnalyzer = session.analyzer
+    # a worker forked from the game inherits the handler pygame puts on SIGTERM, which would make terminate a no-op
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    requests: queue.Queue = queue.Queue()
+    stopping = threading.Event()
+    cancelled: Set[int] = set()
+    # ids go up one request at a time, so a cancel for an id at or below 'done' came too late to matter
+    running: Dict[str, Optional[int]] = {'id': None, 'done': 0}
+
+    def listen():
+        while True:
+            try:
+                message: Dict = conn.recv()
+            except (EOFError, OSError):
+                message = {'op': 'stop'}
+            if message['op'] == 'cancel':
+                if message['id'] > running['done']:
+                    cancelled.add(message['id'])
+                if running['id'] == message['id']:
+                    analyzer.stop_requested = True
+            elif message['op'] == 'stop':
+                # a search without limits would otherwise keep the worker alive until it is solved
+                stopping.set()
+                analyzer.stop_requested = True
+                requests.put(None)
+                return
+            else:
+                requests.put(message)
+
+    threading.Thread(target=listen, daemon=True).start()
+    while (request := requests.get()) is not None and not stopping.is_set():
+        # clear the flag before publishing the id, so a cancel for this request cannot be lost in between
+        analyzer.stop_requested = False
+        running['id'] = request['id']
+        if request['id'] in cancelled:
+            response: Dict = {'cancelled': True}
+        else:
+            try:
+                response = analyze_request(analyzer, request)
+            except Exception as error:
+                # a bad request must not take the engine down with it, the next one loads its own position
+                response = {'error': f'analysis failed: {error!r}'}
+        running['id'] = None
+        running['done'] = request['id']
+        cancelled.discard(request['id'])
+        response['id'] = request['id']
+        conn.send(response)
+    session.close()
+
+
+class EngineProcess:
+    """One engine running in its own process. Requests go in with submit and answers come back in the same order
+    through poll, which never blocks, or result, which does. The engine keeps its transposition table between
+    requests, so pondering on a position makes the next search from there faster."""
+    process: Process
+    conn: Connection
+    next_id: int
+
+    def __init__(self, table_path: Optional[str] = None, table_size: int = TranspositionTable.DEFAULT_SIZE,
+                 heuristic: bool = True):
+        """
+        Args:
+            table_path (str, optional): a file to keep the transposition table in, see AnalyzerSession
+            table_size (int, optional): the number of slots in the transposition table
+            heuristic (bool, optional): whether timed searches score their horizon with evaluation.evaluate
+        """
+        self.conn, child = Pipe()
+        self.process = Process(target=worker_main, args=(child, table_path, table_size, heuristic), daemon=True)
+        self.process.start()
+        child.close()
+        self.next_id = 0
+
+    def submit(self, position: Union[str, int, GameState], max_time: Optional[float] = None,
+               max_depth: Optional[int] = None, exact: bool = False) -> int:
+        """This function hands the engine a position to analyze. Without exact or a limit the engine ponders: it
+        keeps deepening until the position is solved or the request is cancelled
+
+        Args:
+            position (str, int or GameState): the moves played from the empty board, a Position key or the game
+                state
+            max_time (float, optional): the seconds the search may take
+            max_depth (int, optional): the number of moves to look ahead
+            exact (bool, optional): solve the position to the end of the game, ignoring the limits
+
+        Returns:
+            int: the id of the request, the answer carries the same one
+        """
+        self.next_id += 1
+        request: Dict = {'op': 'analyze', 'id': self.next_id, 'max_time': max_time, 'max_depth': max_depth,
+                         'exact': exact}
+        if isinstance(position, GameState):
+            request['key'] = Position.from_game_state(position).key()
+        elif isinstance(position, int):
+            request['key'] = position
+        else:
+            request['moves'] = position
+        self.conn.send(request)
+
+        return self.next_id
+
+    def cancel(self, request_id: int) -> None:
+        """This function stops a request. A running search answers at once with the best column it has found and
+        cancelled set, a request still waiting answers with just cancelled set
+
+        Args:
+            request_id (int): the id submit returned
+        """
+        try:
+            self.conn.send({'op': 'cancel', 'id': request_id})
+        except OSError:
+            pass  # an engine that has stopped has nothing left to cancel
+
+    def poll(self) -> Optional[Dict]:
+        """This function picks up an answer if one is ready, without waiting
+
+        Returns:
+            Optional[Dict]: the answer, see analyze_request, or None
+        """
+        return self.conn.recv() if self.conn.poll() else None
+
+    def result(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """This function waits for the next answer
+
+        Args:
+            timeout (float, optional): the most seconds to wait, forever by default
+
+        Returns:
+            Optional[Dict]: the answer or None if the time ran out
+        """
+        return self.conn.recv() if self.conn.poll(timeout) else None
+
+    def close(self) -> None:
+        try:
+            self.conn.send({'op': 'stop'})
+        except OSError:
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+
+class EngineServer:
+    """Serves a pool of engine processes to any number of clients over TCP. Every message is one line of JSON. A
+    client sends {"op": "analyze", "id": ..., "moves": ...} with the limits of EngineProcess.submit, or
+    {"op": "cancel", "id": ...}, and gets one answer per analyze request with the same id, in the order the
+    answers become ready."""
+    workers: int
+    table_size: int
+    heuristic: bool
+
+    def __init__(self, workers: int = 2, table_size: int = TranspositionTable.DEFAULT_SIZE, heuristic: bool = True):
+        """
+        Args:
+            workers (int, optional): the number of engine processes, the most requests analyzed at once
+            table_size (int, optional): the number of slots in each engine's transposition table
+            heuristic (bool, optional): whether timed searches score their horizon with evaluation.evaluate
+        """
+        self.workers = workers
+        self.table_size = table_size
+        self.heuristic = heuristic
+        self.engines: List[EngineProcess] = []
+        self.idle: Optional[asyncio.Queue] = None
+        self.running: Dict[Tuple[int, int], Tuple[EngineProcess, int]] = {}
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> asyncio.AbstractServer:
+        """This function starts the engines and listens for clients
+
+        Args:
+            host (str, optional): the address to listen on
+            port (int, optional): the port to listen on, 0 picks a free one
+
+        Returns:
+            asyncio.AbstractServer: the listening server, its sockets tell the port
+        """
+        self.idle = asyncio.Queue()
+        for _ in range(self.workers):
+            engine = EngineProcess(table_size=self.table_size, heuristic=self.heuristic)
+            self.engines.append(engine)
+            self.idle.put_nowait(engine)
+
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    def replace(self, engine: EngineProcess) -> EngineProcess:
+        """This function swaps an engine whose process has stopped for a new one
+
+        Args:
+            engine (EngineProcess): the stopped engine
+
+        Returns:
+            EngineProcess: the engine that takes its place
+        """
+        engine.close()
+        replacement = EngineProcess(table_size=self.table_size, heuristic=self.heuristic)
+        self.engines[self.engines.index(engine)] = replacement
+
+        return replacement
+
+    async def analyze(self, client: int, request: Dict) -> Dict:
+        """This function waits for an idle engine and has it answer a request
+
+        Args:
+            client (int): the number of the connection the request came in on
+            request (Dict): the request
+
+        Returns:
+            Dict: the engine's answer
+        """
+        engine: EngineProcess = await self.idle.get()
+        stopped: bool = False
+        try:
+            if not engine.process.is_alive():
+                engine = self.replace(engine)
+            limits: Dict = {name: request.get(name) for name in ('max_time', 'max_depth')}
+            # the engine checks the position and the limits, a bad one gets an error answer
+            position: Union[str, int] = request['key'] if 'key' in request else request.get('moves', '')
+            try:
+                engine_id: int = engine.submit(position, exact=bool(request.get('exact')), **limits)
+                self.running[(client, request['id'])] = (engine, engine_id)
+                reading: asyncio.Future = asyncio.ensure_future(asyncio.to_thread(engine.result))
+                try:
+                    response: Dict = await asyncio.shield(reading)
+                except asyncio.CancelledError:
+                    # the thread keeps waiting on the pipe, the engine cannot be handed on until its answer is taken
+                    # off, or the next request would read it as its own
+                    engine.cancel(engine_id)
+                    while not reading.done():
+                        try:
+                            await asyncio.shield(reading)
+                        except asyncio.CancelledError:
+                            pass
+                        except (EOFError, OSError):
+                            stopped = True
+                    raise
+            except (EOFError, OSError):
+                # the pipe closes when the process dies, it may not have been reaped yet
+                stopped = True
+                response = {'error': 'the engine stopped'}
+        finally:
+            self.running.pop((client, request['id']), None)
+            if stopped or not engine.process.is_alive():
+                engine = self.replace(engine)
+            self.idle.put_nowait(engine)
+
+        return response
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """This function serves one connection until the client hangs up
+
+        Args:
+            reader (asyncio.StreamReader): the incoming lines
+            writer (asyncio.StreamWriter): the outgoing lines
+        """
+        client: int = id(writer)
+        pending: Dict[int, asyncio.Task] = {}
+
+        async def answer(request: Dict):
+            try:
+                response: Dict = await self.analyze(client, request)
+            except asyncio.CancelledError:
+                response = {'cancelled': True}  # cancelled while waiting for an engine
+            response['id'] = request['id']
+            pending.pop(request['id'], None)
+            try:
+                writer.write((json.dumps(response) + '\n').encode())
+                await writer.drain()
+            except ConnectionError:
+                pass  # the client hung up, nobody is left to tell
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request: Dict = json.loads(line)
+                    op: str = request['op']
+                    request_id: int = request['id']
+                    # the id keys the client's pending requests, a list or an object cannot
+                    if isinstance(request_id, bool) or not isinstance(request_id, (int, str)):
+                        raise TypeError(request_id)
+                except (ValueError, KeyError, TypeError):
+                    writer.write(b'{"error": "bad request"}\n')
+                    continue
+                if op == 'analyze':
+                    pending[request_id] = asyncio.create_task(answer(request))
+                elif op == 'cancel':
+                    if (client, request_id) in self.running:
+                        engine, engine_id = self.running[(client, request_id)]
+                        engine.cancel(engine_id)
+                    elif request_id in pending:
+                        pending[request_id].cancel()
+        finally:
+            for task in pending.values():
+                task.cancel()
+            for (owner, _), (engine, engine_id) in list(self.running.items()):
+                if owner == client:
+                    engine.cancel(engine_id)
+            writer.close()
+
+    def close(self) -> None:
+        for engine in self.engines:
+            engine.close()
+
+
+class EngineClient:
+    """An asyncio client of EngineServer that can have many requests out at once"""
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    next_id: int
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+        self.futures: Dict[int, asyncio.Future] = {}
+        self.listener: asyncio.Task = asyncio.create_task(self.listen())
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = 8765) -> 'EngineClient':
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def listen(self) -> None:
+        """This function hands every answer to the future of its request"""
+        while line := await self.reader.readline():
+            response: Dict = json.loads(line)
+            future: Optional[asyncio.Future] = self.futures.pop(response.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self.futures.values():
+            future.set_exception(ConnectionError('the engine server hung up'))
+        self.futures.clear()
+
+    async def submit(self, moves: str, max_time: Optional[float] = None, max_depth: Optional[int] = None,
+                     exact: bool = False) -> int:
+        """This function sends a request without waiting for the answer, see EngineProcess.submit
+
+        Returns:
+            int: the id to await the answer or cancel the request with
+        """
+        self.next_id += 1
+        self.futures[self.next_id] = asyncio.get_running_loop().create_future()
+        request: Dict = {'op': 'analyze', 'id': self.next_id, 'moves': moves, 'max_time': max_time,
+                         'max_depth': max_depth, 'exact': exact}
+        self.writer.write((json.dumps(request) + '\n').encode())
+        await self.writer.drain()
+
+        return self.next_id
+
+    async def result(self, request_id: int) -> Dict:
+        return await self.futures[request_id]
+
+    async def analyze(self, moves: str, max_time: Optional[float] = None, max_depth: Optional[int] = None,
+                      exact: bool = False) -> Dict:
+        """This function sends a request and waits for its answer
+
+        Returns:
+            Dict: the answer, see analyze_request
+        """
+        return await self.result(await self.submit(moves, max_time, max_depth, exact))
+
+    async def cancel(self, request_id: int) -> None:
+        self.writer.write((json.dumps({'op': 'cancel', 'id': request_id}) + '\n').encode())
+        await self.writer.drain()
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.listener.cancel()
+
+
+async def serve(host: str, port: int, workers: int, table_size: int) -> None:
+    engine_server = EngineServer(workers, table_size)
+    server = await engine_server.start(host, port)
+    print(f'serving {workers} engines on {host}:{server.sockets[0].getsockname()[1]}')
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        engine_server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the engine to analysis clients over TCP')
+    parser.add_argument('--host', default='127.0.0.1', help='the address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='the port to listen on')
+    parser.add_argument('--workers', type=int, default=2, help='the number of engine processes')
+    parser.add_argument('--table-size', type=int, default=TranspositionTable.DEFAULT_SIZE,
+                        help='the number of transposition table slots per engine')
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.workers, args.table_size))
+
+
+if __name__ == '__main__':
+    main()
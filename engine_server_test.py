@@ -0,0 +1,224 @@
+# This is the unittest script for the engine processes and the asyncio engine server
+
+import time
+import asyncio
+import unittest
+from engine_server import *
+
+MOVES: str = '3333332410221220000041116565'
+
+
+class TestAnalyzeRequest(unittest.TestCase):
+
+    def test_exact(self):
+        analyzer = AlphaBetaAnalyzer(GameState(), table_size=10007)
+        answer = analyze_request(analyzer, {'moves': MOVES, 'exact': True})
+        self.assertEqual((answer['score'], answer['column']),
+                         AlphaBetaAnalyzer(GameState.from_moves(MOVES), table_size=10007).solve())
+        self.assertFalse(answer['cancelled'])
+
+    def test_key_and_errors(self):
+        analyzer = AlphaBetaAnalyzer(GameState(), table_size=10007)
+        key = Position.from_game_state(GameState.from_moves('010101')).key()
+        self.assertEqual(analyze_request(analyzer, {'key': key, 'max_depth': 4})['column'], 0)
+        self.assertIn('error', analyze_request(analyzer, {'moves': '0000000'}))
+        self.assertIn('error', analyze_request(analyzer, {'moves': '0101010'}))
+
+    def test_malformed(self):
+        analyzer = AlphaBetaAnalyzer(GameState(), table_size=10007)
+        # a zero column has no marker bit, 12345 leaves the player to move with more tokens than the other one
+        for request in [{'moves': None}, {'moves': 33}, {'key': 'x'}, {'key': 2.5}, {'key': True}, {'key': -1},
+                        {'key': 0}, {'key': 12345}, {'key': 1 << 70}, {'moves': '', 'max_time': '0.1'},
+                        {'moves': '', 'max_depth': '3'}, {'moves': '', 'max_depth': 2.5}]:
+            self.assertIn('error', analyze_request(analyzer, request), request)
+        self.assertEqual(analyze_request(analyzer, {'moves': '010101', 'max_time': 1, 'max_depth': 4})['column'], 0)
+
+    def test_stop_requested(self):
+        analyzer = AlphaBetaAnalyzer(GameState(), table_size=10007)
+        analyzer.stop_requested = True
+        answer = analyze_request(analyzer, {'moves': ''})
+        self.assertTrue(answer['cancelled'])
+        self.assertIn(answer['column'], range(7))
+
+
+class TestEngineProcess(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = EngineProcess(table_size=10007)
+
+    def tearDown(self):
+        self.engine.close()
+
+    def test_answers_in_order(self):
+        first = self.engine.submit(GameState.from_moves('010101'), max_depth=4)
+        second = self.engine.submit(MOVES, exact=True)
+        answers = [self.engine.result(30), self.engine.result(30)]
+        self.assertEqual([answer['id'] for answer in answers], [first, second])
+        self.assertEqual(answers[0]['column'], 0)
+        self.assertEqual(answers[1]['depth'], 42 - len(MOVES))
+
+    def test_poll_does_not_block(self):
+        start = time.perf_counter()
+        request = self.engine.submit('')  # ponders until cancelled
+        self.assertIsNone(self.engine.poll())
+        self.assertLess(time.perf_counter() - start, 0.5)
+        time.sleep(0.2)
+        self.engine.cancel(request)
+        answer = self.engine.result(10)
+        self.assertEqual(answer['id'], request)
+        self.assertTrue(answer['cancelled'])
+        self.assertIn(answer['column'], range(7))
+
+    def test_malformed_request(self):
+        bad = self.engine.submit('010101', max_time='0.1')
+        answer = self.engine.result(10)
+        self.assertEqual(answer['id'], bad)
+        self.assertIn('error', answer)
+        self.engine.submit(12345, max_depth=4)
+        self.assertIn('error', self.engine.result(10))
+        # the engine is still running and answers the next request
+        good = self.engine.submit('010101', max_depth=4)
+        answer = self.engine.result(10)
+        self.assertEqual((answer['id'], answer['column']), (good, 0))
+
+    def test_cancel_waiting(self):
+        ponder = self.engine.submit('')
+        waiting = self.engine.submit('010101', max_depth=4)
+        self.engine.cancel(waiting)
+        self.engine.cancel(ponder)
+        self.assertEqual(self.engine.result(10)['id'], ponder)
+        answer = self.engine.result(10)
+        self.assertEqual(answer, {'cancelled': True, 'id': waiting})
+        # the engine takes new requests after the cancels
+        self.engine.submit('010101', max_depth=4)
+        self.assertEqual(self.engine.result(10)['column'], 0)
+
+
+class TestEngineServer(unittest.TestCase):
+
+    def test_concurrent_clients(self):
+        async def run():
+            engine_server = EngineServer(workers=2, table_size=10007)
+            server = await engine_server.start()
+            port = server.sockets[0].getsockname()[1]
+            try:
+                first = await EngineClient.connect(port=port)
+                second = await EngineClient.connect(port=port)
+                ponder = await first.submit('')
+                answers = await asyncio.gather(second.analyze('010101', max_depth=4),
+                                               second.analyze('0000000'))
+                await first.cancel(ponder)
+                pondered = await asyncio.wait_for(first.result(ponder), 10)
+                await first.close()
+                await second.close()
+            finally:
+                server.close()
+                await server.wait_closed()
+                engine_server.close()
+            return answers, pondered
+
+        answers, pondered = asyncio.run(run())
+        self.assertEqual(answers[0]['column'], 0)
+        self.assertIn('error', answers[1])
+        self.assertTrue(pondered['cancelled'])
+
+    def test_malformed_requests(self):
+        async def run():
+            engine_server = EngineServer(workers=1, table_size=10007)
+            server = await engine_server.start()
+            port = server.sockets[0].getsockname()[1]
+            try:
+                client = await EngineClient.connect(port=port)
+                answers = [await asyncio.wait_for(client.analyze(None), 10),
+                           await asyncio.wait_for(client.analyze('33', max_time='0.1'), 10),
+                           await asyncio.wait_for(client.analyze('010101', max_depth=4), 10)]
+                # an engine that dies is replaced, the next request is answered by the new one
+                stopped = engine_server.engines[0]
+                stopped.process.kill()
+                stopped.process.join()
+                answers.append(await asyncio.wait_for(client.analyze('010101', max_depth=4), 10))
+                replaced = stopped not in engine_server.engines
+                # and one that dies in the middle of a search answers with an error
+                pondering = await client.submit('')
+                await asyncio.sleep(0.2)
+                engine_server.engines[0].process.kill()
+                answers.append(await asyncio.wait_for(client.result(pondering), 10))
+                answers.append(await asyncio.wait_for(client.analyze('010101', max_depth=4), 10))
+                await client.close()
+            finally:
+                server.close()
+                await server.wait_closed()
+                engine_server.close()
+            return answers, replaced
+
+        answers, replaced = asyncio.run(run())
+        self.assertIn('error', answers[0])
+        self.assertIn('error', answers[1])
+        self.assertEqual(answers[2]['column'], 0)
+        self.assertEqual(answers[3]['column'], 0)
+        self.assertEqual(answers[4]['error'], 'the engine stopped')
+        self.assertEqual(answers[5]['column'], 0)
+        self.assertTrue(replaced)
+
+    def test_bad_request_ids(self):
+        async def run():
+            engine_server = EngineServer(workers=1, table_size=10007)
+            server = await engine_server.start()
+            port = server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                for request_id in [[1], {'a': 1}, None, 1.5, True]:
+                    writer.write((json.dumps({'op': 'analyze', 'id': request_id, 'moves': '010101'}) + '\n').encode())
+                writer.write(b'{"op": "cancel", "id": [2]}\n')
+                writer.write(b'{"op": "analyze", "id": "last", "moves": "010101", "max_depth": 4}\n')
+                await writer.drain()
+                answers = [json.loads(await asyncio.wait_for(reader.readline(), 10)) for _ in range(7)]
+                writer.close()
+                await writer.wait_closed()
+            finally:
+                server.close()
+                await server.wait_closed()
+                engine_server.close()
+            return answers
+
+        answers = asyncio.run(run())
+        self.assertEqual(answers[:6], [{'error': 'bad request'}] * 6)
+        self.assertEqual((answers[6]['id'], answers[6]['column']), ('last', 0))
+
+    def test_client_hangs_up_mid_search(self):
+        async def run():
+            engine_server = EngineServer(workers=1, table_size=10007)
+            server = await engine_server.start()
+            port = server.sockets[0].getsockname()[1]
+            answers = []
+            try:
+                for _ in range(5):
+                    first = await EngineClient.connect(port=port)
+                    pondering = first.futures[await first.submit('')]  # ponders until the server cancels it
+                    await asyncio.sleep(0.05)
+                    await first.close()
+                    await asyncio.gather(pondering, return_exceptions=True)
+                    second = await EngineClient.connect(port=port)
+                    answers.append(await asyncio.wait_for(second.analyze('010101', max_depth=2), 10))
+                    await second.close()
+            finally:
+                server.close()
+                await server.wait_closed()
+                engine_server.close()
+            return answers
+
+        loop = asyncio.new_event_loop()
+        errors = []
+        loop.set_exception_handler(lambda _, context: errors.append(context))
+        try:
+            answers = loop.run_until_complete(run())
+        finally:
+            loop.close()
+        # the answer to the abandoned ponder must not reach the next client
+        for answer in answers:
+            self.assertEqual((answer['column'], answer['cancelled']), (0, False))
+        self.assertEqual(errors, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+# This script scores the positions at the horizon of a depth-limited search
+from typing import List, Tuple
+from helper_classes import GameState, Position, WIDTH, HEIGHT, COLUMN_MASKS
+
+try:
+    import numpy as np
+except ImportError:  # the batch scorer is optional, the engine itself only needs evaluate
+    np = None
+
+# the weights of the features. They are kept small enough that no position gets near 1000, the score_unit an
+# AlphaBetaAnalyzer uses for a proven result, and evaluate clamps to stay below it anyway
+THREE_WEIGHT: int = 24
+TWO_WEIGHT: int = 4
+CENTER_WEIGHT: int = 3
+MAX_EVALUATION: int = 999
+CENTER_COLUMN: int = COLUMN_MASKS[WIDTH // 2]
+
+
+def _line_masks() -> List[int]:
+    """This function lists every line of four cells on the board
+
+    Returns:
+        List[int]: one bitboard per line, in the bit layout of BitBoard
+    """
+    lines: List[int] = []
+    # vertical, horizontal and both diagonals as (column step, row step)
+    for column_step, row_step in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        for column in range(WIDTH):
+            for row in range(HEIGHT):
+                cells: List[Tuple[int, int]] = [(column + column_step * i, row + row_step * i) for i in range(4)]
+                if all(0 <= c < WIDTH and 0 <= r < HEIGHT for c, r in cells):
+                    lines.append(sum(1 << (7 * c + r) for c, r in cells))
+
+    return lines
+
+
+# the 69 lines of four, built once at import
+WIN_LINES: List[int] = _line_masks()
+_BYTE_COUNTS = None if np is None else np.array([bin(byte).count('1') for byte in range(256)], dtype=np.int64)
+
+
+def evaluate_boards(own: int, opponent: int) -> int:
+    """This function scores a position from the bitboards of the two players. A line counts as an open three or two
+    when one player holds that many of its cells and the other player none of them, so it can still become a four
+
+    Args:
+        own (int): the bitboard of the player to score for
+        opponent (int): the bitboard of the other player
+
+    Returns:
+        int: positive when the position favours own, between -MAX_EVALUATION and MAX_EVALUATION
+    """
+    score: int = CENTER_WEIGHT * (bin(own & CENTER_COLUMN).count('1') - bin(opponent & CENTER_COLUMN).count('1'))
+    for line in WIN_LINES:
+        if not line & opponent:
+            count: int = bin(line & own).count('1')
+            if count == 3:
+                score += THREE_WEIGHT
+            elif count == 2:
+                score += TWO_WEIGHT
+        elif not line & own:
+            count = bin(line & opponent).count('1')
+            if count == 3:
+                score -= THREE_WEIGHT
+            elif count == 2:
+                score -= TWO_WEIGHT
+
+    return max(-MAX_EVALUATION, min(MAX_EVALUATION, score))
+
+
+def evaluate(position: Position) -> int:
+    """This function is the evaluator for AlphaBetaAnalyzer, it scores a position for the player to move
+
+    Args:
+        position (Position): the position to score
+
+    Returns:
+        int: see evaluate_boards
+    """
+    return evaluate_boards(position.current, position.current ^ position.mask)
+
+
+def evaluate_game_state(game_state: GameState) -> int:
+    """This function scores a GameState for the player whose turn it is
+
+    Args:
+        game_state (GameState): the position to score
+
+    Returns:
+        int: see evaluate_boards
+    """
+    if game_state.current_turn == 1:
+        return evaluate_boards(game_state.bboard_1.internal, game_state.bboard_2.internal)
+
+    return evaluate_boards(game_state.bboard_2.internal, game_state.bboard_1.internal)
+
+
+def popcount(values: 'np.ndarray') -> 'np.ndarray':
+    """This function counts the set bits of every element of a uint64 array through a table of the byte counts"""
+    return _BYTE_COUNTS[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def evaluate_batch(own: 'np.ndarray', opponent: 'np.ndarray') -> 'np.ndarray':
+    """This function scores many positions at once, every line is checked against all of them in a single array
+    operation. The scores are the same as evaluate_boards gives one position at a time
+
+    Args:
+        own (np.ndarray): the bitboards of the players to score for
+        opponent (np.ndarray): the bitboards of their opponents
+
+    Returns:
+        np.ndarray: one int64 score per position
+    """
+    if np is None:
+        raise ImportError('evaluate_batch needs numpy')
+    own = np.ascontiguousarray(own, dtype=np.uint64).ravel()
+    opponent = np.ascontiguousarray(opponent, dtype=np.uint64).ravel()
+
+    center = np.uint64(CENTER_COLUMN)
+    scores = CENTER_WEIGHT * (popcount(own & center) - popcount(opponent & center))
+    for line in WIN_LINES:
+        line = np.uint64(line)
+        own_count = popcount(own & line)
+        opponent_count = popcount(opponent & line)
+        scores += np.where(opponent_count == 0, THREE_WEIGHT * (own_count == 3) + TWO_WEIGHT * (own_count == 2), 0)
+        scores -= np.where(own_count == 0, THREE_WEIGHT * (opponent_count == 3) + TWO_WEIGHT * (opponent_count == 2),
+                           0)
+
+    return np.clip(scores, -MAX_EVALUATION, MAX_EVALUATION)
+
+
+def evaluate_positions(positions: List[Position]) -> 'np.ndarray':
+    """This function scores a list of positions for their players to move with evaluate_batch
+
+    Args:
+        positions (List[Position]): the positions to score
+
+    Returns:
+        np.ndarray: one score per position
+    """
+    if np is None:
+        raise ImportError('evaluate_positions needs numpy')
+    own = np.array([position.current for position in positions], dtype=np.uint64)
+    mask = np.array([position.mask for position in positions], dtype=np.uint64)
+
+    return evaluate_batch(own, own ^ mask)
@@ -0,0 +1,68 @@
+# This is the unittest script for the heuristic evaluation
+
+import unittest
+from evaluation import *
+from helper_classes import AlphaBetaAnalyzer, COLUMN_MASKS
+
+# move strings and their scores for the player to move, see helper_classes_test
+SOLVED_POSITIONS: List[Tuple[str, int]] = [
+    ('5000155505050163261412221122664', 0),
+    ('154265360652564534224421205403', 3),
+    ('004135144663003401414210165663', -4),
+    ('66233440050011646602135116543012', 4),
+]
+
+
+def mirror(moves: str) -> str:
+    return ''.join(str(6 - int(char)) for char in moves)
+
+
+class TestEvaluation(unittest.TestCase):
+
+    def test_win_lines(self):
+        self.assertEqual(len(WIN_LINES), 69)
+        self.assertEqual(len(set(WIN_LINES)), 69)
+        # every line holds four cells and none of them leaves the board
+        for line in WIN_LINES:
+            self.assertEqual(bin(line).count('1'), 4)
+            self.assertEqual(line & ~sum(COLUMN_MASKS), 0)
+
+    def test_features(self):
+        self.assertEqual(evaluate_game_state(GameState()), 0)
+        # player 1 took the center, player 2 is to move
+        self.assertEqual(evaluate_game_state(GameState.from_moves('3')), -CENTER_WEIGHT)
+        # player 1 has an open three along the bottom row, player 2 to move has nothing of the kind
+        self.assertLess(evaluate_game_state(GameState.from_moves('16263')), -THREE_WEIGHT)
+
+    def test_symmetric(self):
+        for moves in ('3', '0121', '3344521160', '2345432'):
+            game_state = GameState.from_moves(moves)
+            self.assertEqual(evaluate_game_state(game_state), evaluate_game_state(GameState.from_moves(mirror(moves))))
+            self.assertEqual(evaluate_game_state(game_state), evaluate(Position.from_game_state(game_state)))
+
+    def test_depth_limited_search(self):
+        analyzer = AlphaBetaAnalyzer(GameState.from_moves('334'), table_size=10007, evaluator=evaluate)
+        value, column, depth = analyzer.iterative_deepening(max_depth=6)
+        self.assertEqual(depth, 6)
+        self.assertLess(abs(value), analyzer.score_unit)
+        self.assertTrue(analyzer.position.can_play(column))
+
+    def test_exact_scores_unchanged(self):
+        for moves, score in SOLVED_POSITIONS:
+            for solver in ('null_window', 'full_window'):
+                analyzer = AlphaBetaAnalyzer(GameState.from_moves(moves), table_size=10007, solver=solver,
+                                             evaluator=evaluate)
+                self.assertEqual(analyzer.solve()[0], score, (solver, moves))
+            value, _, _ = analyzer.iterative_deepening()
+            self.assertEqual(value, score * analyzer.score_unit, moves)
+
+    @unittest.skipUnless(np is not None, 'numpy is not installed')
+    def test_batch_matches(self):
+        positions = [Position.from_game_state(GameState.from_moves(moves))
+                     for moves in ('', '3', '16263', '3344521160', '2345432', '0121')]
+        expected = [evaluate(position) for position in positions]
+        self.assertEqual(evaluate_positions(positions).tolist(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
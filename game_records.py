@@ -0,0 +1,236 @@
+# This script reads, writes and annotates streams of recorded games and positions
+import sys
+import json
+import struct
+import pickle
+import argparse
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+from helper_classes import GameState, Position, AlphaBetaAnalyzer, TranspositionTable, alignment
+from backend import Solver
+from batch_analysis import read_move_strings
+
+# file layout: the header, then one record after another until the end of the file. A game is one byte with its
+# number of moves followed by the moves packed two to a byte, first move in the low half. A position is its
+# 64-bit key, so position files can be read at any index without reading what comes before
+HEADER = struct.Struct('<4sB3x')
+MAGIC: bytes = b'C4GR'
+GAMES: int = 1
+POSITIONS: int = 2
+KEY = struct.Struct('<Q')
+
+
+def write_records(fp: BinaryIO, records: Iterable[Union[str, Position]], kind: int, header: bool = True) -> int:
+    """This function writes games or positions to a file as they come, without holding more than one in memory
+
+    Args:
+        fp (BinaryIO): the file opened for binary writing
+        records (Iterable): move strings for GAMES, Position objects for POSITIONS
+        kind (int): GAMES or POSITIONS
+        header (bool, optional): start the file with its header, False to append to a file of the same kind
+
+    Returns:
+        int: the number of records written
+    """
+    if kind not in (GAMES, POSITIONS):
+        raise ValueError(f'unknown record kind {kind}')
+    if header:
+        fp.write(HEADER.pack(MAGIC, kind))
+    count: int = 0
+    for record in records:
+        if kind == GAMES:
+            if len(record) > 42 or not set(record) <= set('0123456'):
+                raise ValueError(f'not a game: {record!r}')
+            columns: List[int] = [int(char) for char in record] + [0]
+            fp.write(bytes([len(record)]) + bytes(columns[i] | (columns[i + 1] << 4)
+                                                  for i in range(0, len(record), 2)))
+        else:
+            fp.write(KEY.pack(record.key()))
+        count += 1
+
+    return count
+
+
+def read_kind(fp: BinaryIO) -> int:
+    """This function reads the header of a record file
+
+    Args:
+        fp (BinaryIO): the file opened for binary reading, at its start
+
+    Returns:
+        int: GAMES or POSITIONS
+    """
+    header: bytes = fp.read(HEADER.size)
+    if len(header) < HEADER.size or HEADER.unpack(header)[0] != MAGIC:
+        raise ValueError('not a game record file')
+    kind: int = HEADER.unpack(header)[1]
+    if kind not in (GAMES, POSITIONS):
+        raise ValueError(f'unknown record kind {kind}')
+
+    return kind
+
+
+def read_records(fp: BinaryIO) -> Iterator[Union[str, Position]]:
+    """This function streams the records of a file back, one at a time
+
+    Args:
+        fp (BinaryIO): the file opened for binary reading, at its start
+
+    Yields:
+        str or Position: a move string per game or a Position per position, depending on the file
+    """
+    kind: int = read_kind(fp)
+    while True:
+        if kind == GAMES:
+            length: bytes = fp.read(1)
+            if not length:
+                return
+            packed: bytes = fp.read((length[0] + 1) // 2)
+            moves: str = ''.join(f'{byte & 0xF}{byte >> 4}' for byte in packed)
+            yield moves[:length[0]]
+        else:
+            chunk: bytes = fp.read(KEY.size)
+            if len(chunk) < KEY.size:
+                return
+            yield Position.from_key(KEY.unpack(chunk)[0])
+
+
+def position_at(fp: BinaryIO, index: int) -> Optional[Position]:
+    """This function reads one position of a position file without reading the ones before it
+
+    Args:
+        fp (BinaryIO): the position file opened for binary reading
+        index (int): the number of the position, starting at 0
+
+    Returns:
+        Optional[Position]: the position or None if the file holds fewer
+    """
+    if index < 0:
+        return None
+    fp.seek(HEADER.size + KEY.size * index)
+    chunk: bytes = fp.read(KEY.size)
+    if len(chunk) < KEY.size:
+        return None
+
+    return Position.from_key(KEY.unpack(chunk)[0])
+
+
+def annotate_position(position: Position, solver: Optional[Solver], analyzer: Optional[AlphaBetaAnalyzer],
+                      max_time: Optional[float], multi_pv: bool = False) -> Dict:
+    """This function scores a position with the exact solver or, given a time limit, with iterative deepening
+
+    Args:
+        position (Position): the position, not over yet
+        solver (Solver, optional): the exact solver
+        analyzer (AlphaBetaAnalyzer, optional): the analyzer for timed searches and multi-PV analysis
+        max_time (float, optional): the seconds the timed search may take
+        multi_pv (bool, optional): score every column exactly and add the principal variation, see
+                                   AlphaBetaAnalyzer.analyze
+
+    Returns:
+        Dict: the score for the player to move and the best column, with the depth searched if it was timed or the
+              column scores and the principal variation with multi_pv
+    """
+    if multi_pv:
+        analyzer.position = position
+        analysis = analyzer.analyze()
+        return {'score': analysis.score, 'best_column': analysis.column, 'column_scores': analysis.column_scores,
+                'pv': analysis.principal_variation}
+    if solver is not None:
+        score, column, _ = solver.solve(position)
+        return {'score': score, 'best_column': column}
+    analyzer.position = position
+    score, column, depth = analyzer.iterative_deepening(max_time=max_time)
+    return {'score': score, 'best_column': column, 'depth': depth}
+
+
+def annotate(records: Iterable[Union[str, Position]], max_time: Optional[float] = None,
+             table_size: int = TranspositionTable.DEFAULT_SIZE, from_ply: int = 0,
+             multi_pv: bool = False) -> Iterator[Dict]:
+    """This function replays games and scores the position before every move, or scores loose positions, yielding
+    each annotation as soon as it is ready. One transposition table serves the whole stream
+
+    Args:
+        records (Iterable): move strings or Position objects, e.g. from read_records
+        max_time (float, optional): the seconds each position may take, None to solve every position exactly
+        table_size (int, optional): the number of slots in the transposition table
+        from_ply (int, optional): the first move of every game to annotate. Exact solves of the first dozen moves
+            take far too long, so games are best either timed or annotated from somewhere in the middle
+        multi_pv (bool, optional): score every column of every position exactly and add the principal variation,
+            with one table shared by all of them
+
+    Yields:
+        Dict: for games the game number, the ply, the move played and the annotation of the position it was played
+              in, for positions the position number, its move count and its annotation. Positions in which the
+              game is already over get no annotation. An illegal move gets an error and ends its game
+    """
+    if multi_pv and max_time is not None:
+        raise ValueError('multi-PV analysis solves exactly and cannot be timed')
+    solver: Optional[Solver] = Solver(table_size) if max_time is None and not multi_pv else None
+    analyzer: Optional[AlphaBetaAnalyzer] = None
+    if max_time is not None or multi_pv:
+        analyzer = AlphaBetaAnalyzer(GameState(), table_size=table_size)
+
+    for number, record in enumerate(records):
+        if isinstance(record, Position):
+            annotation: Dict = {'position': number, 'moves': record.moves}
+            if record.moves < 42 and not alignment(record.current ^ record.mask):
+                annotation.update(annotate_position(record, solver, analyzer, max_time, multi_pv))
+            yield annotation
+            continue
+
+        position = Position()
+        for ply, char in enumerate(record):
+            # a column that does not exist or is full would corrupt the position and every annotation after it
+            if char not in '0123456' or not position.can_play(int(char)):
+                yield {'game': number, 'ply': ply, 'move': char, 'error': 'illegal move'}
+                break
+            column: int = int(char)
+            if ply >= from_ply:
+                annotation = {'game': number, 'ply': ply, 'move': column}
+                annotation.update(annotate_position(position, solver, analyzer, max_time, multi_pv))
+                yield annotation
+            if position.is_winning_move(column):
+                break
+            position.play(column)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert and annotate recorded games and positions')
+    commands = parser.add_subparsers(dest='command', required=True)
+    pack = commands.add_parser('pack', help='write a text file of move strings as a game record file')
+    pack.add_argument('input', help='the text file, one game per line')
+    pack.add_argument('output', help='the record file to write')
+    convert = commands.add_parser('convert', help='write a pickled list of game states as a position file')
+    convert.add_argument('input', help='the pickle, e.g. game_states.pickle')
+    convert.add_argument('output', help='the record file to write')
+    annotate_command = commands.add_parser('annotate', help='print the engine score before every move as JSON')
+    annotate_command.add_argument('input', help='a game or position record file')
+    annotate_command.add_argument('--max-time', type=float, default=None,
+                                  help='the seconds each position may take instead of solving it exactly')
+    annotate_command.add_argument('--from-ply', type=int, default=0, help='the first move of every game to annotate')
+    annotate_command.add_argument('--multi-pv', action='store_true',
+                                  help='score every column exactly and print the principal variation')
+    annotate_command.add_argument('--table-size', type=int, default=TranspositionTable.DEFAULT_SIZE,
+                                  help='the number of transposition table slots')
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        with open(args.input) as text, open(args.output, 'wb') as fp:
+            count: int = write_records(fp, read_move_strings(text), GAMES)
+        print(f'wrote {count} games to {args.output}')
+    elif args.command == 'convert':
+        with open(args.input, 'rb') as pickled, open(args.output, 'wb') as fp:
+            game_states: List[GameState] = pickle.load(pickled)
+            count = write_records(fp, (Position.from_game_state(game_state) for game_state in game_states),
+                                  POSITIONS)
+        print(f'wrote {count} positions to {args.output}')
+    else:
+        with open(args.input, 'rb') as fp:
+            for annotation in annotate(read_records(fp), args.max_time, args.table_size, args.from_ply,
+                                           args.multi_pv):
+                sys.stdout.write(json.dumps(annotation) + '\n')
+                sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
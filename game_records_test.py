@@ -0,0 +1,88 @@
+# This is the unittest script for the game record files
+
+import io
+import unittest
+from game_records import *
+
+GAMES_TO_WRITE: List[str] = ['', '3', '3344', '5000155505050163261412221122664', '012345601234560123456']
+
+
+class TestGameRecords(unittest.TestCase):
+
+    def test_games_round_trip(self):
+        fp = io.BytesIO()
+        self.assertEqual(write_records(fp, iter(GAMES_TO_WRITE), GAMES), len(GAMES_TO_WRITE))
+        # a byte per move pair and a length byte per game
+        self.assertEqual(len(fp.getvalue()), HEADER.size + sum(1 + (len(game) + 1) // 2 for game in GAMES_TO_WRITE))
+        fp.seek(0)
+        self.assertEqual(list(read_records(fp)), GAMES_TO_WRITE)
+
+    def test_positions_round_trip(self):
+        positions = [Position.from_game_state(GameState.from_moves(moves)) for moves in GAMES_TO_WRITE]
+        fp = io.BytesIO()
+        write_records(fp, positions, POSITIONS)
+        fp.seek(0)
+        self.assertEqual(list(read_records(fp)), positions)
+        self.assertEqual(position_at(fp, 3), positions[3])
+        self.assertIsNone(position_at(fp, len(positions)))
+
+    def test_bad_input(self):
+        with self.assertRaises(ValueError):
+            write_records(io.BytesIO(), ['337'], GAMES)
+        with self.assertRaises(ValueError):
+            list(read_records(io.BytesIO(b'not a record file')))
+        with self.assertRaises(ValueError):
+            list(read_records(io.BytesIO(HEADER.pack(MAGIC, 3))))
+
+    def test_converted_debug_states(self):
+        with open('game_states.pickle', 'rb') as fp:
+            game_states = pickle.load(fp)
+        with open('game_states.c4r', 'rb') as fp:
+            self.assertEqual([position.to_game_state() for position in read_records(fp)], game_states)
+            self.assertEqual(position_at(fp, 7).to_game_state(), game_states[7])
+
+    def test_annotate(self):
+        moves = '5000155505050163261412221122664'
+        annotations = list(annotate([moves], table_size=10007, from_ply=28))
+        self.assertEqual([annotation['ply'] for annotation in annotations], [28, 29, 30])
+        for annotation in annotations:
+            expected = AlphaBetaAnalyzer(GameState.from_moves(moves[:annotation['ply']]), table_size=10007).solve()
+            self.assertEqual(annotation['score'], expected[0])
+            self.assertEqual(annotation['move'], int(moves[annotation['ply']]))
+        # a finished position gets no score
+        finished = Position.from_game_state(GameState.from_moves('0101010'))
+        annotations = list(annotate([finished, Position.from_game_state(GameState.from_moves(moves))],
+                                    table_size=10007))
+        self.assertNotIn('score', annotations[0])
+        self.assertEqual(annotations[1]['score'], 0)
+
+    def test_annotate_illegal_move(self):
+        # a seventh token in column 0 ends the game, the game after it is still annotated
+        annotations = list(annotate(['00000001', '08', '010101'], max_time=0.05, table_size=10007))
+        errors = [annotation for annotation in annotations if 'error' in annotation]
+        self.assertEqual(errors, [{'game': 0, 'ply': 6, 'move': '0', 'error': 'illegal move'},
+                                  {'game': 1, 'ply': 1, 'move': '8', 'error': 'illegal move'}])
+        self.assertEqual([annotation['ply'] for annotation in annotations if annotation['game'] == 0],
+                         list(range(7)))
+        self.assertEqual(len([annotation for annotation in annotations if annotation['game'] == 2]), 6)
+
+    def test_annotate_timed(self):
+        annotations = list(annotate(['334455'], max_time=0.05, table_size=10007))
+        self.assertEqual(len(annotations), 6)
+        self.assertTrue(all('depth' in annotation for annotation in annotations))
+
+    def test_annotate_multi_pv(self):
+        moves = '5000155505050163261412221122664'
+        annotations = list(annotate([moves], table_size=10007, from_ply=29, multi_pv=True))
+        for annotation in annotations:
+            analyzer = AlphaBetaAnalyzer(GameState.from_moves(moves[:annotation['ply']]), table_size=10007)
+            self.assertEqual(annotation['score'], analyzer.solve()[0])
+            self.assertEqual(max(score for score in annotation['column_scores'] if score is not None),
+                             annotation['score'])
+            self.assertEqual(annotation['pv'][0], annotation['best_column'])
+        with self.assertRaises(ValueError):
+            list(annotate([moves], max_time=0.05, multi_pv=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
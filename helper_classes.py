@@ -1,26 +1,151 @@
 # this is the python file for bitboards
-import sys
-from typing import List, Tuple, Optional, Dict
+import time
+from typing import List, Tuple, Optional, Dict, Callable, Union, NamedTuple
 from collections import Counter
-import pickle
 
-dump_game_states = []
+# board geometry shared by the packed Position representation. The bits follow BitBoard.drop: a token in a given
+# row and column lives at bit (7 * column) + row, where row 0 is the top of the board and row 5 the bottom. The
+# seventh bit of every column always stays empty so that shifted win checks cannot wrap from one column into another
+WIDTH: int = 7
+HEIGHT: int = 6
+TOP_CELLS: List[int] = [1 << (7 * column) for column in range(WIDTH)]
+COLUMN_MASKS: List[int] = [0b111111 << (7 * column) for column in range(WIDTH)]
+TOP_ROW_MASK: int = sum(TOP_CELLS)
+BOARD_MASK: int = sum(COLUMN_MASKS)
+# all seven bits of each column, including the spare bit the key uses as a height marker
+COLUMN_BITS: List[int] = [0b1111111 << (7 * column) for column in range(WIDTH)]
+# columns from the middle out, the middle column takes part in the most lines of four
+CENTER_ORDER: Tuple[int, ...] = (3, 2, 4, 1, 5, 0, 6)
+
+
+def alignment(internal: int) -> bool:
+    """This function checks a bitboard integer for four connected tokens in any direction. It is the same check as
+    BitBoard.check_win but works on a bare integer so the search does not need to build BitBoard objects.
+
+    Args:
+        internal (int): the bitboard to check
+
+    Returns:
+        bool: whether or not the bitboard contains a win
+    """
+    # vertical
+    combined: int = internal & (internal >> 1)
+    if combined & (combined >> 2):
+        return True
+    # diagonal
+    combined = internal & (internal >> 6)
+    if combined & (combined >> 12):
+        return True
+    # horizontal
+    combined = internal & (internal >> 7)
+    if combined & (combined >> 14):
+        return True
+    # other diagonal
+    combined = internal & (internal >> 8)
+    if combined & (combined >> 16):
+        return True
+
+    return False
+
+
+def winning_squares(internal: int, mask: int) -> int:
+    """This function finds every empty cell that would give a player four connected tokens, in one pass of shifts
+    over the whole board instead of one check per column
+
+    Args:
+        internal (int): the bitboard of the player
+        mask (int): the bitboard of every dropped token
+
+    Returns:
+        int: a bitboard with the winning cells lit up, playable right now or not
+    """
+    # vertical, the three tokens below the cell are the higher bits
+    squares: int = (internal >> 1) & (internal >> 2) & (internal >> 3)
+
+    # horizontal, the empty cell can be at either end or either middle spot of the line
+    pair: int = (internal << 7) & (internal << 14)
+    squares |= pair & (internal << 21)
+    squares |= pair & (internal >> 7)
+    pair = (internal >> 7) & (internal >> 14)
+    squares |= pair & (internal << 7)
+    squares |= pair & (internal >> 21)
+
+    # diagonal
+    pair = (internal << 6) & (internal << 12)
+    squares |= pair & (internal << 18)
+    squares |= pair & (internal >> 6)
+    pair = (internal >> 6) & (internal >> 12)
+    squares |= pair & (internal << 6)
+    squares |= pair & (internal >> 18)
+
+    # other diagonal
+    pair = (internal << 8) & (internal << 16)
+    squares |= pair & (internal << 24)
+    squares |= pair & (internal >> 8)
+    pair = (internal >> 8) & (internal >> 16)
+    squares |= pair & (internal << 8)
+    squares |= pair & (internal >> 24)
+
+    return squares & (BOARD_MASK ^ mask)
+
+
+def mirror_columns(bits: int) -> int:
+    """This function reflects a board left to right by swapping column c with column 6 - c, which moves its seven
+    bits by a whole number of columns. It works on anything in the seven-bits-per-column layout, keys included
+
+    Args:
+        bits (int): the board to reflect
+
+    Returns:
+        int: the reflected board
+    """
+    return (((bits & COLUMN_BITS[0]) << 42) | ((bits & COLUMN_BITS[1]) << 28) | ((bits & COLUMN_BITS[2]) << 14) |
+            (bits & COLUMN_BITS[3]) |
+            ((bits & COLUMN_BITS[4]) >> 14) | ((bits & COLUMN_BITS[5]) >> 28) | ((bits & COLUMN_BITS[6]) >> 42))
 
 
-def dump_game_state(f):
-    def wrapper(*args, **kwargs):
-        # write args[-1]
-        dump_game_states.append(args[-1])
-        if len(dump_game_states) >= 500:
-            with open('game_states.pickle', 'wb') as fp:
-                pickle.dump(dump_game_states, fp)
-            sys.exit()
-        return f(*args, **kwargs)
+def playable_cells(mask: int) -> int:
+    """This function finds the cell every column would take its next token in. The empty cells of each column are
+    a run of low bits, so adding one per column carries into the lowest filled cell and shifting back by one lands
+    on the first empty cell above it
 
-    return wrapper
+    Args:
+        mask (int): the bitboard of every dropped token
+
+    Returns:
+        int: a bitboard with one cell lit up per column that is not full
+    """
+    return (((~mask & BOARD_MASK) + TOP_ROW_MASK) >> 1) & BOARD_MASK
+
+
+def lowest_column(cells: int) -> int:
+    """This function finds the leftmost column holding a lit cell
+
+    Args:
+        cells (int): a bitboard with at least one cell lit up
+
+    Returns:
+        int: the column index
+    """
+    return ((cells & -cells).bit_length() - 1) // 7
+
+
+def restore_slots(obj: object, state: Union[Dict, Tuple[Optional[Dict], Dict]]) -> None:
+    """This function is the __setstate__ of the slotted classes. Pickles written before the classes had __slots__
+    hold a plain attribute dict instead of the (None, slots) pair pickle uses now.
+
+    Args:
+        obj (object): the object being unpickled
+        state (dict or tuple): the pickled attributes
+    """
+    if isinstance(state, tuple):
+        state = state[1]
+    for name, value in state.items():
+        setattr(obj, name, value)
 
 
 class BitBoard:
+    __slots__ = ('internal',)
     internal: int
 
     def __init__(self):
@@ -38,20 +163,13 @@ class BitBoard:
 
     @property
     def num_tokens_dropped(self) -> int:
-        """This function uses Brian Kernighan's algorithm to return the number of set bits in the internal field.
-        This represents the number of dropped tokens
+        """This function returns the number of set bits in the internal field. This represents the number of dropped
+        tokens
 
         Returns:
             int: the number of dropped tokens
         """
-        # set up variables for Brian Kernighan's algorithm
-        internal_copy: int = self.internal
-        set_bits: int = 0
-        while internal_copy != 0:
-            internal_copy = internal_copy & (internal_copy - 1)
-            set_bits += 1
-
-        return set_bits
+        return bin(self.internal).count('1')
 
     def drop(self, row: int, column: int) -> None:
         """This function increments the internal counter by lighting up the bit that needs to be high in order for
@@ -84,12 +202,7 @@ class BitBoard:
         Returns:
             bool: whether or not there is a win on this bitboard
         """
-        for shift_distance in [1, 6, 7, 8]:
-            win: bool = self.connected_check(shift_distance)
-            if win:
-                return True
-        else:
-            return False
+        return alignment(self.internal)
 
     def win_this_move(self, rows: List[int]) -> Optional[int]:
         """This function will drop a token into each row and then check for a win.
@@ -98,24 +211,17 @@ class BitBoard:
             rows (list): the row into which a token would be dropped by column
 
         Returns:
-            bool: whether or not there is a win possible on this turn for the active player
+            Optional[int]: the leftmost column that wins on this turn for the active player or None
         """
-        # loop over each column dropping in the appropriate row
+        # light up the cell each column would take its next token in
+        playable: int = 0
         for column, row in enumerate(rows):
-            if row == -1:  # make sure a token can be dropped
-                continue
-            # drop the token
-            drop_idx = (7 * column) + row
-            drop_num = 2 ** drop_idx
-            self.internal += drop_num
-
-            # check for win and remove token
-            win_present = self.check_win()
-            self.internal -= drop_num
-            if win_present:
-                return column
-        else:
-            return None
+            if row != -1:  # make sure a token can be dropped
+                playable |= 1 << ((7 * column) + row)
+
+        # the playable cells are empty so the winning cells do not need the other player's tokens
+        winning: int = winning_squares(self.internal, 0) & playable
+        return lowest_column(winning) if winning else None
 
     def clone(self) -> 'BitBoard':
         """This function clones the BitBoard
@@ -148,6 +254,9 @@ class BitBoard:
 
         return to_return[:-1]  # don't return the last \n
 
+    def __setstate__(self, state) -> None:
+        restore_slots(self, state)
+
     def __hash__(self) -> int:
         return hash(self.internal)
 
@@ -156,6 +265,7 @@ class BitBoard:
 
 
 class GameState:
+    __slots__ = ('bboard_1', 'bboard_2', 'current_turn', 'top_row_by_column')
     bboard_1: BitBoard
     bboard_2: BitBoard
     current_turn: int
@@ -169,6 +279,26 @@ class GameState:
         self.current_turn = 1
         self.top_row_by_column = [5 for _ in range(7)]
 
+    @classmethod
+    def from_moves(cls, moves: str) -> Optional['GameState']:
+        """This function replays a string of column numbers from the empty board
+
+        Args:
+            moves (str): the string with column numbers e.g. '3344'
+
+        Returns:
+            GameState: the game state object or a NoneType object if one of the drops is not possible
+        """
+        to_return: GameState = cls()
+        for char in moves:
+            if char not in '0123456':
+                return None
+            successful_drop: bool = to_return.drop(int(char))
+            if not successful_drop:
+                return None
+
+        return to_return
+
     @property
     def bitboards(self) -> Tuple[BitBoard, BitBoard]:
         """This function is used to extract both bitboards from this object
@@ -180,7 +310,7 @@ class GameState:
 
     @property
     def total_moves(self) -> int:
-        return self.bboard_1.num_tokens_dropped + self.bboard_2.num_tokens_dropped
+        return bin(self.bboard_1.internal | self.bboard_2.internal).count('1')
 
     @property
     def valid_columns(self) -> List[int]:
@@ -225,7 +355,8 @@ class GameState:
         row = self.top_row_by_column[column]
         self.top_row_by_column[column] -= 1  # decrement row-column indices
 
-        exec(f'self.bboard_{self.current_turn}.drop(row, column)')  # put correct token in correct place
+        # put correct token in correct place
+        (self.bboard_1 if self.current_turn == 1 else self.bboard_2).drop(row, column)
         self.current_turn = 3 - self.current_turn  # switch the turns
 
         return True
@@ -252,14 +383,13 @@ class GameState:
         """This function checks if the current player can win
 
         Returns:
-            possible (bool): if the current player can win or not
+            Optional[int]: the leftmost column that wins for the current player or None
         """
-        if self.current_turn == 1:
-            possible = self.bboard_1.win_this_move(self.top_row_by_column)
-        else:
-            possible = self.bboard_2.win_this_move(self.top_row_by_column)
+        mask: int = self.bboard_1.internal | self.bboard_2.internal
+        internal: int = self.bboard_1.internal if self.current_turn == 1 else self.bboard_2.internal
+        winning: int = winning_squares(internal, mask) & playable_cells(mask)
 
-        return possible
+        return lowest_column(winning) if winning else None
 
     def clone(self) -> 'GameState':
         """This function clones the GameState object
@@ -275,139 +405,944 @@ class GameState:
 
         return to_return
 
+    def __setstate__(self, state) -> None:
+        restore_slots(self, state)
+
     def __hash__(self) -> int:
-        return hash((self.bboard_1, self.bboard_2, self.current_turn, tuple(self.top_row_by_column)))
+        return hash((self.bboard_1.internal, self.bboard_2.internal))
 
     def __eq__(self, other: 'GameState') -> bool:
         if not isinstance(other, GameState):
             return False
-        if self.bboard_1 != other.bboard_1:
-            return False
-        if self.bboard_2 != other.bboard_2:
-            return False
-        if self.current_turn != other.current_turn:
-            return False
-        if self.top_row_by_column != other.top_row_by_column:
+
+        # the turn and the column heights follow from the two boards
+        return self.bboard_1.internal == other.bboard_1.internal and self.bboard_2.internal == other.bboard_2.internal
+
+
+class Position:
+    """A packed game state made of two integers that can play and take back moves in place.
+
+    mask holds every dropped token and current holds the tokens of the player whose turn it is. Both use the same
+    bit layout as BitBoard so a Position can be built straight from a GameState without moving any bits.
+    """
+    __slots__ = ('mask', 'current', 'moves')
+    mask: int
+    current: int
+    moves: int
+
+    def __init__(self):
+        self.mask = 0
+        self.current = 0
+        self.moves = 0
+
+    @classmethod
+    def from_game_state(cls, game_state: GameState) -> 'Position':
+        """This function packs a GameState into a Position
+
+        Args:
+            game_state (GameState): the game state to pack
+
+        Returns:
+            to_return (Position): the packed position with the same player to move
+        """
+        to_return = cls()
+        bboard_1, bboard_2 = game_state.bitboards
+        to_return.mask = bboard_1.internal | bboard_2.internal
+        to_return.current = bboard_1.internal if game_state.current_turn == 1 else bboard_2.internal
+        to_return.moves = game_state.total_moves
+
+        return to_return
+
+    def to_game_state(self) -> GameState:
+        """This function unpacks the Position into a GameState, e.g. to draw it
+
+        Returns:
+            to_return (GameState): the game state with the same tokens and player to move
+        """
+        to_return = GameState()
+        to_return.current_turn = 1 if self.moves % 2 == 0 else 2
+        own, other = (to_return.bboard_1, to_return.bboard_2) if to_return.current_turn == 1 else \
+            (to_return.bboard_2, to_return.bboard_1)
+        own.internal = self.current
+        other.internal = self.current ^ self.mask
+        # the tokens of a column fill it from the bottom, row 5, upwards
+        to_return.top_row_by_column = [5 - bin(self.mask & column_mask).count('1') for column_mask in COLUMN_MASKS]
+
+        return to_return
+
+    def can_play(self, column: int) -> bool:
+        """This function checks whether the top cell of a column is still empty
+
+        Args:
+            column (int): the column to check
+
+        Returns:
+            bool: whether or not a token can be dropped in the column
+        """
+        return not self.mask & TOP_CELLS[column]
+
+    def move_bit(self, column: int) -> int:
+        """This function finds the cell a token dropped into a column would land in, see playable_cells
+
+        Args:
+            column (int): the column into which the token would be dropped
+
+        Returns:
+            int: the bit of the landing cell or 0 if the column is full
+        """
+        column_mask: int = COLUMN_MASKS[column]
+        return (((~self.mask & column_mask) + TOP_CELLS[column]) >> 1) & column_mask
+
+    def is_winning_move(self, column: int) -> bool:
+        """This function checks if dropping into a column wins the game for the player whose turn it is. NOTE: the
+        column must be playable.
+
+        Args:
+            column (int): the column to check
+
+        Returns:
+            bool: whether or not the drop wins
+        """
+        return bool(winning_squares(self.current, self.mask) & self.move_bit(column))
+
+    def possible(self) -> int:
+        """This function finds the cells the next token can be dropped into
+
+        Returns:
+            int: a bitboard with one cell lit up per column that is not full
+        """
+        return playable_cells(self.mask)
+
+    def non_losing_moves(self) -> int:
+        """This function finds the drops that do not hand the opponent a win on their next move. If the opponent
+        threatens to win in one playable cell the only such drop is the block, if they threaten two cells there
+        are none. Otherwise every playable cell counts except those right below a cell the opponent wins with.
+        NOTE: this assumes the player to move cannot win right away.
+
+        Returns:
+            int: a bitboard with the safe playable cells lit up
+        """
+        possible: int = playable_cells(self.mask)
+        opponent_wins: int = winning_squares(self.current ^ self.mask, self.mask)
+        if forced := possible & opponent_wins:
+            if forced & (forced - 1):
+                return 0  # two threats cannot both be blocked
+            possible = forced
+        # the cell above a cell is the next lower bit
+        return possible & ~(opponent_wins << 1)
+
+    def winning_moves(self) -> int:
+        """This function finds the drops that win the game for the player whose turn it is
+
+        Returns:
+            int: a bitboard with the winning playable cells lit up
+        """
+        return winning_squares(self.current, self.mask) & playable_cells(self.mask)
+
+    def play(self, column: int) -> None:
+        """This function drops a token for the player whose turn it is. NOTE: this function does not check if the
+        drop is possible. It just places the token.
+
+        Args:
+            column (int): the column into which to drop the token
+        """
+        column_mask: int = COLUMN_MASKS[column]
+        move: int = (((~self.mask & column_mask) + TOP_CELLS[column]) >> 1) & column_mask
+        self.current ^= self.mask  # the opponent becomes the player to move
+        self.mask |= move
+        self.moves += 1
+
+    def undo(self, column: int) -> None:
+        """This function takes back the last token dropped into a column
+
+        Args:
+            column (int): the column from which to remove the top token
+        """
+        column_bits: int = self.mask & COLUMN_MASKS[column]
+        self.mask ^= column_bits & -column_bits  # the top token is the lowest set bit of the column
+        self.current ^= self.mask
+        self.moves -= 1
+
+    def key(self) -> int:
+        """This function returns a unique integer for the position. Every column contributes the current player's
+        tokens shifted up by one plus a single marker bit just below them that records the height of the column.
+
+        Returns:
+            int: the 49-bit key of the position
+        """
+        return (self.current << 1) | ((~self.mask & BOARD_MASK) + TOP_ROW_MASK)
+
+    @classmethod
+    def from_key(cls, key: int) -> 'Position':
+        """This function rebuilds a position from its key, see key
+
+        Args:
+            key (int): the key of the position
+
+        Returns:
+            to_return (Position): the position with that key
+        """
+        to_return = cls()
+        for column in range(WIDTH):
+            bits: int = (key >> (7 * column)) & 0b1111111
+            marker: int = bits & -bits  # the lowest set bit sits right above the top token
+            to_return.mask |= ((0b1000000 - marker) & 0b111111) << (7 * column)
+            to_return.current |= ((bits ^ marker) >> 1) << (7 * column)
+        to_return.moves = bin(to_return.mask).count('1')
+
+        return to_return
+
+    def canonical_key(self) -> Tuple[int, bool]:
+        """This function returns the same key for a position and its mirror image, the smaller of the two keys.
+        Both have the same score and their best columns are each other's reflection.
+
+        Returns:
+            key, mirrored (Tuple[int, bool]): the canonical key and whether it is the key of the mirror image, in
+                                              which case columns stored under it must be flipped to 6 - column
+        """
+        key: int = (self.current << 1) | ((~self.mask & BOARD_MASK) + TOP_ROW_MASK)
+        mirrored: int = mirror_columns(key)
+        if mirrored < key:
+            return mirrored, True
+
+        return key, False
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def __eq__(self, other: 'Position') -> bool:
+        if not isinstance(other, Position):
             return False
 
-        return True
+        return self.mask == other.mask and self.current == other.current
+
+
+class SolveResult(NamedTuple):
+    score: int  # for the player to move
+    column: int
+    nodes: int
+
+
+class RootAnalysis(NamedTuple):
+    score: int  # for the player to move
+    column: int
+    column_scores: List[Optional[int]]  # the score of dropping into each column, None for a full column
+    principal_variation: List[int]  # the best moves of both players from here on, starting with column
+    nodes: int
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when its time or node budget runs out"""
+
+
+class TranspositionTable:
+    """A fixed-size hash table from Position.canonical_key() to search results.
+
+    Every slot is two 64-bit integers in one flat buffer: the packed entry and the key xor-ed with the entry. The
+    packed entry holds value + VALUE_OFFSET in bits 0-15, the bound type in bits 16-17, best column + 1 in bits
+    18-21 (0 for none) and the depth in bits 22-29, so the memory used is 16 bytes per slot no matter how long the
+    analysis runs. Storing the key xor-ed with the entry means a slot that is read while another process is half
+    way through writing it simply looks like a miss, so the buffer can be shared between processes without locks.
+    """
+    EXACT: int = 0
+    LOWER: int = 1
+    UPPER: int = 2
+    VALUE_OFFSET: int = 1 << 15
+    DEFAULT_SIZE: int = 1048573  # largest prime below 2 ** 20
+
+    size: int
+    replacement: str
+    buffer: Union[bytearray, memoryview]
+    keys: memoryview
+    entries: memoryview
+    hits: int
+    misses: int
+    collisions: int
+    stores: int
+
+    def __init__(self, size: int = DEFAULT_SIZE, replacement: str = 'depth',
+                 buffer: Optional[Union[bytearray, memoryview]] = None):
+        """
+        Args:
+            size (int, optional): the number of slots. A prime spreads the keys best
+            replacement (str, optional): 'depth' keeps the deeper of two colliding entries, 'always' keeps the newest
+            buffer (bytearray or memoryview, optional): at least 16 * size zeroed bytes to keep the slots in, e.g. a
+                multiprocessing.shared_memory buffer. A private buffer is allocated by default
+        """
+        if replacement not in ('depth', 'always'):
+            raise ValueError(f'unknown replacement scheme {replacement!r}')
+        if buffer is None:
+            buffer = bytearray(16 * size)
+        elif len(buffer) < 16 * size:
+            raise ValueError(f'a table of {size} slots needs {16 * size} bytes')
+        self.size = size
+        self.replacement = replacement
+        self.buffer = buffer
+        view = memoryview(buffer)
+        self.keys = view[:8 * size].cast('Q')
+        self.entries = view[8 * size:16 * size].cast('Q')
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.entries.nbytes
+
+    def get(self, key: int) -> Optional[Tuple[int, int, int, int]]:
+        """This function looks up a position
+
+        Args:
+            key (int): the key of the position
+
+        Returns:
+            Optional[Tuple[int, int, int, int]]: (value, bound type, best column or -1, depth) or None on a miss
+        """
+        idx: int = key % self.size
+        entry: int = self.entries[idx]
+        if self.keys[idx] ^ entry != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        return (entry & 0xFFFF) - self.VALUE_OFFSET, (entry >> 16) & 0b11, ((entry >> 18) & 0b1111) - 1, entry >> 22
+
+    def store(self, key: int, value: int, bound: int, column: int, depth: int) -> None:
+        """This function saves a search result, subject to the replacement scheme
+
+        Args:
+            key (int): the key of the position
+            value (int): the score found for the position
+            bound (int): EXACT, LOWER or UPPER
+            column (int): the best column found or -1
+            depth (int): how deep the result was searched
+        """
+        idx: int = key % self.size
+        stored_entry: int = self.entries[idx]
+        stored_key: int = self.keys[idx] ^ stored_entry
+        if stored_key and stored_key != key:
+            self.collisions += 1
+            if self.replacement == 'depth' and stored_entry >> 22 > depth:
+                return
+        entry: int = (value + self.VALUE_OFFSET) | (bound << 16) | ((column + 1) << 18) | (depth << 22)
+        self.entries[idx] = entry
+        self.keys[idx] = key ^ entry
+        self.stores += 1
+
+    def close(self) -> None:
+        """This function lets go of the buffer, which a shared memory block needs before it can be closed"""
+        self.keys.release()
+        self.entries.release()
+
+    def clear(self) -> None:
+        """This function empties every slot and resets the counters"""
+        memoryview(self.buffer)[:16 * self.size] = bytes(16 * self.size)
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
 
 
 class AlphaBetaAnalyzer:
+    HEURISTIC_SCORE_UNIT: int = 1000  # the score_unit of analyzers with an evaluator
+
     game_state: GameState
-    alpha: int
-    beta: int
-    transposition_table: Dict[GameState, Tuple[int, int]]
+    position: Position
+    nodes: int
+    deadline: Optional[float]
+    node_limit: Optional[int]
+    partial_result: Optional[Tuple[int, int]]
+    transposition_table: TranspositionTable
+    killers: List[List[int]]
+    order_moves: Callable[[int, int], List[int]]
+    solver: str
+    book: Optional['OpeningBook']
+    evaluator: Optional[Callable[[Position], int]]
+    score_unit: int
+    stats: Optional['SearchStats']
+    stop_requested: bool
+
+    def __init__(self, game_state: GameState, table_size: int = TranspositionTable.DEFAULT_SIZE,
+                 replacement: str = 'depth',
+                 move_ordering: Union[str, Callable[[Position, int, int], List[int]]] = 'threat',
+                 solver: str = 'null_window', book: Optional['OpeningBook'] = None,
+                 transposition_table: Optional[TranspositionTable] = None,
+                 evaluator: Optional[Callable[[Position], int]] = None, stats: Optional['SearchStats'] = None):
+        """
+        Args:
+            game_state (GameState): the game state to analyze
+            table_size (int, optional): the number of slots in the transposition table
+            replacement (str, optional): the replacement scheme of the transposition table
+            move_ordering (str or function, optional): 'natural' searches columns left to right, 'center' from the
+                middle out and 'threat' tries the table's best column, then the columns that create the most
+                winning cells. 'killer' is 'threat' with the last two cutoff columns of the ply moved up. A
+                function gets the position, a column to try first (or -1) and a bitboard of the cells that may be
+                played, and returns the columns of those cells in the order to search them
+            solver (str, optional): how solve() finds the exact score, 'null_window' narrows in on it with
+                zero-width searches and 'full_window' runs one search from the widest window
+            book (OpeningBook, optional): exact scores of early positions to use instead of searching them
+            transposition_table (TranspositionTable, optional): a table to use instead of a new one, in which case
+                table_size and replacement are ignored
+            evaluator (function, optional): scores positions past the horizon of a depth-limited search for the
+                player to move, e.g. evaluation.evaluate. Without one they score as a draw. With one every score
+                of the analyzer is multiplied by score_unit and the evaluations are kept strictly between -score_unit
+                and score_unit, so they never outrank a proven win or loss. A table must not be shared between
+                analyzers with and without an evaluator
+            stats (SearchStats, optional): counters to fill in during every search, see search_stats. Nothing is
+                counted without them
+        """
+        self.game_state = game_state
+        self.position = Position.from_game_state(game_state)
+        self.nodes = 0
+        self.deadline = None
+        self.node_limit = None
+        self.partial_result = None
+        if transposition_table is None:
+            transposition_table = TranspositionTable(table_size, replacement)
+        self.transposition_table = transposition_table
+        self.killers = [[-1, -1] for _ in range(43)]
+        if callable(move_ordering):
+            self.order_moves = lambda first, candidates: move_ordering(self.position, first, candidates)
+        elif move_ordering == 'natural':
+            self.order_moves = self.natural_order
+        elif move_ordering == 'center':
+            self.order_moves = self.center_order
+        elif move_ordering == 'threat':
+            self.order_moves = self.threat_order
+        elif move_ordering == 'killer':
+            self.order_moves = self.killer_order
+        else:
+            raise ValueError(f'unknown move ordering {move_ordering!r}')
+        if solver not in ('null_window', 'full_window'):
+            raise ValueError(f'unknown solver {solver!r}')
+        self.solver = solver
+        self.book = book
+        self.evaluator = evaluator
+        self.score_unit = 1 if evaluator is None else self.HEURISTIC_SCORE_UNIT
+        self.stats = stats
+        self.stop_requested = False
+
+    def load(self, game_state: GameState) -> None:
+        """This function points the analyzer at another game state. The transposition table is kept, so work
+        shared with earlier analyses is not repeated
 
-    def __init__(self, game_state: GameState):
+        Args:
+            game_state (GameState): the game state to analyze next
+        """
         self.game_state = game_state
-        self.alpha = -100
-        self.beta = 100
-        self.transposition_table = {}
+        self.position = Position.from_game_state(game_state)
 
-    @dump_game_state
     def alpha_beta(self, game_state: GameState) -> Tuple[int, int]:
-        """This function uses the mini-max algorithm to determine the best column
+        """This function uses the negamax algorithm to evaluate a game state
 
         Args:
             game_state (GameState): the current game state from which to begin the analysis
 
         Returns:
-            value, column (Tuple[int, int]): the evaluation of the position and the column that results in the best column
+            value, column (Tuple[int, int]): the evaluation of the position from player 1's point of view and the
+                                             column the player to move should drop into to achieve it
         """
+        self.load(game_state)
+        value, column = self.solve()
+
+        return (value if game_state.current_turn == 1 else -value), column
+
+    def negamax(self, alpha: int, beta: int, depth: int = 42) -> int:
+        """This function scores self.position by playing and taking back moves in place, so no objects are created
+        while searching. Scores are from the point of view of the player to move: a win on that player's n-th
+        token is worth 22 - n, a loss the negative of the opponent's win and a draw 0.
+
+        Args:
+            alpha (int): the score the player to move is already guaranteed
+            beta (int): the score the opponent is already guaranteed to hold the player to
+            depth (int, optional): the number of moves to look ahead. Positions past the horizon score as a draw
+
+        Returns:
+            int: the score of the position if it lies inside (alpha, beta), otherwise a bound on the side it fell
+        """
+        position: Position = self.position
+        table: TranspositionTable = self.transposition_table
+        unit: int = self.score_unit
+        stats: Optional['SearchStats'] = self.stats
+        self.nodes += 1
+        # with an evaluator the search visits about 20k nodes a second, so checking every 1024 nodes let a 20 ms
+        # budget run to 50 ms. Every 256 keeps the overshoot near 10 ms and the clock reads still cost nothing
+        if not self.nodes & 255 and self.out_of_budget():
+            raise SearchTimeout
+        if stats is not None:
+            stats.node(position.mask, position.current, position.moves, depth, alpha, beta)
+
+        # check for draw
+        if position.moves == 42:
+            return 0
+
         # check for win next move
-        p1_moves: int = game_state.bboard_1.num_tokens_dropped
-        p2_moves: int = game_state.bboard_2.num_tokens_dropped
-        nb_moves: int = p1_moves + p2_moves
-        maximizing_player = True if game_state.current_turn == 1 else False
-        if drop_col := game_state.current_player_can_win():
-            if maximizing_player:
-                evaluation: int = 21 - p1_moves
-                self.transposition_table[game_state] = (evaluation, drop_col)
-                return evaluation, drop_col
-            else:
-                evaluation: int = -1 * (21 - p1_moves)
-                self.transposition_table[game_state] = (evaluation, drop_col)
-                return evaluation, drop_col
-
-        # check for draw next move
-        if nb_moves == 41:
-            evaluation: Tuple[int, int] = (0, game_state.last_token)
-            self.transposition_table[game_state] = evaluation
-            return evaluation
-
-        # run for maximizing player
-        if maximizing_player:
-            value: int = -999999
-            column: int = -1
-            for drop_col in game_state.valid_columns:
-                # clone game_state and test column
-                child: GameState = game_state.clone()
-                child.drop(drop_col)
-
-                # check to see if node already evaluated
-                if lookup := self.transposition_table.get(child):
-                    ab_value, ab_column = lookup
+        if position.winning_moves():
+            return (43 - position.moves) // 2 * unit
+
+        # check for loss on the opponent's next move, either every drop hands them a win or they have two threats
+        candidates: int = position.non_losing_moves()
+        if not candidates:
+            return -((42 - position.moves) // 2) * unit
+
+        # early positions may already be solved in the opening book. A position and its mirror image share one entry
+        # in the book and in the table, columns stored by the mirror image are reflected on the way in and out
+        key, mirrored = position.canonical_key()
+        if self.book is not None and position.moves <= self.book.max_ply:
+            if (book_score := self.book.get(key)) is not None:
+                return book_score * unit
+
+        if depth <= 0:
+            if self.evaluator is None:
+                return 0
+            return max(1 - unit, min(unit - 1, self.evaluator(position)))
+
+        # tighten the window with what is already known about this position
+        tt_column: int = -1
+        entry: Optional[Tuple[int, int, int, int]] = table.get(key)
+        if stats is not None:
+            stats.tt_probes += 1
+            stats.tt_hits += entry is not None
+        if entry is not None:
+            value, bound, tt_column, entry_depth = entry
+            if mirrored and tt_column != -1:
+                tt_column = 6 - tt_column
+            if entry_depth >= depth:
+                if bound == TranspositionTable.EXACT:
+                    return value
+                if bound == TranspositionTable.LOWER:
+                    if value >= beta:
+                        return value
+                    alpha = max(alpha, value)
                 else:
-                    ab_value, ab_column = self.alpha_beta(child)
-
-                # deal with evaluation
-                if ab_value > value:
-                    value = ab_value
-                    column = ab_column
-                if value >= self.beta:
-                    break  # beta cutoff
-                self.alpha = max(self.alpha, value)
-
-                # store in transposition table
-                if not lookup:
-                    self.transposition_table[game_state] = (value, column)
-            return value, column
-        else:
-            value: int = 999999
-            column: int = -1
-            for drop_col in game_state.valid_columns:
-                # duplicate game_state and check for valid drop
-                child: GameState = game_state.clone()
-                child.drop(drop_col)
-
-                # get evaluation of node
-                if lookup := self.transposition_table.get(child):
-                    ab_value, ab_column = lookup
-                else:
-                    ab_value, ab_column = self.alpha_beta(child)
+                    if value <= alpha:
+                        return value
+                    beta = min(beta, value)
+
+        # the opponent cannot win before their second next token and cannot be beaten before our second next one.
+        # With one cell left neither can happen, floor division would make that a win like the compiled solver's
+        # C division does not
+        min_score: int = -(max(40 - position.moves, 0) // 2) * unit
+        if alpha < min_score:
+            alpha = min_score
+            if alpha >= beta:
+                return alpha
+        max_score: int = (41 - position.moves) // 2 * unit
+        if beta > max_score:
+            beta = max_score
+            if alpha >= beta:
+                return beta
+
+        window_alpha: int = alpha
+        value = -999999
+        best: int = -1
+        ordered: List[int] = self.order_moves(tt_column, candidates)
+        for column in ordered:
+            position.play(column)
+            score: int = -self.negamax(-beta, -alpha, depth - 1)
+            position.undo(column)
+
+            if score > value:
+                value = score
+                best = column
+            if value >= beta:
+                table.store(key, value, TranspositionTable.LOWER, 6 - best if mirrored else best, depth)
+                if stats is not None:
+                    stats.tt_stores += 1
+                    stats.cutoff(ordered.index(column))
+                killers: List[int] = self.killers[position.moves]
+                if killers[0] != best:
+                    killers[1] = killers[0]
+                    killers[0] = best
+                return value  # beta cutoff
+            if value > alpha:
+                alpha = value
+
+        # every child failing low only bounds the score from above
+        bound = TranspositionTable.EXACT if value > window_alpha else TranspositionTable.UPPER
+        table.store(key, value, bound, 6 - best if mirrored else best, depth)
+        if stats is not None:
+            stats.tt_stores += 1
+        return value
+
+    def natural_order(self, first: int, candidates: int) -> List[int]:
+        """This function orders the candidate columns from left to right
+
+        Args:
+            first (int): a column to put in front, e.g. the best column stored in the transposition table, or -1
+            candidates (int): a bitboard with the cells of the columns to search lit up
+
+        Returns:
+            List[int]: the candidate columns in the order to search them
+        """
+        columns: List[int] = [column for column in range(7) if column != first and candidates & COLUMN_MASKS[column]]
+        if first >= 0 and candidates & COLUMN_MASKS[first]:
+            columns.insert(0, first)
+
+        return columns
+
+    def center_order(self, first: int, candidates: int) -> List[int]:
+        """This function orders the candidate columns from the middle out
+
+        Args:
+            first (int): a column to put in front, e.g. the best column stored in the transposition table, or -1
+            candidates (int): a bitboard with the cells of the columns to search lit up
+
+        Returns:
+            List[int]: the candidate columns in the order to search them
+        """
+        columns: List[int] = [column for column in CENTER_ORDER
+                              if column != first and candidates & COLUMN_MASKS[column]]
+        if first >= 0 and candidates & COLUMN_MASKS[first]:
+            columns.insert(0, first)
+
+        return columns
+
+    def threat_order(self, first: int, candidates: int) -> List[int]:
+        """This function orders the candidate columns by the given column first, then by the number of winning
+        cells each drop leaves the player with, ties going to the middle column
+
+        Args:
+            first (int): a column to put in front, e.g. the best column stored in the transposition table, or -1
+            candidates (int): a bitboard with the cells of the columns to search lit up
+
+        Returns:
+            List[int]: the candidate columns in the order to search them
+        """
+        position: Position = self.position
+        scored: List[Tuple[int, int]] = []
+        for column in CENTER_ORDER:
+            move: int = candidates & COLUMN_MASKS[column]
+            if not move:
+                continue
+            if column == first:
+                priority: int = 1000
+            else:
+                priority = bin(winning_squares(position.current | move, position.mask | move)).count('1')
+            scored.append((priority, column))
+        scored.sort(key=lambda pair: pair[0], reverse=True)  # the sort is stable so ties stay center first
+
+        return [column for _, column in scored]
 
-                # deal with evaluation
-                if ab_value < value:
-                    value = ab_value
-                    column = ab_column
-                if value <= self.alpha:
-                    break  # alpha cutoff
-                self.beta = min(self.beta, value)
+    def killer_order(self, first: int, candidates: int) -> List[int]:
+        """This function orders the candidate columns like threat_order but puts the two columns that most recently
+        caused a cutoff at this ply right after the given column
 
-                # store
-                if not lookup:
-                    self.transposition_table[game_state] = (value, column)
-            return value, column
+        Args:
+            first (int): a column to put in front, e.g. the best column stored in the transposition table, or -1
+            candidates (int): a bitboard with the cells of the columns to search lit up
+
+        Returns:
+            List[int]: the candidate columns in the order to search them
+        """
+        killers: List[int] = self.killers[self.position.moves]
+        columns: List[int] = self.threat_order(first, candidates)
+        lead: int = 1 if columns and columns[0] == first else 0
+        for killer in reversed(killers):
+            if killer != first and killer in columns:
+                columns.remove(killer)
+                columns.insert(lead, killer)
+
+        return columns
 
-    def best_column(self) -> int:
-        """This function uses the mini-max algorithm to determine the best column
+    def out_of_budget(self) -> bool:
+        """This function checks the time and node limits of the running search and whether another thread has set
+        stop_requested. The flag stays set until its owner clears it, so it also stops any search started later
 
         Returns:
-            column (int): the evaluation of the position and the column that results in the best column
+            bool: whether or not the search has to stop
         """
+        if self.stop_requested:
+            return True
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            return True
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return True
+
+        return False
+
+    def search_root(self, depth: int, first: int = -1) -> Tuple[int, int]:
+        """This function runs negamax over every column of the root position
+
+        Args:
+            depth (int): the number of moves to look ahead
+            first (int, optional): a column to search before the others, e.g. the best column of the last iteration
+
+        Returns:
+            value, column (Tuple[int, int]): the score of the position for the player to move, in score_unit
+                                             steps, and the column that achieves it. If the budget runs out after the first column has been
+                                             searched the best column so far is kept in self.partial_result
+        """
+        position: Position = self.position
+
         # check for win on current move
-        if column := self.game_state.current_player_can_win():
-            return column
+        if winning := position.winning_moves():
+            return (43 - position.moves) // 2 * self.score_unit, lowest_column(winning)
+
+        # when every move loses the search still picks the one that loses slowest
+        candidates: int = position.non_losing_moves() or position.possible()
+
+        alpha: int = -21 * self.score_unit
+        beta: int = 21 * self.score_unit
+        value: int = -999999
+        best: int = -1
+        for column in self.order_moves(first, candidates):
+            position.play(column)
+            score: int = -self.negamax(-beta, -alpha, depth - 1)
+            position.undo(column)
+
+            if score > value:
+                value = score
+                best = column
+                self.partial_result = (value, best)
+            alpha = max(alpha, value)
+
+        return value, best
 
-        # check for opponent win on next move
-        throwaway: GameState = self.game_state.clone()
-        throwaway.current_turn = 3 - throwaway.current_turn
-        if column := throwaway.current_player_can_win():
-            return column
+    def solve(self) -> Tuple[int, int]:
+        """This function searches the root position all the way to the end of the game
+
+        Returns:
+            value, column (Tuple[int, int]): the score of the position for the player to move and the column that
+                                             achieves it
+        """
+        self.deadline = None
+        self.node_limit = None
+        if self.stats is not None:
+            self.stats.reset()
+        if self.solver == 'null_window':
+            score, column, _ = self.null_window_solve()
+            return score, column
+
+        value, column = self.search_root(42 - self.position.moves)
+        return value // self.score_unit, column
+
+    def null_window_solve(self) -> SolveResult:
+        """This function finds the exact score with a series of zero-width searches. Each one only answers whether
+        the score is above a guess, which prunes far more than a full window, and every probe reuses the bounds the
+        earlier probes left in the transposition table. The guesses bisect the possible scores, leaning towards 0
+        where most positions end up.
+
+        Returns:
+            SolveResult: the score for the player to move, the column that achieves it and the nodes searched
+        """
+        position: Position = self.position
+        start_nodes: int = self.nodes
+        depth: int = 42 - position.moves
+        self.deadline = None
+        self.node_limit = None
+        if self.stats is not None:
+            self.stats.reset()
+
+        # check for win on current move
+        if winning := position.winning_moves():
+            return SolveResult((43 - position.moves) // 2, lowest_column(winning), self.nodes - start_nodes)
+
+        score: int = self.bisect(-((42 - position.moves) // 2), (43 - position.moves) // 2, depth)
+
+        return SolveResult(score, self.column_holding(score), self.nodes - start_nodes)
+
+    def bisect(self, lower: int, upper: int, depth: int, first_guess: Optional[int] = None) -> int:
+        """This function narrows in on the exact score of self.position with zero-width searches, see
+        null_window_solve
+
+        Args:
+            lower (int): a score the position is known to reach
+            upper (int): a score the position is known not to exceed
+            depth (int): the number of moves left to the end of the game
+            first_guess (int, optional): the score to ask about first instead of the middle of the range, e.g. the
+                                         one a sibling move reached
+
+        Returns:
+            int: the score for the player to move
+        """
+        while lower < upper:
+            guess: int = lower + (upper - lower) // 2
+            if first_guess is not None and lower <= first_guess < upper:
+                guess = first_guess
+            elif guess <= 0 and int(lower / 2) < guess:
+                guess = int(lower / 2)
+            elif guess >= 0 and int(upper / 2) > guess:
+                guess = int(upper / 2)
+            first_guess = None
+            # exact scores are whole multiples of score_unit, so the answers round to the neighbouring score
+            result: int = self.negamax(guess * self.score_unit, guess * self.score_unit + 1, depth)
+            if result <= guess * self.score_unit:
+                upper = result // self.score_unit
+            else:
+                lower = -(-result // self.score_unit)
+
+        return lower
+
+    def column_holding(self, score: int, first: int = -1) -> int:
+        """This function finds a column that keeps the exact score of self.position. Every column is checked with
+        one zero-width search, which the table usually answers after the search that found the score
+
+        Args:
+            score (int): the exact score of the position for the player to move, which must not be over
+            first (int, optional): a column to check before the others, e.g. the one the table suggests
+
+        Returns:
+            int: the column, -1 if none keeps the score because it was not the exact one
+        """
+        position: Position = self.position
+        if winning := position.winning_moves():
+            return lowest_column(winning)
+        depth: int = 42 - position.moves
+        for column in self.order_moves(first, position.non_losing_moves() or position.possible()):
+            position.play(column)
+            result: int = self.negamax(-score * self.score_unit, -score * self.score_unit + 1, depth - 1)
+            position.undo(column)
+            if result <= -score * self.score_unit:
+                return column
+
+        return -1
+
+    def principal_variation(self, score: int) -> List[int]:
+        """This function follows the best moves of both players from self.position to the end of the game. Every
+        step tries the column the transposition table holds for the position first and checks that it keeps the
+        score, so the line is right even where the table was overwritten or only holds a bound
+
+        Args:
+            score (int): the exact score of the position for the player to move
+
+        Returns:
+            List[int]: the columns, empty if the game is already over
+
+        Raises:
+            ValueError: if no move keeps the score, which is then not the exact score of the position
+        """
+        position: Position = self.position
+        line: List[int] = []
+        try:
+            while position.moves < 42 and not alignment(position.current ^ position.mask):
+                key, mirrored = position.canonical_key()
+                entry: Optional[Tuple[int, int, int, int]] = self.transposition_table.get(key)
+                first: int = -1 if entry is None or entry[2] == -1 else 6 - entry[2] if mirrored else entry[2]
+                column: int = self.column_holding(score, first)
+                if column == -1:
+                    # playing -1 would shift the mask into column 6 and carry on from a corrupted position
+                    raise ValueError(f'no column keeps the score {score} after {line}')
+                line.append(column)
+                position.play(column)
+                score = -score
+        finally:
+            for column in reversed(line):
+                position.undo(column)
+
+        return line
+
+    def analyze(self) -> RootAnalysis:
+        """This function scores every column of self.position exactly and finds the principal variation. The
+        columns are bisected in search order with one shared table, and each one is first asked whether it beats the
+        best score found so far. The root score is the best of the column scores, so the root is not solved again
+
+        Returns:
+            RootAnalysis: the score and best column, the score of every column and the principal variation
+        """
+        position: Position = self.position
+        start_nodes: int = self.nodes
+        self.deadline = None
+        self.node_limit = None
+        if self.stats is not None:
+            self.stats.reset()
+
+        column_scores: List[Optional[int]] = [None] * 7
+        score: Optional[int] = None
+        column: int = -1
+        for candidate in self.order_moves(-1, position.possible()):
+            if position.is_winning_move(candidate):
+                value: int = (43 - position.moves) // 2
+            else:
+                position.play(candidate)
+                # the opponent's score is one below the negative of the best so far exactly when this column beats it
+                first_guess: Optional[int] = None if score is None else -score - 1
+                value = -self.bisect(-((42 - position.moves) // 2), (43 - position.moves) // 2, 42 - position.moves,
+                                     first_guess)
+                position.undo(candidate)
+            column_scores[candidate] = value
+            if score is None or value > score:
+                score, column = value, candidate
+        if score is None:
+            return RootAnalysis(0, -1, column_scores, [], self.nodes - start_nodes)
+
+        position.play(column)
+        line: List[int] = [column] + self.principal_variation(-score)
+        position.undo(column)
+
+        return RootAnalysis(score, column, column_scores, line, self.nodes - start_nodes)
+
+    def iterative_deepening(self, max_time: Optional[float] = None, max_nodes: Optional[int] = None,
+                            max_depth: Optional[int] = None) -> Tuple[int, int, int]:
+        """This function searches one move deeper at a time until the game is solved or a budget runs out. Every
+        iteration starts from the best column of the last one and the transposition table keeps the work of the
+        earlier iterations, so the repeated shallow searches cost little.
+
+        Args:
+            max_time (float, optional): the number of seconds the search may take
+            max_nodes (int, optional): the number of nodes the search may visit
+            max_depth (int, optional): the deepest iteration to run
+
+        Returns:
+            value, column, depth (Tuple[int, int, int]): the score in score_unit steps and best column of the
+                                                         deepest search that finished and how many moves it
+                                                         looked ahead
+        """
+        position: Position = self.position
+        remaining: int = 42 - position.moves
+        self.deadline = None if max_time is None else time.perf_counter() + max_time
+        self.node_limit = None if max_nodes is None else self.nodes + max_nodes
+        if self.stats is not None:
+            self.stats.reset()
+        last_depth: int = min(remaining, remaining if max_depth is None else max_depth)
+
+        root: Tuple[int, int, int] = (position.mask, position.current, position.moves)
+        value: int = 0
+        column: int = -1
+        depth: int = 0
+        for iteration in range(1, last_depth + 1):
+            self.partial_result = None
+            try:
+                value, column = self.search_root(iteration, column)
+            except SearchTimeout:
+                # the search stopped somewhere down the tree without taking its moves back
+                position.mask, position.current, position.moves = root
+                # the first column searched was the old best one, so anything found before the timeout is at least
+                # as well informed as the last finished iteration
+                if self.partial_result is not None:
+                    value, column = self.partial_result
+                break
+            depth = iteration
+
+            # a win or a loss inside the horizon cannot change with a deeper search
+            if abs(value) >= self.score_unit:
+                break
+
+        # there was not enough budget for a single iteration so take the first column that is not full
+        if column < 0:
+            column = next(c for c in range(7) if position.can_play(c))
+
+        return value, column, depth
+
+    def best_column(self, max_time: Optional[float] = None, max_nodes: Optional[int] = None,
+                    max_depth: Optional[int] = None) -> int:
+        """This function uses the negamax algorithm to determine the best column. Without any limit the game is
+        searched to the end, otherwise iterative deepening returns the best column found within the limits
+
+        Args:
+            max_time (float, optional): the number of seconds the search may take
+            max_nodes (int, optional): the number of nodes the search may visit
+            max_depth (int, optional): the number of moves to look ahead
+
+        Returns:
+            column (int): the column that results in the best evaluation for the player to move
+        """
+        if max_time is None and max_nodes is None and max_depth is None:
+            _, column = self.solve()
+        else:
+            _, column, _ = self.iterative_deepening(max_time, max_nodes, max_depth)
 
-        # then run alpha_beta
-        _, column = self.alpha_beta(self.game_state)
         return column
 
 
@@ -0,0 +1,368 @@
+# This is the unittest script for the packed position and the search
+
+import time
+import pickle
+import random
+import unittest
+from helper_classes import *
+
+# move strings and their scores for the player to move, checked against a plain minimax without pruning
+SOLVED_POSITIONS: List[Tuple[str, int]] = [
+    ('5000155505050163261412221122664', 0),
+    ('52413042433456134400662562553', 0),
+    ('154265360652564534224421205403', 3),
+    ('114664560610420014651622034104', 1),
+    ('004135144663003401414210165663', -4),
+    ('110331550514506566006210253323', 5),
+    ('311501102050634205505256146431', 2),
+    ('45511366102565524061100501230', 5),
+    ('25000024604366012663321115455', -1),
+    ('4565664645501214534120162562231', -3),
+    ('5110524255543506264061616204142', -2),
+    ('66233440050011646602135116543012', 4),
+    ('30055121231526136334324551520', 5),
+    ('02323632266620120563014133006455', 3),
+]
+
+
+def minimax(position: Position) -> int:
+    """Reference score without pruning or a transposition table"""
+    if position.moves == 42:
+        return 0
+    for column in range(7):
+        if position.can_play(column) and position.is_winning_move(column):
+            return (43 - position.moves) // 2
+    value: int = -999999
+    for column in range(7):
+        if position.can_play(column):
+            position.play(column)
+            value = max(value, -minimax(position))
+            position.undo(column)
+
+    return value
+
+
+def analyzer_for(moves: str, **kwargs) -> AlphaBetaAnalyzer:
+    return AlphaBetaAnalyzer(GameState.from_moves(moves), table_size=10007, **kwargs)
+
+
+class TestPosition(unittest.TestCase):
+
+    def test_matches_game_state(self):
+        game_state = GameState()
+        position = Position()
+        for char in '3344521160':
+            game_state.drop(int(char))
+            position.play(int(char))
+            packed = Position.from_game_state(game_state)
+            self.assertEqual((position.mask, position.current, position.moves),
+                             (packed.mask, packed.current, packed.moves))
+
+    def test_undo(self):
+        position = Position.from_game_state(GameState.from_moves('334452116'))
+        before = (position.mask, position.current, position.moves, position.key())
+        for column in range(7):
+            if position.can_play(column):
+                position.play(column)
+                self.assertNotEqual(position.key(), before[3])
+                position.undo(column)
+                self.assertEqual((position.mask, position.current, position.moves, position.key()), before)
+
+    def test_random_games_match_drops(self):
+        # play and undo against GameState.drop over whole random games, down to the win or the full board
+        rng = random.Random(1)
+        for _ in range(50):
+            game_state = GameState()
+            position = Position()
+            while game_state.end() == -1:
+                column = rng.choice(game_state.valid_columns)
+                before = (position.mask, position.current, position.moves)
+                child = game_state.clone()
+                child.drop(column)
+                self.assertEqual(position.is_winning_move(column), child.end() == game_state.current_turn)
+                position.play(column)
+                packed = Position.from_game_state(child)
+                self.assertEqual((position.mask, position.current, position.moves),
+                                 (packed.mask, packed.current, packed.moves))
+                position.undo(column)
+                self.assertEqual((position.mask, position.current, position.moves), before)
+                position.play(column)
+                game_state = child
+
+    def test_full_column(self):
+        position = Position.from_game_state(GameState.from_moves('000000'))
+        self.assertFalse(position.can_play(0))
+        self.assertEqual(position.move_bit(0), 0)
+
+    def test_keys_unique(self):
+        # every position reachable in four moves gets its own key
+        keys = {}
+        for moves in (f'{a}{b}{c}{d}' for a in range(7) for b in range(7) for c in range(7) for d in range(7)):
+            game_state = GameState.from_moves(moves)
+            boards = (game_state.bboard_1.internal, game_state.bboard_2.internal)
+            key = Position.from_game_state(game_state).key()
+            self.assertEqual(keys.setdefault(key, boards), boards)
+        self.assertEqual(len(keys), 1120)
+
+    def test_can_win_matches_drops(self):
+        for moves in ('', '0101', '001122', '334455', '32232330', '012345601234560123456', '2345432'):
+            game_state = GameState.from_moves(moves)
+            expected = None
+            for column in game_state.valid_columns:
+                child = game_state.clone()
+                child.drop(column)
+                if child.end() == game_state.current_turn:
+                    expected = column
+                    break
+            self.assertEqual(game_state.current_player_can_win(), expected, moves)
+            own = game_state.bboard_1 if game_state.current_turn == 1 else game_state.bboard_2
+            self.assertEqual(own.win_this_move(game_state.top_row_by_column), expected, moves)
+
+    def test_game_state_round_trip(self):
+        for moves in ('', '3', '3344521160', '000000', '012345601234560123456'):
+            game_state = GameState.from_moves(moves)
+            unpacked = Position.from_game_state(game_state).to_game_state()
+            self.assertEqual(unpacked, game_state, moves)
+            self.assertEqual(unpacked.current_turn, game_state.current_turn, moves)
+            self.assertEqual(unpacked.top_row_by_column, game_state.top_row_by_column, moves)
+
+    def test_slots(self):
+        for obj in (BitBoard(), GameState(), Position()):
+            self.assertFalse(hasattr(obj, '__dict__'))
+        # game states pickled before the classes had __slots__ still load
+        with open('game_states.pickle', 'rb') as fp:
+            game_states = pickle.load(fp)
+        self.assertEqual(pickle.loads(pickle.dumps(game_states)), game_states)
+        self.assertEqual(game_states[0].total_moves, Position.from_game_state(game_states[0]).moves)
+
+    def test_canonical_key(self):
+        for moves in ('', '3', '0', '3344521160', '012345601234560123456'):
+            mirror = ''.join(str(6 - int(char)) for char in moves)
+            position = Position.from_game_state(GameState.from_moves(moves))
+            reflected = Position.from_game_state(GameState.from_moves(mirror))
+            self.assertEqual(mirror_columns(position.mask), reflected.mask)
+            self.assertEqual(mirror_columns(mirror_columns(position.key())), position.key())
+            self.assertEqual(position.canonical_key()[0], reflected.canonical_key()[0], moves)
+            self.assertEqual(position.canonical_key()[0], min(position.key(), reflected.key()), moves)
+
+    def test_non_losing_moves(self):
+        # player 2 threatens both ends of 3, 4 and 5 in the bottom row so player 1 has nothing left
+        self.assertEqual(Position.from_game_state(GameState.from_moves('030415')).non_losing_moves(), 0)
+        # one threat at 5 forces the block
+        position = Position.from_game_state(GameState.from_moves('030416'))
+        self.assertEqual(position.non_losing_moves(), position.move_bit(5))
+        # dropping in 2 would let player 1 win in the cell right above it
+        position = Position.from_game_state(GameState.from_moves('100013503'))
+        self.assertEqual(position.non_losing_moves(), position.possible() & ~COLUMN_MASKS[2])
+
+
+class TestTranspositionTable(unittest.TestCase):
+
+    def test_store_and_get(self):
+        table = TranspositionTable(101)
+        table.store(12345, -7, TranspositionTable.UPPER, 3, 10)
+        table.store(678, 0, TranspositionTable.EXACT, -1, 2)
+        self.assertEqual(table.get(12345), (-7, TranspositionTable.UPPER, 3, 10))
+        self.assertEqual(table.get(678), (0, TranspositionTable.EXACT, -1, 2))
+        self.assertIsNone(table.get(999))
+        self.assertEqual((table.hits, table.misses, table.stores), (2, 1, 2))
+
+    def test_depth_preferred(self):
+        table = TranspositionTable(101)
+        table.store(5, 1, TranspositionTable.EXACT, 0, 20)
+        table.store(5 + 101, 2, TranspositionTable.EXACT, 0, 3)
+        self.assertEqual(table.get(5)[0], 1)
+        self.assertEqual(table.collisions, 1)
+
+    def test_always_replace(self):
+        table = TranspositionTable(101, replacement='always')
+        table.store(5, 1, TranspositionTable.EXACT, 0, 20)
+        table.store(5 + 101, 2, TranspositionTable.EXACT, 0, 3)
+        self.assertIsNone(table.get(5))
+        self.assertEqual(table.get(5 + 101)[0], 2)
+
+    def test_same_key_overwrites(self):
+        table = TranspositionTable(101)
+        table.store(5, 1, TranspositionTable.LOWER, 0, 20)
+        table.store(5, 2, TranspositionTable.EXACT, 4, 3)
+        self.assertEqual(table.get(5), (2, TranspositionTable.EXACT, 4, 3))
+        self.assertEqual((table.collisions, table.stores), (0, 2))
+
+    def test_depth_replaces_shallower(self):
+        table = TranspositionTable(101)
+        table.store(5, 1, TranspositionTable.EXACT, 0, 3)
+        table.store(5 + 101, 2, TranspositionTable.EXACT, 0, 3)
+        self.assertIsNone(table.get(5))
+        table.store(5, 3, TranspositionTable.EXACT, 0, 4)
+        self.assertEqual(table.get(5)[0], 3)
+        self.assertEqual((table.collisions, table.stores), (2, 3))
+
+    def test_packing_limits(self):
+        table = TranspositionTable(101)
+        for key, entry in ((1, (-21000, TranspositionTable.UPPER, 6, 42)), (2, (21000, TranspositionTable.LOWER, 0, 0)),
+                           (3, (0, TranspositionTable.EXACT, -1, 255))):
+            table.store(key, *entry)
+            self.assertEqual(table.get(key), entry)
+
+    def test_fixed_size(self):
+        table = TranspositionTable(101)
+        for key in range(1, 1000):
+            table.store(key, key % 21, TranspositionTable.EXACT, key % 7, key % 42)
+        self.assertEqual(table.nbytes, 16 * 101)
+        table.clear()
+        self.assertIsNone(table.get(999))
+        self.assertEqual((table.hits, table.misses, table.collisions, table.stores), (0, 1, 0, 0))
+        with self.assertRaises(ValueError):
+            TranspositionTable(101, replacement='oldest')
+        with self.assertRaises(ValueError):
+            TranspositionTable(101, buffer=bytearray(100))
+
+    def test_shared_buffer(self):
+        buffer = bytearray(16 * 101)
+        writer = TranspositionTable(101, buffer=buffer)
+        reader = TranspositionTable(101, buffer=buffer)
+        writer.store(12345, 3, TranspositionTable.LOWER, 2, 9)
+        self.assertEqual(reader.get(12345), (3, TranspositionTable.LOWER, 2, 9))
+        # a slot whose entry changed without its key reads as a miss
+        writer.entries[12345 % 101] ^= 1
+        self.assertIsNone(reader.get(12345))
+
+
+class TestSolver(unittest.TestCase):
+
+    def test_reference_scores(self):
+        for moves, _ in SOLVED_POSITIONS[-3:]:
+            analyzer = analyzer_for(moves)
+            self.assertEqual(analyzer.solve()[0], minimax(analyzer.position), moves)
+
+    def test_solved_positions(self):
+        for moves, score in SOLVED_POSITIONS:
+            value, column = analyzer_for(moves).solve()
+            self.assertEqual(value, score, moves)
+            # the column must achieve the score
+            analyzer = analyzer_for(moves + str(column))
+            self.assertEqual(-analyzer.solve()[0], score, moves)
+
+    def test_shared_table(self):
+        # solving many positions with one table must not change any answer
+        analyzer = analyzer_for('')
+        for moves, score in SOLVED_POSITIONS * 2:
+            analyzer.position = Position.from_game_state(GameState.from_moves(moves))
+            self.assertEqual(analyzer.solve()[0], score, moves)
+
+    def test_mirrored_table_entries(self):
+        # the mirror image reuses the entries of the original, its best column must come back reflected
+        analyzer = analyzer_for('')
+        for moves, score in SOLVED_POSITIONS[:6]:
+            for line in (moves, ''.join(str(6 - int(char)) for char in moves)):
+                analyzer.position = Position.from_game_state(GameState.from_moves(line))
+                value, column = analyzer.solve()
+                self.assertEqual(value, score, line)
+                self.assertEqual(-analyzer_for(line + str(column)).solve()[0], score, line)
+
+    def test_alpha_beta_perspective(self):
+        for moves, score in SOLVED_POSITIONS[:4]:
+            game_state = GameState.from_moves(moves)
+            value, _ = analyzer_for(moves).alpha_beta(game_state)
+            self.assertEqual(value, score if game_state.current_turn == 1 else -score, moves)
+
+    def test_iterative_deepening_solves(self):
+        for moves, score in SOLVED_POSITIONS[:6]:
+            value, column, depth = analyzer_for(moves).iterative_deepening()
+            self.assertEqual(value, score, moves)
+            self.assertEqual(-analyzer_for(moves + str(column)).solve()[0], score, moves)
+
+    def test_node_budget(self):
+        analyzer = analyzer_for('')
+        value, column, depth = analyzer.iterative_deepening(max_nodes=5000)
+        self.assertTrue(analyzer.position.can_play(column))
+        self.assertLess(depth, 42)
+        self.assertLess(analyzer.nodes, 5000 + 1024)
+        # the search restored the root position
+        self.assertEqual(analyzer.position.moves, 0)
+        self.assertEqual(analyzer.position.mask, 0)
+
+    def test_time_budget(self):
+        analyzer = analyzer_for('3')
+        start = time.perf_counter()
+        column = analyzer.best_column(max_time=0.2)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertIn(column, range(7))
+
+    def test_move_orderings_agree(self):
+        for ordering in ('natural', 'center', 'threat', 'killer'):
+            for moves, score in SOLVED_POSITIONS[::3]:
+                self.assertEqual(analyzer_for(moves, move_ordering=ordering).solve()[0], score, (ordering, moves))
+
+    def test_solvers_agree(self):
+        for moves, score in SOLVED_POSITIONS:
+            full = analyzer_for(moves, solver='full_window').solve()
+            result = analyzer_for(moves).null_window_solve()
+            self.assertEqual((full[0], result.score), (score, score), moves)
+            self.assertGreater(result.nodes, 0)
+            self.assertEqual(-analyzer_for(moves + str(result.column)).solve()[0], score, moves)
+
+    def test_analyze(self):
+        for moves, score in SOLVED_POSITIONS[-4:]:
+            analyzer = analyzer_for(moves)
+            analysis = analyzer.analyze()
+            self.assertEqual(analysis.score, score, moves)
+            for column in range(7):
+                expected = None
+                if analyzer.position.can_play(column):
+                    child = analyzer_for(moves + str(column))
+                    won = analyzer.position.is_winning_move(column)
+                    expected = (43 - analyzer.position.moves) // 2 if won else -child.solve()[0]
+                self.assertEqual(analysis.column_scores[column], expected, (moves, column))
+            self.assertEqual(max(value for value in analysis.column_scores if value is not None), score, moves)
+            self.assertEqual(analysis.column, analysis.principal_variation[0])
+            # every move of the line keeps the score of the position it was played in
+            line = moves
+            for column in analysis.principal_variation:
+                self.assertEqual(analyzer_for(line).solve()[0], score, line)
+                line += str(column)
+                score = -score
+            self.assertNotEqual(GameState.from_moves(line).end(), -1, line)
+
+    def test_principal_variation_wrong_score(self):
+        moves, score = SOLVED_POSITIONS[0]
+        analyzer = analyzer_for(moves)
+        key = analyzer.position.key()
+        with self.assertRaises(ValueError):
+            analyzer.principal_variation(score + 1)
+        # the moves of the broken line are taken back
+        self.assertEqual(analyzer.position.key(), key)
+        # a drawn position is played out to the last cell
+        self.assertEqual(len(analyzer.principal_variation(score)), 42 - len(moves))
+
+    def test_analyze_shares_table(self):
+        # every column bisected with one table costs less than solving each column from scratch
+        moves = '2455156244405515422003'
+        analysis = AlphaBetaAnalyzer(GameState.from_moves(moves)).analyze()
+        separate = 0
+        for column in range(7):
+            if analysis.column_scores[column] is not None:
+                child = AlphaBetaAnalyzer(GameState.from_moves(moves + str(column)))
+                self.assertEqual(-child.null_window_solve().score, analysis.column_scores[column])
+                separate += child.nodes
+        self.assertLess(analysis.nodes, separate)
+
+    def test_last_cell_draw(self):
+        # one empty cell and no four to make with it
+        for moves in ('52413042433456134400662562553113215210006', '43601455115016015510463266046520424222333'):
+            self.assertEqual(analyzer_for(moves).solve()[0], 0, moves)
+            self.assertEqual(analyzer_for(moves).null_window_solve().score, 0, moves)
+
+    def test_threat_order(self):
+        # player 1 has 3 and 4 in the bottom row, dropping in 2 or 5 threatens both ends
+        analyzer = analyzer_for('3040')
+        candidates = analyzer.position.possible()
+        self.assertEqual(analyzer.threat_order(-1, candidates)[:2], [2, 5])
+        self.assertEqual(analyzer.threat_order(6, candidates)[0], 6)
+
+    def test_immediate_win(self):
+        self.assertEqual(analyzer_for('010101').best_column(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
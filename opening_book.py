@@ -0,0 +1,144 @@
+# This script builds and reads the opening book of solved early positions
+import sys
+import mmap
+import struct
+import argparse
+from array import array
+from bisect import bisect_left
+from typing import Dict, Optional, Union
+from helper_classes import GameState, Position
+from backend import Solver
+
+# file layout: the header, then the sorted 64-bit keys, then one signed byte of score per key. The header and the
+# keys are little-endian whatever machine wrote the book
+HEADER = struct.Struct('<4sII4x')
+MAGIC: bytes = b'C4OB'
+
+
+class OpeningBook:
+    """A memory-mapped book of exact scores. Only the header is read when the book is opened, the keys and scores
+    stay in the file and are paged in by the binary search as it touches them."""
+    max_ply: int
+    count: int
+    _keys: Union[memoryview, array]
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): the file written by write_book
+        """
+        with open(path, 'rb') as fp:
+            self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.max_ply, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f'{path} is not an opening book')
+        view = memoryview(self._map)
+        keys_end: int = HEADER.size + 8 * self.count
+        if sys.byteorder == 'little':
+            self._keys = view[HEADER.size:keys_end].cast('Q')
+        else:
+            # the keys cannot be used in place, a swapped copy costs 8 bytes per position
+            self._keys = array('Q', view[HEADER.size:keys_end])
+            self._keys.byteswap()
+        self._scores = view[keys_end:keys_end + self.count].cast('b')
+        view.release()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, key: int) -> Optional[int]:
+        """This function looks up the score of a position
+
+        Args:
+            key (int): the Position.canonical_key() of the position
+
+        Returns:
+            Optional[int]: the score for the player to move or None if the position is not in the book
+        """
+        idx: int = bisect_left(self._keys, key)
+        if idx < self.count and self._keys[idx] == key:
+            return self._scores[idx]
+
+        return None
+
+    def close(self) -> None:
+        if isinstance(self._keys, memoryview):
+            self._keys.release()
+        self._scores.release()
+        self._map.close()
+
+    def __enter__(self) -> 'OpeningBook':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def solve_positions(max_ply: int, root: str = '') -> Dict[int, int]:
+    """This function solves every position that can be reached from the root in which nobody has won yet and no
+    more than max_ply tokens have been dropped. A position and its mirror image are stored once, under their
+    canonical key
+
+    Args:
+        max_ply (int): the most tokens a position in the book may hold
+        root (str, optional): the moves to start from
+
+    Returns:
+        Dict[int, int]: the score for the player to move by canonical position key
+    """
+    solver = Solver()
+    position: Position = Position.from_game_state(GameState.from_moves(root))
+    scores: Dict[int, int] = {}
+
+    def visit():
+        key, _ = position.canonical_key()
+        if key in scores:
+            return  # reached by another move order or as a mirror image
+        scores[key] = solver.solve(position).score
+        if position.moves == max_ply:
+            return
+        for column in range(7):
+            if position.can_play(column) and not position.is_winning_move(column):
+                position.play(column)
+                visit()
+                position.undo(column)
+
+    if position.moves <= max_ply:
+        visit()
+
+    return scores
+
+
+def write_book(path: str, scores: Dict[int, int], max_ply: int) -> None:
+    """This function writes solved positions to a book file
+
+    Args:
+        path (str): where to write the book
+        scores (Dict[int, int]): the score for the player to move by canonical position key
+        max_ply (int): the most tokens a position in the book holds
+    """
+    keys = array('Q', sorted(scores))
+    book_scores = array('b', [scores[key] for key in keys])
+    if sys.byteorder == 'big':
+        keys.byteswap()
+    with open(path, 'wb') as fp:
+        fp.write(HEADER.pack(MAGIC, max_ply, len(keys)))
+        fp.write(keys.tobytes())
+        fp.write(book_scores.tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Solve every early position and write them to an opening book')
+    parser.add_argument('path', help='the book file to write')
+    parser.add_argument('--ply', type=int, default=4, help='the most tokens a position in the book may hold')
+    parser.add_argument('--root', default='', help='only solve the positions reachable from these moves')
+    args = parser.parse_args()
+
+    scores: Dict[int, int] = solve_positions(args.ply, args.root)
+    write_book(args.path, scores, args.ply)
+    print(f'wrote {len(scores)} positions to {args.path}')
+
+
+if __name__ == '__main__':
+    main()
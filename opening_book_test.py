@@ -0,0 +1,62 @@
+# This is the unittest script for the opening book
+
+import os
+import tempfile
+import unittest
+from opening_book import *
+from helper_classes import AlphaBetaAnalyzer
+
+ROOT: str = '66233440050011646602135116543012'
+
+
+class TestOpeningBook(unittest.TestCase):
+
+    def setUp(self):
+        self.scores = solve_positions(len(ROOT) + 3, ROOT)
+        handle, self.path = tempfile.mkstemp(suffix='.book')
+        os.close(handle)
+        write_book(self.path, self.scores, len(ROOT) + 3)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_lookup(self):
+        with OpeningBook(self.path) as book:
+            self.assertEqual(len(book), len(self.scores))
+            self.assertEqual(book.max_ply, len(ROOT) + 3)
+            for key, score in self.scores.items():
+                self.assertEqual(book.get(key), score)
+            self.assertIsNone(book.get(0))
+            self.assertIsNone(book.get(max(self.scores) + 1))
+
+    def test_scores_match_search(self):
+        analyzer = AlphaBetaAnalyzer(GameState.from_moves(ROOT), table_size=10007)
+        for column in range(7):
+            if analyzer.position.can_play(column) and not analyzer.position.is_winning_move(column):
+                child = AlphaBetaAnalyzer(GameState.from_moves(ROOT + str(column)), table_size=10007)
+                self.assertEqual(self.scores[child.position.canonical_key()[0]], child.solve()[0])
+
+    def test_analyzer_uses_book(self):
+        plain = AlphaBetaAnalyzer(GameState.from_moves(ROOT), table_size=10007)
+        with OpeningBook(self.path) as book:
+            booked = AlphaBetaAnalyzer(GameState.from_moves(ROOT), table_size=10007, book=book)
+            self.assertEqual(booked.solve()[0], plain.solve()[0])
+            self.assertLess(booked.nodes, plain.nodes)
+
+    def test_little_endian_keys(self):
+        # the keys are little-endian on any machine, so a book can be copied between them
+        with open(self.path, 'rb') as fp:
+            data = fp.read()
+        first = struct.unpack_from('<Q', data, HEADER.size)[0]
+        self.assertEqual(first, min(self.scores))
+        self.assertEqual(len(data), HEADER.size + 9 * len(self.scores))
+
+    def test_not_a_book(self):
+        with open(self.path, 'wb') as fp:
+            fp.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            OpeningBook(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
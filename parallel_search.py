@@ -0,0 +1,169 @@
+# This script solves a single position with several processes that share one transposition table
+import os
+import time
+import queue
+import signal
+import random
+import argparse
+from multiprocessing import Process, Queue
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, List, Tuple
+from helper_classes import GameState, Position, AlphaBetaAnalyzer, TranspositionTable, SolveResult, CENTER_ORDER, \
+    COLUMN_MASKS, winning_squares
+
+# positions that take a single process a few seconds
+CURVE_POSITIONS: List[str] = [
+    '5316026600605365',
+    '353541346654035063',
+    '3365522001360242',
+]
+
+
+def jittered_threat_order(seed: int) -> Callable[[Position, int, int], List[int]]:
+    """This function builds a move ordering like AlphaBetaAnalyzer.threat_order that breaks ties at random, so the
+    helper processes spread out over different parts of the tree instead of repeating the main search
+
+    Args:
+        seed (int): the seed of the tie breaks
+
+    Returns:
+        function: a move_ordering for AlphaBetaAnalyzer
+    """
+    rng = random.Random(seed)
+
+    def order(position: Position, first: int, candidates: int) -> List[int]:
+        scored: List[Tuple[float, int]] = []
+        for column in CENTER_ORDER:
+            move: int = candidates & COLUMN_MASKS[column]
+            if not move:
+                continue
+            if column == first:
+                priority: float = 1000
+            else:
+                priority = bin(winning_squares(position.current | move, position.mask | move)).count('1')
+            scored.append((priority + rng.random(), column))
+        scored.sort(reverse=True)
+
+        return [column for _, column in scored]
+
+    return order
+
+
+def search_worker(shared_name: str, table_size: int, moves: str, worker_id: int, results: Queue) -> None:
+    """This function runs one of the searches. Worker 0 searches exactly like a single process would, the others
+    use jittered move orderings and leave what they find in the shared table for everybody
+
+    Args:
+        shared_name (str): the name of the shared memory block holding the table
+        table_size (int): the number of slots in the table
+        moves (str): the position to solve
+        worker_id (int): the number of this worker
+        results (Queue): where to put (worker_id, score, column, nodes) when done
+    """
+    # a worker forked from the game inherits the handler pygame puts on SIGTERM, which would make terminate a no-op
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    shared = SharedMemory(name=shared_name)
+    table = TranspositionTable(table_size, buffer=shared.buf)
+    ordering = 'threat' if worker_id == 0 else jittered_threat_order(worker_id)
+    analyzer = AlphaBetaAnalyzer(GameState.from_moves(moves), move_ordering=ordering, transposition_table=table)
+    result: SolveResult = analyzer.null_window_solve()
+    results.put((worker_id, result.score, result.column, result.nodes))
+    table.close()
+    shared.close()
+
+
+def parallel_solve(moves: str, workers: int = 4,
+                   table_size: int = TranspositionTable.DEFAULT_SIZE) -> Tuple[SolveResult, float]:
+    """This function solves a position with Lazy SMP: every worker solves the whole position and the first answer
+    wins. The workers help each other only through the shared transposition table, and one that fails leaves the
+    answer to the others
+
+    Args:
+        moves (str): the column numbers played from the empty board
+        workers (int, optional): the number of processes
+        table_size (int, optional): the number of slots in the shared table
+
+    Returns:
+        result, seconds (Tuple[SolveResult, float]): the answer with the nodes of the worker that found it and the
+                                                     wall-clock time it took
+    """
+    if GameState.from_moves(moves) is None:
+        raise ValueError(f'illegal move string {moves!r}')
+
+    shared = SharedMemory(create=True, size=16 * table_size)
+    results: Queue = Queue()
+    processes: List[Process] = [
+        Process(target=search_worker, args=(shared.name, table_size, moves, worker_id, results))
+        for worker_id in range(workers)
+    ]
+    try:
+        start: float = time.perf_counter()
+        for process in processes:
+            process.start()
+        while True:
+            try:
+                _, score, column, nodes = results.get(timeout=0.1)
+                break
+            except queue.Empty:
+                # a worker that dies never answers, so waiting on the queue alone would hang once all of them have
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    raise RuntimeError(f'every search worker stopped without solving {moves!r}')
+        elapsed: float = time.perf_counter() - start
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            # a worker still starting up may not have reset its SIGTERM handler yet
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        shared.close()
+        shared.unlink()
+
+    return SolveResult(score, column, nodes), elapsed
+
+
+def speedup_curve(positions: List[str], worker_counts: Tuple[int, ...] = (1, 2, 4, 8),
+                  table_size: int = TranspositionTable.DEFAULT_SIZE) -> None:
+    """This function times the parallel solver on the same positions with more and more workers. The curve is only
+    meaningful with at least as many cores as workers. So far it has only been run on a single core, where it shows
+    nothing but the process overhead (0.57x with 2 workers), and the speedup on a multi-core machine has not been
+    measured
+
+    Args:
+        positions (List[str]): the positions to solve
+        worker_counts (tuple, optional): the numbers of workers to try
+        table_size (int, optional): the number of slots in the shared table
+    """
+    cores: int = os.cpu_count() or 1
+    if max(worker_counts) > cores:
+        print(f'{cores} core(s) only, the runs with more workers than that show overhead rather than speedup')
+    baseline: float = 0
+    for workers in worker_counts:
+        total: float = 0
+        for moves in positions:
+            _, elapsed = parallel_solve(moves, workers, table_size)
+            total += elapsed
+        baseline = baseline or total
+        print(f'{workers} workers  {total:>7.2f}s  speedup {baseline / total:.2f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Solve a position with several processes')
+    parser.add_argument('moves', nargs='?', default=None, help='the column numbers played from the empty board')
+    parser.add_argument('--workers', type=int, default=4, help='the number of processes')
+    parser.add_argument('--table-size', type=int, default=TranspositionTable.DEFAULT_SIZE,
+                        help='the number of slots in the shared transposition table')
+    parser.add_argument('--curve', action='store_true', help='print the speedup over 1, 2, 4 and 8 workers')
+    args = parser.parse_args()
+
+    if args.curve:
+        speedup_curve([args.moves] if args.moves is not None else CURVE_POSITIONS, table_size=args.table_size)
+    else:
+        result, elapsed = parallel_solve(args.moves or '', args.workers, args.table_size)
+        print(f'score {result.score} column {result.column} nodes {result.nodes} in {elapsed:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
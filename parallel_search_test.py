@@ -0,0 +1,98 @@
+# This is the unittest script for the parallel solver over a shared transposition table
+
+import time
+import signal
+import unittest
+from unittest import mock
+from typing import List
+import parallel_search
+from parallel_search import *
+
+MOVES: str = '2455156244405515422003'
+created: List[str] = []
+
+
+class RecordedSharedMemory(SharedMemory):
+    # remembers the blocks the solver creates, so the test can check they are gone afterwards
+
+    def __init__(self, name=None, create=False, size=0):
+        super().__init__(name, create, size)
+        if create:
+            created.append(self.name)
+
+
+def failing_worker(shared_name: str, table_size: int, moves: str, worker_id: int, results: Queue) -> None:
+    if worker_id == 0:
+        raise RuntimeError('worker 0 fails')
+    search_worker(shared_name, table_size, moves, worker_id, results)
+
+
+def always_failing_worker(shared_name: str, table_size: int, moves: str, worker_id: int, results: Queue) -> None:
+    raise RuntimeError(f'worker {worker_id} fails')
+
+
+def endless_worker(shared_name: str, table_size: int, moves: str, worker_id: int, results: Queue) -> None:
+    # the workers besides the first one search the empty board, which they do not finish before being stopped
+    search_worker(shared_name, table_size, moves if worker_id == 0 else '', worker_id, results)
+
+
+class TestParallelSolve(unittest.TestCase):
+
+    def setUp(self):
+        created.clear()
+        patcher = mock.patch.object(parallel_search, 'SharedMemory', RecordedSharedMemory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.expected = AlphaBetaAnalyzer(GameState.from_moves(MOVES), table_size=10007).solve()[0]
+
+    def assert_unlinked(self):
+        self.assertEqual(len(created), 1)
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(name=created[0])
+
+    def assert_solved(self, result: SolveResult):
+        self.assertEqual(result.score, self.expected)
+        # the column must achieve the score
+        child = AlphaBetaAnalyzer(GameState.from_moves(MOVES + str(result.column)), table_size=10007)
+        self.assertEqual(-child.solve()[0], self.expected)
+
+    def test_matches_single_process(self):
+        result, elapsed = parallel_solve(MOVES, workers=2, table_size=10007)
+        self.assert_solved(result)
+        self.assertGreater(elapsed, 0)
+        self.assert_unlinked()
+
+    def test_worker_fails(self):
+        with mock.patch.object(parallel_search, 'search_worker', failing_worker):
+            result, _ = parallel_solve(MOVES, workers=2, table_size=10007)
+        self.assert_solved(result)
+        self.assert_unlinked()
+
+    def test_every_worker_fails(self):
+        with mock.patch.object(parallel_search, 'search_worker', always_failing_worker):
+            with self.assertRaises(RuntimeError):
+                parallel_solve(MOVES, workers=2, table_size=10007)
+        self.assert_unlinked()
+
+    def test_inherited_sigterm_handler(self):
+        # pygame catches SIGTERM in the game process, the workers forked from it must still stop when terminated
+        previous = signal.signal(signal.SIGTERM, lambda *_: None)
+        try:
+            start = time.perf_counter()
+            with mock.patch.object(parallel_search, 'search_worker', endless_worker):
+                result, _ = parallel_solve(MOVES, workers=3, table_size=10007)
+            # well before the fallback that kills a worker which ignores the signal
+            self.assertLess(time.perf_counter() - start, 4)
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+        self.assert_solved(result)
+        self.assert_unlinked()
+
+    def test_illegal_moves(self):
+        with self.assertRaises(ValueError):
+            parallel_solve('0000000', workers=2, table_size=10007)
+        self.assertEqual(created, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,274 @@
+# This script counts and enumerates the positions reachable in a number of moves, to check the move generation and
+# to feed opening books and training sets
+import sys
+import json
+import time
+import argparse
+from array import array
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from helper_classes import Position, COLUMN_MASKS, BOARD_MASK, TOP_ROW_MASK, alignment, playable_cells
+from game_records import HEADER, MAGIC, POSITIONS, KEY
+from position_codec import np, from_keys, to_keys, mirror_batch, alignment_batch, write_position_keys
+
+
+class KeySet:
+    """A set of position keys in one flat array of 64-bit slots with linear probing. A key takes 8 bytes instead
+    of the 70 or so a Python set spends on an int, so millions of positions fit. Keys are never 0, every column
+    of a key has its marker bit, so 0 marks an empty slot."""
+    slots: array
+    count: int
+
+    def __init__(self, capacity: int = 1 << 16):
+        """
+        Args:
+            capacity (int, optional): the number of slots to start with, rounded up to a power of two. The set
+                                      doubles whenever it gets half full
+        """
+        size: int = 1
+        while size < capacity:
+            size <<= 1
+        self.slots = array('Q', bytes(8 * size))
+        self.count = 0
+
+    def add(self, key: int) -> bool:
+        """This function adds a key
+
+        Args:
+            key (int): the key, see Position.key
+
+        Returns:
+            bool: whether the key was new
+        """
+        slots: array = self.slots
+        last: int = len(slots) - 1
+        # Fibonacci hashing spreads keys that differ only in a few high bits
+        index: int = ((key * 0x9E3779B97F4A7C15) >> 20) & last
+        while slots[index]:
+            if slots[index] == key:
+                return False
+            index = (index + 1) & last
+        slots[index] = key
+        self.count += 1
+        if 2 * self.count > len(slots):
+            self.grow()
+
+        return True
+
+    def __contains__(self, key: int) -> bool:
+        slots: array = self.slots
+        last: int = len(slots) - 1
+        index: int = ((key * 0x9E3779B97F4A7C15) >> 20) & last
+        while slots[index]:
+            if slots[index] == key:
+                return True
+            index = (index + 1) & last
+
+        return False
+
+    def grow(self) -> None:
+        """This function doubles the number of slots and puts every key back"""
+        old: array = self.slots
+        self.slots = array('Q', bytes(16 * len(old)))
+        self.count = 0
+        for key in old:
+            if key:
+                self.add(key)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        return 8 * len(self.slots)
+
+
+def count_paths(depth: int, position: Optional[Position] = None) -> List[int]:
+    """This function counts the move sequences of every length up to depth, the perft of chess programs. Every
+    transposition is counted again and a won game is not played on. The last ply is counted from the playable
+    cells without being played
+
+    Args:
+        depth (int): the number of moves to look ahead
+        position (Position, optional): the position to start from, the empty board by default
+
+    Returns:
+        List[int]: the number of sequences of each length, starting with 1 for the position itself
+    """
+    position = Position() if position is None else position
+    depth = min(depth, 42 - position.moves)
+    counts: List[int] = [0] * (depth + 1)
+
+    def walk(ply: int) -> None:
+        counts[ply] += 1
+        # the player who just moved won, the game ends here
+        if ply == depth or alignment(position.current ^ position.mask):
+            return
+        if ply == depth - 1:
+            counts[depth] += bin(playable_cells(position.mask)).count('1')
+            return
+        for column in range(7):
+            if position.can_play(column):
+                position.play(column)
+                walk(ply + 1)
+                position.undo(column)
+
+    walk(0)
+    return counts
+
+
+def count_unique(depth: int, position: Optional[Position] = None, fp: Optional[BinaryIO] = None) -> List[int]:
+    """This function counts the distinct positions of every ply up to depth, visiting each one once. A position
+    reached again through another move order is recognized by its key and its subtree is not searched again
+
+    Args:
+        depth (int): the number of moves to look ahead
+        position (Position, optional): the position to start from, the empty board by default
+        fp (BinaryIO, optional): a position file opened for binary writing, every new position is appended to it
+                                 as soon as it is found, see game_records
+
+    Returns:
+        List[int]: the number of distinct positions of each ply, starting with 1 for the position itself
+    """
+    position = Position() if position is None else position
+    depth = min(depth, 42 - position.moves)
+    counts: List[int] = [0] * (depth + 1)
+    # the number of tokens is part of the key, so one set serves every ply
+    seen = KeySet()
+    if fp is not None:
+        fp.write(HEADER.pack(MAGIC, POSITIONS))
+
+    def walk(ply: int) -> None:
+        if not seen.add(position.key()):
+            return
+        counts[ply] += 1
+        if fp is not None:
+            fp.write(KEY.pack(position.key()))
+        if ply == depth or alignment(position.current ^ position.mask):
+            return
+        for column in range(7):
+            if position.can_play(column):
+                position.play(column)
+                walk(ply + 1)
+                position.undo(column)
+
+    walk(0)
+    return counts
+
+
+def expand_layer(keys: 'np.ndarray', canonical: bool = False, chunk_size: int = 1 << 20) -> 'np.ndarray':
+    """This function finds every position one move on from a whole ply of positions at once. The ply is expanded
+    a chunk at a time and every chunk's children are deduplicated before they are merged, which keeps the
+    temporary arrays to a few times the size of the result
+
+    Args:
+        keys (np.ndarray): the uint64 keys of the positions, see Position.key
+        canonical (bool, optional): keep only the smaller of the keys of a position and its mirror image
+        chunk_size (int, optional): the number of positions expanded together
+
+    Returns:
+        np.ndarray: the sorted keys of the distinct positions that follow, none for games that are over
+    """
+    board, top_row = np.uint64(BOARD_MASK), np.uint64(TOP_ROW_MASK)
+    merged: List['np.ndarray'] = []
+    for start in range(0, len(keys), chunk_size):
+        mask, current, _ = from_keys(keys[start:start + chunk_size])
+        going = ~alignment_batch(current ^ mask)
+        mask, current = mask[going], current[going]
+        playable = (((~mask & board) + top_row) >> np.uint64(1)) & board
+        children: List['np.ndarray'] = []
+        for column_mask in COLUMN_MASKS:
+            move = playable & np.uint64(column_mask)
+            legal = move != 0
+            # the opponent becomes the player to move, as in Position.play
+            children.append(to_keys(mask[legal] | move[legal], current[legal] ^ mask[legal]))
+        child_keys = np.concatenate(children)
+        if canonical:
+            child_keys = np.minimum(child_keys, mirror_batch(child_keys))
+        merged.append(np.unique(child_keys))
+
+    if len(merged) == 1:
+        return merged[0]
+
+    return np.unique(np.concatenate(merged)) if merged else np.zeros(0, dtype=np.uint64)
+
+
+def enumerate_layers(depth: int, position: Optional[Position] = None,
+                     canonical: bool = False) -> Iterator[Tuple[int, 'np.ndarray']]:
+    """This function generates the distinct positions one ply at a time, every ply as one sorted array of keys.
+    Only the ply being expanded is kept in memory, so it reaches far deeper than count_unique
+
+    Args:
+        depth (int): the number of moves to look ahead
+        position (Position, optional): the position to start from, the empty board by default
+        canonical (bool, optional): count a position and its mirror image once, as the opening book stores them
+
+    Yields:
+        ply, keys (Tuple[int, np.ndarray]): the number of moves from the start and the keys of that ply
+    """
+    if np is None:
+        raise ImportError('enumerate_layers needs numpy')
+    position = Position() if position is None else position
+    depth = min(depth, 42 - position.moves)
+    keys = np.array([position.canonical_key()[0] if canonical else position.key()], dtype=np.uint64)
+    yield 0, keys
+    for ply in range(1, depth + 1):
+        keys = expand_layer(keys, canonical)
+        yield ply, keys
+
+
+def timed(counter: Callable[..., List[int]], *args) -> Tuple[List[int], float]:
+    start: float = time.perf_counter()
+    counts: List[int] = counter(*args)
+    return counts, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Count the positions reachable from the empty board')
+    parser.add_argument('depth', type=int, help='the number of moves to look ahead')
+    parser.add_argument('--mode', choices=('paths', 'unique', 'layers'), default='layers',
+                        help='paths counts every move order, unique visits every distinct position once, layers '
+                             'does the same a whole ply at a time with numpy')
+    parser.add_argument('--canonical', action='store_true',
+                        help='with layers, count a position and its mirror image once')
+    parser.add_argument('--output', default=None,
+                        help='with unique or layers, stream the distinct positions to this position file')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    fp: Optional[BinaryIO] = None if args.output is None else open(args.output, 'wb')
+    report: Dict = {'mode': args.mode, 'depth': args.depth, 'plies': []}
+    try:
+        if args.mode == 'layers':
+            start: float = time.perf_counter()
+            for ply, keys in enumerate_layers(args.depth, canonical=args.canonical):
+                seconds: float = time.perf_counter() - start
+                if fp is not None:
+                    write_position_keys(fp, keys, header=ply == 0)
+                report['plies'].append({'ply': ply, 'positions': len(keys), 'seconds': seconds,
+                                        'positions_per_second': len(keys) / seconds if seconds else 0.0})
+                start = time.perf_counter()
+        else:
+            if args.mode == 'paths':
+                counts, seconds = timed(count_paths, args.depth)
+            else:
+                counts, seconds = timed(count_unique, args.depth, None, fp)
+            report['plies'] = [{'ply': ply, 'positions': count} for ply, count in enumerate(counts)]
+            report['seconds'] = seconds
+            report['positions_per_second'] = sum(counts) / seconds if seconds else 0.0
+    finally:
+        if fp is not None:
+            fp.close()
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return
+    for ply in report['plies']:
+        rate: str = f"{ply['positions_per_second']:>14,.0f}/s" if 'positions_per_second' in ply else ''
+        print(f"ply {ply['ply']:>2}: {ply['positions']:>14,} {rate}")
+    if 'seconds' in report:
+        print(f"{report['seconds']:.2f} s, {report['positions_per_second']:,.0f} positions/s")
+
+
+if __name__ == '__main__':
+    main()
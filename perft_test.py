@@ -0,0 +1,70 @@
+# This is the unittest script for the position counts and the enumeration of positions
+
+import io
+import random
+import unittest
+from perft import *
+from helper_classes import GameState
+from game_records import read_records
+
+# the number of move orders and of distinct positions after every number of moves from the empty board
+PATHS: List[int] = [1, 7, 49, 343, 2401, 16807, 117649, 823536]
+UNIQUE: List[int] = [1, 7, 49, 238, 1120, 4263, 16422, 54859]
+
+
+class TestPerft(unittest.TestCase):
+
+    def test_key_set(self):
+        keys = random.Random(4).sample(range(1, 1 << 49), 5000)
+        seen = KeySet(16)
+        self.assertTrue(all(seen.add(key) for key in keys))
+        self.assertFalse(any(seen.add(key) for key in keys))
+        self.assertEqual(len(seen), 5000)
+        self.assertGreaterEqual(seen.nbytes, 2 * 8 * 5000)
+        self.assertIn(keys[1234], seen)
+        self.assertNotIn(keys[0] + 1 if keys[0] + 1 not in keys else keys[0] + 2, seen)
+
+    def test_count_paths(self):
+        self.assertEqual(count_paths(7), PATHS)
+        # a full column cannot take a token and a won game is not played on
+        self.assertEqual(count_paths(1, Position.from_game_state(GameState.from_moves('000000'))), [1, 6])
+        self.assertEqual(count_paths(3, Position.from_game_state(GameState.from_moves('0101010'))), [1, 0, 0, 0])
+
+    def test_count_unique(self):
+        fp = io.BytesIO()
+        self.assertEqual(count_unique(7, fp=fp), UNIQUE)
+        fp.seek(0)
+        positions = list(read_records(fp))
+        self.assertEqual(len(positions), sum(UNIQUE))
+        self.assertEqual(len({position.key() for position in positions}), sum(UNIQUE))
+
+    @unittest.skipUnless(np is not None, 'numpy is not installed')
+    def test_layers(self):
+        fp = io.BytesIO()
+        count_unique(7, fp=fp)
+        fp.seek(0)
+        by_ply: Dict[int, set] = {}
+        for position in read_records(fp):
+            by_ply.setdefault(position.moves, set()).add(position.key())
+        for ply, keys in enumerate_layers(7):
+            self.assertEqual(len(keys), UNIQUE[ply])
+            self.assertEqual(set(keys.tolist()), by_ply[ply])
+        # small chunks give the same layer
+        self.assertEqual(expand_layer(keys, chunk_size=1000).tolist(), expand_layer(keys).tolist())
+
+    @unittest.skipUnless(np is not None, 'numpy is not installed')
+    def test_canonical_layers(self):
+        layers = dict(enumerate_layers(6))
+        for ply, keys in enumerate_layers(6, canonical=True):
+            expected = {Position.from_key(key).canonical_key()[0] for key in layers[ply].tolist()}
+            self.assertEqual(set(keys.tolist()), expected)
+
+    @unittest.skipUnless(np is not None, 'numpy is not installed')
+    def test_from_position(self):
+        position = Position.from_game_state(GameState.from_moves('3333'))
+        layers = [len(keys) for _, keys in enumerate_layers(3, position)]
+        self.assertEqual(layers, count_unique(3, Position.from_game_state(GameState.from_moves('3333'))))
+
+
+if __name__ == '__main__':
+    unittest.main()
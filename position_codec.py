@@ -0,0 +1,335 @@
+# This script encodes and decodes whole arrays of positions at once with numpy, for data pipelines
+from typing import BinaryIO, Dict, List, NamedTuple, Sequence, Tuple
+from helper_classes import Position, WIDTH, HEIGHT, TOP_ROW_MASK, BOARD_MASK, COLUMN_MASKS, COLUMN_BITS
+from evaluation import popcount
+from game_records import HEADER, MAGIC, POSITIONS, KEY, read_kind
+
+try:
+    import numpy as np
+except ImportError:  # the engine does not need the codec, only the pipelines do
+    np = None
+
+# what can be wrong with a move string or a position. The codes index ERRORS and 0 means nothing is
+OK: int = 0
+BAD_CHARACTER: int = 1
+TOO_LONG: int = 2
+FULL_COLUMN: int = 3
+MOVE_AFTER_WIN: int = 4
+OFF_BOARD: int = 5
+FLOATING_TOKEN: int = 6
+TOKEN_COUNT: int = 7
+WIN_OUT_OF_TURN: int = 8
+ERRORS: Tuple[str, ...] = ('', 'not a column number', 'more than 42 moves', 'move into a full column',
+                           'move after the game was won', 'token off the board', 'token above an empty cell',
+                           'wrong number of tokens for the player to move', 'player to move already has four')
+
+
+class EncodedPositions(NamedTuple):
+    mask: 'np.ndarray'  # uint64, every token
+    current: 'np.ndarray'  # uint64, the tokens of the player to move
+    moves: 'np.ndarray'  # int64, the number of tokens
+    errors: 'np.ndarray'  # uint8, OK or why the move string is not a game
+
+
+def _require_numpy(name: str) -> None:
+    if np is None:
+        raise ImportError(f'{name} needs numpy')
+
+
+def _uint64(values) -> 'np.ndarray':
+    return np.ascontiguousarray(values, dtype=np.uint64).ravel()
+
+
+def alignment_batch(internal: 'np.ndarray') -> 'np.ndarray':
+    """This function checks many bitboards for four in a row at once, see helper_classes.alignment
+
+    Args:
+        internal (np.ndarray): uint64 bitboards
+
+    Returns:
+        np.ndarray: one bool per bitboard
+    """
+    aligned = np.zeros(internal.shape, dtype=bool)
+    for shift in (1, 7, 6, 8):
+        pairs = internal & (internal >> np.uint64(shift))
+        aligned |= (pairs & (pairs >> np.uint64(2 * shift))) != 0
+
+    return aligned
+
+
+def winning_squares_batch(internal: 'np.ndarray', mask: 'np.ndarray') -> 'np.ndarray':
+    """This function finds the empty cells that complete a line of four for many bitboards at once, see
+    helper_classes.winning_squares. Bits shifted past the top of a uint64 are lost, which only ever drops cells
+    off the board anyway
+
+    Args:
+        internal (np.ndarray): uint64 bitboards of the player to find the cells for
+        mask (np.ndarray): uint64 bitboards of every token
+
+    Returns:
+        np.ndarray: uint64 bitboards with the winning cells lit up
+    """
+    def shifted(distance: int) -> 'np.ndarray':
+        return internal << np.uint64(distance) if distance > 0 else internal >> np.uint64(-distance)
+
+    squares = shifted(-1) & shifted(-2) & shifted(-3)
+    for step in (7, 6, 8):
+        pair = shifted(step) & shifted(2 * step)
+        squares |= pair & shifted(3 * step)
+        squares |= pair & shifted(-step)
+        pair = shifted(-step) & shifted(-2 * step)
+        squares |= pair & shifted(step)
+        squares |= pair & shifted(-3 * step)
+
+    return squares & (np.uint64(BOARD_MASK) ^ mask)
+
+
+def encode_moves(move_strings: Sequence[str]) -> EncodedPositions:
+    """This function replays many move strings at once. The strings are unpacked into one array of columns and
+    every ply is played for all games together, so nothing is built per move or per game
+
+    Args:
+        move_strings (Sequence[str]): the column numbers played from the empty board, one string per game
+
+    Returns:
+        EncodedPositions: the positions reached, with the number of tokens and an error code per string. A string
+                          with an error keeps the position from before the move that was wrong, or the empty board
+                          for BAD_CHARACTER and TOO_LONG
+    """
+    _require_numpy('encode_moves')
+    count: int = len(move_strings)
+    lengths = np.fromiter((len(moves) for moves in move_strings), dtype=np.int64, count=count)
+    # one byte per character, anything that is not ascii becomes a '?' and so stays one character
+    codes = np.frombuffer(''.join(move_strings).encode('ascii', 'replace'), dtype=np.uint8).astype(np.int64) - 48
+    rows = np.repeat(np.arange(count), lengths)
+    plies = np.arange(len(codes)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    # the games are sorted longest first, so the ones still going at any ply are a prefix of the arrays and every
+    # step works on contiguous slices. The columns are stored ply by ply for the same reason
+    order = np.argsort(-lengths, kind='stable')
+    rank = np.empty(count, dtype=np.int64)
+    rank[order] = np.arange(count)
+    errors = np.zeros(count, dtype=np.uint8)
+    errors[lengths[order] > WIDTH * HEIGHT] = TOO_LONG
+    errors[rank[rows[(codes < 0) | (codes >= WIDTH)]]] = BAD_CHARACTER
+    columns = np.zeros((WIDTH * HEIGHT, count), dtype=np.int64)
+    kept = plies < WIDTH * HEIGHT
+    columns[plies[kept], rank[rows[kept]]] = np.clip(codes[kept], 0, WIDTH - 1)
+
+    column_masks = np.array(COLUMN_MASKS, dtype=np.uint64)
+    board, top_row = np.uint64(BOARD_MASK), np.uint64(TOP_ROW_MASK)
+    mask = np.zeros(count, dtype=np.uint64)
+    current = np.zeros(count, dtype=np.uint64)
+    won = np.zeros(count, dtype=bool)
+    playing = np.searchsorted(-lengths[order], -np.arange(WIDTH * HEIGHT), side='left')
+    for ply in range(WIDTH * HEIGHT):
+        games: int = int(playing[ply])
+        if not games:
+            break
+        m, c, e, w = mask[:games], current[:games], errors[:games], won[:games]
+        # the cell the token lands in, see playable_cells, or nothing if the column is full
+        move = (((~m & board) + top_row) >> np.uint64(1)) & column_masks[columns[ply, :games]]
+        fine = e == OK
+        e[fine & w] = MOVE_AFTER_WIN
+        e[fine & ~w & (move == 0)] = FULL_COLUMN
+        play = e == OK
+        # all ones for the games that play this ply, so the update needs no branches
+        keep = -play.astype(np.uint64)
+        c ^= m & keep
+        m |= move & keep
+        if ply >= 6:  # nobody has four tokens before the seventh move
+            w |= play & alignment_batch(c ^ m)
+
+    return EncodedPositions(mask[rank], current[rank], popcount(mask)[rank], errors[rank])
+
+
+def check_positions(mask, current) -> 'np.ndarray':
+    """This function checks that positions could come up in a game: every token sits on the board, on top of
+    another one or on the bottom, the player to move has as many tokens as the other player or one fewer, and the
+    player to move does not already have four in a row. It does not check that the game was not won earlier
+
+    Args:
+        mask (np.ndarray): uint64 bitboards of every token
+        current (np.ndarray): uint64 bitboards of the tokens of the player to move
+
+    Returns:
+        np.ndarray: an error code per position, OK for those that pass
+    """
+    _require_numpy('check_positions')
+    mask, current = _uint64(mask), _uint64(current)
+    errors = np.zeros(len(mask), dtype=np.uint8)
+    # checked from the last to the first, so the first problem found is the one reported
+    errors[alignment_batch(current)] = WIN_OUT_OF_TURN
+    errors[popcount(current) != popcount(mask) // 2] = TOKEN_COUNT
+    for column in range(WIDTH):
+        # the empty cells of a column are a run of low bits, one less than a power of two
+        empty = ~(mask >> np.uint64(7 * column)) & np.uint64(0b111111)
+        errors[(empty & (empty + np.uint64(1))) != 0] = FLOATING_TOKEN
+    errors[((mask & ~np.uint64(BOARD_MASK)) != 0) | ((current & ~mask) != 0)] = OFF_BOARD
+
+    return errors
+
+
+def to_keys(mask, current) -> 'np.ndarray':
+    """This function computes the keys of many positions at once, see Position.key
+
+    Args:
+        mask (np.ndarray): uint64 bitboards of every token
+        current (np.ndarray): uint64 bitboards of the tokens of the player to move
+
+    Returns:
+        np.ndarray: the uint64 keys
+    """
+    _require_numpy('to_keys')
+    mask, current = _uint64(mask), _uint64(current)
+    return (current << np.uint64(1)) | ((~mask & np.uint64(BOARD_MASK)) + np.uint64(TOP_ROW_MASK))
+
+
+def from_keys(keys) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+    """This function rebuilds many positions from their keys at once, see Position.from_key
+
+    Args:
+        keys (np.ndarray): the uint64 keys
+
+    Returns:
+        mask, current, moves (Tuple[np.ndarray, np.ndarray, np.ndarray]): the positions and their numbers of tokens
+    """
+    _require_numpy('from_keys')
+    keys = _uint64(keys)
+    mask = np.zeros(len(keys), dtype=np.uint64)
+    current = np.zeros(len(keys), dtype=np.uint64)
+    for column in range(WIDTH):
+        shift = np.uint64(7 * column)
+        bits = (keys >> shift) & np.uint64(0b1111111)
+        marker = bits & (~bits + np.uint64(1))  # the lowest set bit sits right above the top token
+        mask |= ((np.uint64(0b1000000) - marker) & np.uint64(0b111111)) << shift
+        current |= ((bits ^ marker) >> np.uint64(1)) << shift
+
+    return mask, current, popcount(mask)
+
+
+def mirror_batch(bits) -> 'np.ndarray':
+    """This function reflects many boards or keys left to right at once, see helper_classes.mirror_columns"""
+    bits = _uint64(bits)
+    mirrored = bits & np.uint64(COLUMN_BITS[3])
+    for column in range(3):
+        distance = np.uint64(7 * (6 - 2 * column))
+        mirrored |= (bits & np.uint64(COLUMN_BITS[column])) << distance
+        mirrored |= (bits & np.uint64(COLUMN_BITS[6 - column])) >> distance
+
+    return mirrored
+
+
+def features(mask, current) -> Dict[str, 'np.ndarray']:
+    """This function derives what the pipelines filter and group positions by, for many positions at once
+
+    Args:
+        mask (np.ndarray): uint64 bitboards of every token
+        current (np.ndarray): uint64 bitboards of the tokens of the player to move
+
+    Returns:
+        Dict[str, np.ndarray]: per position
+            moves: the number of tokens
+            to_move: 1 or 2, the player whose turn it is
+            won: whether the player who just moved has four in a row
+            can_win: whether the player to move can win with their next token
+            key, canonical_key: the key of the position and the key it shares with its mirror image
+            mirrored: whether canonical_key is the key of the mirror image, see Position.canonical_key
+    """
+    _require_numpy('features')
+    mask, current = _uint64(mask), _uint64(current)
+    moves = popcount(mask)
+    playable = (((~mask & np.uint64(BOARD_MASK)) + np.uint64(TOP_ROW_MASK)) >> np.uint64(1)) & np.uint64(BOARD_MASK)
+    keys = to_keys(mask, current)
+    mirrored_keys = mirror_batch(keys)
+
+    return {
+        'moves': moves,
+        'to_move': 1 + moves % 2,
+        'won': alignment_batch(current ^ mask),
+        'can_win': (winning_squares_batch(current, mask) & playable) != 0,
+        'key': keys,
+        'canonical_key': np.minimum(keys, mirrored_keys),
+        'mirrored': mirrored_keys < keys,
+    }
+
+
+def to_grids(mask, current) -> 'np.ndarray':
+    """This function lays many positions out as boards of player numbers, e.g. as input for a model
+
+    Args:
+        mask (np.ndarray): uint64 bitboards of every token
+        current (np.ndarray): uint64 bitboards of the tokens of the player to move
+
+    Returns:
+        np.ndarray: int8 boards of shape (positions, 6, 7), row 0 at the top, holding 0 for an empty cell and the
+                    number of the player the token belongs to otherwise
+    """
+    _require_numpy('to_grids')
+    mask, current = _uint64(mask), _uint64(current)
+    # bit 7 * column + row for every cell in row major order
+    cells = (7 * np.arange(WIDTH)[None, :] + np.arange(HEIGHT)[:, None]).ravel().astype(np.uint64)
+    occupied = ((mask[:, None] >> cells) & np.uint64(1)).astype(np.int8)
+    own = ((current[:, None] >> cells) & np.uint64(1)).astype(np.int8)
+    to_move = (1 + popcount(mask) % 2).astype(np.int8)[:, None]
+    grids = occupied * np.where(own == 1, to_move, 3 - to_move)
+
+    return grids.reshape(-1, HEIGHT, WIDTH)
+
+
+def to_positions(mask, current) -> List[Position]:
+    """This function unpacks arrays of positions into Position objects, e.g. to search the few that are needed
+
+    Args:
+        mask (np.ndarray): uint64 bitboards of every token
+        current (np.ndarray): uint64 bitboards of the tokens of the player to move
+
+    Returns:
+        List[Position]: one Position per element
+    """
+    _require_numpy('to_positions')
+    positions: List[Position] = []
+    for position_mask, position_current, moves in zip(_uint64(mask).tolist(), _uint64(current).tolist(),
+                                                      popcount(_uint64(mask)).tolist()):
+        position = Position()
+        position.mask, position.current, position.moves = position_mask, position_current, moves
+        positions.append(position)
+
+    return positions
+
+
+def read_position_keys(fp: BinaryIO) -> 'np.ndarray':
+    """This function reads every key of a position file in one go, see game_records
+
+    Args:
+        fp (BinaryIO): the position file opened for binary reading, at its start
+
+    Returns:
+        np.ndarray: the uint64 keys, decode them with from_keys
+    """
+    _require_numpy('read_position_keys')
+    if read_kind(fp) != POSITIONS:
+        raise ValueError('not a position file')
+    data: bytes = fp.read()
+
+    return np.frombuffer(data, dtype='<u8', count=len(data) // KEY.size).astype(np.uint64)
+
+
+def write_position_keys(fp: BinaryIO, keys, header: bool = True) -> int:
+    """This function writes keys to a position file in one go, see game_records
+
+    Args:
+        fp (BinaryIO): the file opened for binary writing
+        keys (np.ndarray): the uint64 keys, e.g. from to_keys
+        header (bool, optional): start the file with its header, False to append to a position file
+
+    Returns:
+        int: the number of positions written
+    """
+    _require_numpy('write_position_keys')
+    keys = _uint64(keys)
+    if header:
+        fp.write(HEADER.pack(MAGIC, POSITIONS))
+    fp.write(keys.astype('<u8').tobytes())
+
+    return len(keys)
@@ -0,0 +1,111 @@
+# This is the unittest script for the bulk position codec
+
+import io
+import random
+import unittest
+from position_codec import *
+from helper_classes import GameState, alignment
+from game_records import read_records
+
+
+def random_games(count: int, seed: int = 0) -> List[str]:
+    # games of random length, ending early when a move wins
+    generator = random.Random(seed)
+    games: List[str] = []
+    for _ in range(count):
+        position = Position()
+        moves: str = ''
+        for _ in range(generator.randint(0, 42)):
+            column: int = generator.choice([column for column in range(7) if position.can_play(column)])
+            moves += str(column)
+            won: bool = position.is_winning_move(column)
+            position.play(column)
+            if won:
+                break
+        games.append(moves)
+
+    return games
+
+
+@unittest.skipUnless(np is not None, 'numpy is not installed')
+class TestPositionCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.games = random_games(300)
+        self.encoded = encode_moves(self.games)
+
+    def test_encode_matches_game_state(self):
+        self.assertFalse(self.encoded.errors.any())
+        for index, moves in enumerate(self.games):
+            position = Position.from_game_state(GameState.from_moves(moves))
+            self.assertEqual((int(self.encoded.mask[index]), int(self.encoded.current[index]),
+                              int(self.encoded.moves[index])), (position.mask, position.current, position.moves))
+
+    def test_encode_errors(self):
+        strings = ['0000000', '0101010', '01010103', '3a', '3' * 43, '33', '']
+        encoded = encode_moves(strings)
+        self.assertEqual(encoded.errors.tolist(), [FULL_COLUMN, OK, MOVE_AFTER_WIN, BAD_CHARACTER, TOO_LONG, OK, OK])
+        # a wrong move leaves the position from before it
+        self.assertEqual(int(encoded.mask[0]), Position.from_game_state(GameState.from_moves('000000')).mask)
+        self.assertEqual(encoded.moves.tolist()[-2:], [2, 0])
+
+    def test_keys_round_trip(self):
+        keys = to_keys(self.encoded.mask, self.encoded.current)
+        for index, moves in enumerate(self.games[:50]):
+            self.assertEqual(int(keys[index]), Position.from_game_state(GameState.from_moves(moves)).key())
+        mask, current, moves = from_keys(keys)
+        self.assertTrue((mask == self.encoded.mask).all())
+        self.assertTrue((current == self.encoded.current).all())
+        self.assertTrue((moves == self.encoded.moves).all())
+
+    def test_features(self):
+        derived = features(self.encoded.mask, self.encoded.current)
+        for index, position in enumerate(to_positions(self.encoded.mask, self.encoded.current)):
+            self.assertEqual(int(derived['moves'][index]), position.moves)
+            self.assertEqual(int(derived['to_move'][index]), 1 + position.moves % 2)
+            self.assertEqual(bool(derived['won'][index]), alignment(position.current ^ position.mask))
+            self.assertEqual(bool(derived['can_win'][index]), bool(position.winning_moves()))
+            self.assertEqual((int(derived['canonical_key'][index]), bool(derived['mirrored'][index])),
+                             position.canonical_key())
+
+    def test_check_positions(self):
+        self.assertFalse(check_positions(self.encoded.mask, self.encoded.current).any())
+        bottom = 1 << 5  # row 5 of column 0
+        positions = [
+            (1 << 4, 0),  # a token in row 4 with nothing below it
+            (bottom, bottom),  # player 2 to move but holding the only token
+            (1 << 63, 0),  # a bit outside the board
+            (bottom, 1 << 12),  # a token of the player to move that is not in the mask
+        ]
+        # player 1 to move with four in a row, which player 2 should never have let them keep playing after
+        four = Position.from_game_state(GameState.from_moves('01010102'))
+        positions.append((four.mask, four.current))
+        errors = check_positions([mask for mask, _ in positions], [current for _, current in positions])
+        self.assertEqual(errors.tolist(), [FLOATING_TOKEN, TOKEN_COUNT, OFF_BOARD, OFF_BOARD, WIN_OUT_OF_TURN])
+
+    def test_grids(self):
+        grids = to_grids(self.encoded.mask, self.encoded.current)
+        self.assertEqual(grids.shape, (len(self.games), 6, 7))
+        for index, moves in enumerate(self.games[:50]):
+            bboard_1, bboard_2 = GameState.from_moves(moves).bitboards
+            for row in range(6):
+                for column in range(7):
+                    bit = 1 << (7 * column + row)
+                    expected = 1 if bboard_1.internal & bit else 2 if bboard_2.internal & bit else 0
+                    self.assertEqual(grids[index, row, column], expected)
+
+    def test_position_files(self):
+        with open('game_states.c4r', 'rb') as fp:
+            keys = read_position_keys(fp)
+            fp.seek(0)
+            expected = [position.key() for position in read_records(fp)]
+        self.assertEqual(keys.tolist(), expected)
+        fp = io.BytesIO()
+        self.assertEqual(write_position_keys(fp, keys), len(keys))
+        self.assertEqual(write_position_keys(fp, keys[:3], header=False), 3)
+        fp.seek(0)
+        self.assertEqual([position.key() for position in read_records(fp)], expected + expected[:3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# This script collects statistics about a search and logs a sample of its nodes to a binary file
+import struct
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional
+
+# one logged node: mask, current, tokens dropped, depth left, alpha, beta
+NODE_RECORD = struct.Struct('<QQBBii')
+
+
+class NodeRecord(NamedTuple):
+    mask: int
+    current: int
+    moves: int
+    depth: int
+    alpha: int
+    beta: int
+
+
+class SearchStats:
+    """Counters an AlphaBetaAnalyzer fills in while it searches. The analyzer only touches them when it was given a
+    SearchStats, so a search without one pays nothing for the instrumentation. The counters are reset at the start
+    of every search, so they always describe the last one."""
+    nodes: int
+    cutoffs: List[int]
+    tt_probes: int
+    tt_hits: int
+    tt_stores: int
+    nodes_by_ply: List[int]
+    sample_every: int
+    log: Optional[BinaryIO]
+    logged: int
+
+    def __init__(self, log: Optional[BinaryIO] = None, sample_every: int = 1024):
+        """
+        Args:
+            log (BinaryIO, optional): a file opened for binary writing to append sampled nodes to
+            sample_every (int, optional): log one node out of this many
+        """
+        self.log = log
+        self.sample_every = sample_every
+        self.logged = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """This function zeroes every counter, the node log keeps its records"""
+        self.nodes = 0
+        self.cutoffs = [0] * 7
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_stores = 0
+        self.nodes_by_ply = [0] * 43
+
+    def node(self, mask: int, current: int, moves: int, depth: int, alpha: int, beta: int) -> None:
+        """This function counts a node and logs it if its turn in the sample has come
+
+        Args:
+            mask (int): the tokens on the board
+            current (int): the tokens of the player to move
+            moves (int): the number of tokens dropped
+            depth (int): the number of moves the search still looks ahead
+            alpha (int): the lower end of the window
+            beta (int): the upper end of the window
+        """
+        self.nodes += 1
+        self.nodes_by_ply[moves] += 1
+        if self.log is not None and not self.nodes % self.sample_every:
+            self.log.write(NODE_RECORD.pack(mask, current, moves, min(depth, 255), alpha, beta))
+            self.logged += 1
+
+    def cutoff(self, index: int) -> None:
+        """This function counts a beta cutoff by the position of the move that caused it in the move ordering
+
+        Args:
+            index (int): 0 if the first move searched caused the cutoff, 1 for the second and so on
+        """
+        self.cutoffs[index] += 1
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        """The share of cutoffs caused by the first move searched, the higher the better the move ordering"""
+        total: int = sum(self.cutoffs)
+        return self.cutoffs[0] / total if total else 0.0
+
+    @property
+    def tt_hit_rate(self) -> float:
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    def as_dict(self) -> Dict:
+        """This function gathers the counters for a report, e.g. as JSON
+
+        Returns:
+            Dict: the counters and the rates derived from them
+        """
+        return {
+            'nodes': self.nodes,
+            'cutoffs': list(self.cutoffs),
+            'first_move_cutoff_rate': self.first_move_cutoff_rate,
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'tt_hit_rate': self.tt_hit_rate,
+            'tt_stores': self.tt_stores,
+            'nodes_by_ply': {ply: count for ply, count in enumerate(self.nodes_by_ply) if count},
+        }
+
+
+def read_node_log(fp: BinaryIO) -> Iterator[NodeRecord]:
+    """This function streams the records of a node log back, one at a time
+
+    Args:
+        fp (BinaryIO): the log opened for binary reading
+
+    Yields:
+        NodeRecord: one logged node
+    """
+    while chunk := fp.read(NODE_RECORD.size):
+        if len(chunk) < NODE_RECORD.size:
+            return  # the writer was stopped part way through a record
+        yield NodeRecord(*NODE_RECORD.unpack(chunk))
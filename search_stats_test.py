@@ -0,0 +1,59 @@
+# This is the unittest script for the search instrumentation
+
+import io
+import unittest
+from search_stats import *
+from helper_classes import AlphaBetaAnalyzer, GameState, Position
+
+MOVES: str = '353541346654035063'
+
+
+class TestSearchStats(unittest.TestCase):
+
+    def test_counts(self):
+        stats = SearchStats()
+        analyzer = AlphaBetaAnalyzer(GameState.from_moves(MOVES), table_size=10007, stats=stats)
+        self.assertEqual(analyzer.solve()[0], 4)
+        self.assertEqual(stats.nodes, analyzer.nodes)
+        self.assertEqual(sum(stats.nodes_by_ply), stats.nodes)
+        self.assertEqual(min(ply for ply, count in enumerate(stats.nodes_by_ply) if count), len(MOVES))
+        self.assertGreater(sum(stats.cutoffs), 0)
+        self.assertGreater(stats.first_move_cutoff_rate, 0.5)
+        self.assertGreater(stats.tt_hits, 0)
+        self.assertLessEqual(stats.tt_hits, stats.tt_probes)
+        # the table turns some stores away to keep deeper entries
+        self.assertGreaterEqual(stats.tt_stores, analyzer.transposition_table.stores)
+        self.assertEqual(stats.as_dict()['nodes'], stats.nodes)
+
+    def test_reset_per_search(self):
+        stats = SearchStats()
+        analyzer = AlphaBetaAnalyzer(GameState.from_moves(MOVES), table_size=10007, stats=stats)
+        analyzer.solve()
+        analyzer.load(GameState.from_moves(MOVES + '6'))
+        before = analyzer.nodes
+        analyzer.iterative_deepening(max_depth=4)
+        self.assertEqual(stats.nodes, analyzer.nodes - before)
+
+    def test_same_search_without_stats(self):
+        plain = AlphaBetaAnalyzer(GameState.from_moves(MOVES), table_size=10007)
+        counted = AlphaBetaAnalyzer(GameState.from_moves(MOVES), table_size=10007, stats=SearchStats())
+        self.assertEqual(plain.null_window_solve(), counted.null_window_solve())
+
+    def test_node_log(self):
+        log = io.BytesIO()
+        stats = SearchStats(log, sample_every=10)
+        AlphaBetaAnalyzer(GameState.from_moves(MOVES), table_size=10007, stats=stats).solve()
+        self.assertEqual(len(log.getvalue()), stats.logged * NODE_RECORD.size)
+        log.write(b'\0' * (NODE_RECORD.size // 2))  # a record cut short is skipped
+        log.seek(0)
+        records = list(read_node_log(log))
+        self.assertEqual(len(records), stats.nodes // 10)
+        for record in records:
+            self.assertGreaterEqual(record.moves, len(MOVES))
+            self.assertEqual(bin(record.mask).count('1'), record.moves)
+            self.assertEqual(record.current & ~record.mask, 0)
+            self.assertLess(record.alpha, record.beta)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# This script keeps an analyzer and its transposition table alive across moves and across process restarts
+import os
+import mmap
+import struct
+from typing import Callable, List, Optional, Tuple, Union
+from helper_classes import GameState, Position, AlphaBetaAnalyzer, TranspositionTable
+
+# file layout: the header, then the slots exactly as TranspositionTable keeps them in memory. The score unit of the
+# analyzer that filled the table is recorded because exact and heuristic scores cannot share a table
+HEADER = struct.Struct('<4sIII')
+MAGIC: bytes = b'C4TT'
+
+
+class PersistentTable(TranspositionTable):
+    """A transposition table kept in a memory-mapped file. Every store goes straight to the page cache, so whatever
+    one process has searched is there for the next one that opens the file, even if the first one was killed. The
+    lockless slots also let several processes map the same file at once."""
+    path: str
+
+    def __init__(self, path: str, size: int = TranspositionTable.DEFAULT_SIZE, replacement: str = 'depth',
+                 score_unit: int = 1):
+        """
+        Args:
+            path (str): the table file, created with empty slots if it does not exist yet
+            size (int, optional): the number of slots, must match the file if it exists
+            replacement (str, optional): the replacement scheme, see TranspositionTable
+            score_unit (int, optional): the score_unit of the analyzers using the table, must match the file if it
+                exists
+        """
+        if not os.path.exists(path):
+            with open(path, 'wb') as fp:
+                fp.write(HEADER.pack(MAGIC, size, score_unit, 0))
+                fp.truncate(HEADER.size + 16 * size)
+        with open(path, 'r+b') as fp:
+            self._map = mmap.mmap(fp.fileno(), 0)
+        magic, stored_size, stored_unit, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or len(self._map) != HEADER.size + 16 * stored_size:
+            self._map.close()
+            raise ValueError(f'{path} is not a transposition table')
+        if (stored_size, stored_unit) != (size, score_unit):
+            self._map.close()
+            raise ValueError(f'{path} holds {stored_size} slots with score unit {stored_unit}, '
+                             f'not {size} with {score_unit}')
+        self.path = path
+        self._view = memoryview(self._map)
+        super().__init__(size, replacement, buffer=self._view[HEADER.size:])
+
+    def flush(self) -> None:
+        """This function writes the dirty pages back to the file without waiting for the operating system to"""
+        self._map.flush()
+
+    def close(self) -> None:
+        super().close()
+        self.buffer.release()
+        self._view.release()
+        self._map.close()
+
+
+class AnalyzerSession:
+    """One analyzer for a whole game or service lifetime. Every question is answered with the same transposition
+    table, so the positions searched for one move are already there when the next move comes around."""
+    table: TranspositionTable
+    analyzer: AlphaBetaAnalyzer
+
+    def __init__(self, table_path: Optional[str] = None, table_size: int = TranspositionTable.DEFAULT_SIZE,
+                 evaluator: Optional[Callable[[Position], int]] = None, book: Optional['OpeningBook'] = None,
+                 move_ordering: Union[str, Callable[[Position, int, int], List[int]]] = 'threat'):
+        """
+        Args:
+            table_path (str, optional): a file to keep the transposition table in, see PersistentTable. The table
+                lives in memory only by default
+            table_size (int, optional): the number of slots in the table
+            evaluator (function, optional): the horizon evaluator of the analyzer, see AlphaBetaAnalyzer
+            book (OpeningBook, optional): solved early positions to look up instead of searching
+            move_ordering (str or function, optional): the move ordering of the analyzer
+        """
+        if table_path is None:
+            self.table = TranspositionTable(table_size)
+        else:
+            score_unit: int = 1 if evaluator is None else AlphaBetaAnalyzer.HEURISTIC_SCORE_UNIT
+            self.table = PersistentTable(table_path, table_size, score_unit=score_unit)
+        self.analyzer = AlphaBetaAnalyzer(GameState(), move_ordering=move_ordering, book=book,
+                                          transposition_table=self.table, evaluator=evaluator)
+
+    def best_column(self, game_state: GameState, max_time: Optional[float] = None, max_nodes: Optional[int] = None,
+                    max_depth: Optional[int] = None) -> int:
+        """This function picks a move, see AlphaBetaAnalyzer.best_column
+
+        Args:
+            game_state (GameState): the position to move in
+            max_time (float, optional): the number of seconds the search may take
+            max_nodes (int, optional): the number of nodes the search may visit
+            max_depth (int, optional): the number of moves to look ahead
+
+        Returns:
+            int: the column to drop into
+        """
+        self.analyzer.load(game_state)
+        return self.analyzer.best_column(max_time, max_nodes, max_depth)
+
+    def solve(self, game_state: GameState) -> Tuple[int, int]:
+        """This function searches a position to the end of the game, see AlphaBetaAnalyzer.solve
+
+        Args:
+            game_state (GameState): the position to solve
+
+        Returns:
+            value, column (Tuple[int, int]): the score for the player to move and the column that achieves it
+        """
+        self.analyzer.load(game_state)
+        return self.analyzer.solve()
+
+    def close(self) -> None:
+        self.table.close()
+
+    def __enter__(self) -> 'AnalyzerSession':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
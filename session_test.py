@@ -0,0 +1,72 @@
+# This is the unittest script for the analyzer session and the persistent table
+
+import os
+import tempfile
+import unittest
+from session import *
+
+MOVES: str = '3333332410221220000041116565'
+
+
+class TestPersistentTable(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.table')
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_store_survives_reopen(self):
+        table = PersistentTable(self.path, 101)
+        table.store(12345, -7, TranspositionTable.UPPER, 3, 10)
+        table.close()
+        self.assertEqual(os.path.getsize(self.path), HEADER.size + 16 * 101)
+        table = PersistentTable(self.path, 101)
+        self.assertEqual(table.get(12345), (-7, TranspositionTable.UPPER, 3, 10))
+        table.close()
+
+    def test_mismatch(self):
+        PersistentTable(self.path, 101).close()
+        with self.assertRaises(ValueError):
+            PersistentTable(self.path, 103)
+        with self.assertRaises(ValueError):
+            PersistentTable(self.path, 101, score_unit=AlphaBetaAnalyzer.HEURISTIC_SCORE_UNIT)
+        with open(self.path, 'wb') as fp:
+            fp.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            PersistentTable(self.path, 101)
+
+    def test_warm_start(self):
+        game_state = GameState.from_moves(MOVES)
+        with AnalyzerSession(self.path, table_size=10007) as session:
+            cold = session.solve(game_state)
+            cold_nodes = session.analyzer.nodes
+        # a new session, as after a restart, finds the answer in the file
+        with AnalyzerSession(self.path, table_size=10007) as session:
+            self.assertEqual(session.solve(game_state), cold)
+            self.assertLess(session.analyzer.nodes, cold_nodes)
+
+
+class TestAnalyzerSession(unittest.TestCase):
+
+    def test_table_kept_across_moves(self):
+        with AnalyzerSession(table_size=10007) as session:
+            score, column = session.solve(GameState.from_moves(MOVES))
+            before = session.analyzer.nodes
+            # the reply was searched as part of the first solve
+            child = GameState.from_moves(MOVES + str(column))
+            self.assertEqual(session.solve(child)[0], -score)
+            fresh = AlphaBetaAnalyzer(child, table_size=10007)
+            fresh.solve()
+            self.assertLess(session.analyzer.nodes - before, fresh.nodes)
+
+    def test_best_column(self):
+        with AnalyzerSession(table_size=10007) as session:
+            self.assertEqual(session.best_column(GameState.from_moves('010101'), max_time=0.1), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
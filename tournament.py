@@ -0,0 +1,395 @@
+# This script plays engine configurations against each other across a pool of processes and reports how they did
+import sys
+import math
+import json
+import time
+import random
+import signal
+import argparse
+from itertools import combinations
+from multiprocessing import Pool
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from helper_classes import GameState, Position, AlphaBetaAnalyzer, TranspositionTable
+from evaluation import evaluate
+from backend import Solver
+from game_records import write_records, GAMES
+
+
+class EngineConfig(NamedTuple):
+    """One way of running the engine. Without any limit the engine solves every position exactly."""
+    name: str
+    max_time: Optional[float] = None
+    max_depth: Optional[int] = None
+    max_nodes: Optional[int] = None
+    heuristic: bool = True  # score the horizon of limited searches with evaluation.evaluate
+
+    @property
+    def exact(self) -> bool:
+        return self.max_time is None and self.max_depth is None and self.max_nodes is None
+
+
+class Engine:
+    """The searcher a worker process keeps for one configuration, with the table it reuses from game to game"""
+    config: EngineConfig
+    searcher: Union[Solver, AlphaBetaAnalyzer]
+
+    def __init__(self, config: EngineConfig, table_size: int = TranspositionTable.DEFAULT_SIZE):
+        """
+        Args:
+            config (EngineConfig): how to search
+            table_size (int, optional): the number of slots in the transposition table
+        """
+        self.config = config
+        # exact solves go to the compiled solver when there is one
+        if config.exact:
+            self.searcher = Solver(table_size)
+        else:
+            self.searcher = AlphaBetaAnalyzer(GameState(), table_size=table_size,
+                                              evaluator=evaluate if config.heuristic else None)
+
+    def new_game(self) -> None:
+        """This function empties the table, so a game is played the same whatever the worker played before it"""
+        if isinstance(self.searcher, Solver):
+            self.searcher.clear()
+        else:
+            self.searcher.transposition_table.clear()
+
+    def choose(self, game_state: GameState) -> int:
+        """This function picks a move
+
+        Args:
+            game_state (GameState): the game state to move in, not over yet
+
+        Returns:
+            int: the column to drop into
+        """
+        if isinstance(self.searcher, Solver):
+            return self.searcher.solve(Position.from_game_state(game_state))[1]
+        self.searcher.load(game_state)
+        return self.searcher.best_column(self.config.max_time, self.config.max_nodes, self.config.max_depth)
+
+
+def parse_engine(spec: str) -> EngineConfig:
+    """This function reads an engine configuration from the command line
+
+    Args:
+        spec (str): a name, optionally followed by a colon and comma separated limits, e.g. 'solver',
+                    'd8:depth=8', 'fast:time=0.05,plain' or 'n20k:nodes=20000'. 'plain' turns the heuristic off
+
+    Returns:
+        EngineConfig: the configuration
+    """
+    name, _, options = spec.partition(':')
+    if not name:
+        raise ValueError(f'engine without a name: {spec!r}')
+    limits: Dict = {}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        if key == 'time':
+            limits['max_time'] = float(value)
+        elif key == 'depth':
+            limits['max_depth'] = int(value)
+        elif key == 'nodes':
+            limits['max_nodes'] = int(value)
+        elif key == 'plain':
+            limits['heuristic'] = False
+        else:
+            raise ValueError(f'unknown engine option {option!r} in {spec!r}')
+
+    return EngineConfig(name, **limits)
+
+
+def random_openings(count: int, plies: int, seed: int = 0) -> List[str]:
+    """This function draws distinct random openings, so that games between deterministic engines differ. No
+    opening contains a winning move, every game is still open after it
+
+    Args:
+        count (int): the number of openings
+        plies (int): the number of moves in every opening
+        seed (int, optional): the seed of the random generator, the same seed gives the same openings
+
+    Returns:
+        List[str]: the openings as move strings
+    """
+    generator = random.Random(seed)
+    openings: Dict[str, None] = {}  # keeps the order they were drawn in
+    attempts: int = 0
+    while len(openings) < count and attempts < 100 * count:
+        attempts += 1
+        position = Position()
+        moves: str = ''
+        for _ in range(plies):
+            columns: List[int] = [column for column in range(7)
+                                  if position.can_play(column) and not position.is_winning_move(column)]
+            if not columns:
+                break
+            column: int = generator.choice(columns)
+            position.play(column)
+            moves += str(column)
+        if len(moves) == plies:
+            openings[moves] = None
+    if len(openings) < count:
+        raise ValueError(f'there are not {count} distinct openings of {plies} moves')
+
+    return list(openings)
+
+
+def schedule(configs: List[EngineConfig], openings: List[str]) -> Iterator[Tuple[str, int, int]]:
+    """This function lists the games of a round robin. Every pair of engines plays every opening twice, once with
+    each engine moving first after it
+
+    Args:
+        configs (List[EngineConfig]): the engines
+        openings (List[str]): the openings
+
+    Yields:
+        opening, first, second (Tuple[str, int, int]): the opening and the indices of the engines playing as
+                                                       player 1 and player 2
+    """
+    for first, second in combinations(range(len(configs)), 2):
+        for opening in openings:
+            yield opening, first, second
+            yield opening, second, first
+
+
+# every worker process keeps one engine per configuration
+_engines: List[Engine] = []
+
+
+def init_worker(configs: List[EngineConfig], table_size: int) -> None:
+    """This function sets up the engines of a worker process
+
+    Args:
+        configs (List[EngineConfig]): the engines of the tournament
+        table_size (int): the number of slots in every engine's transposition table
+    """
+    global _engines
+    # a worker forked from the game inherits the handler pygame puts on SIGTERM, and the pool stops its workers with
+    # SIGTERM when it closes, so it would wait on them forever
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _engines = [Engine(config, table_size) for config in configs]
+
+
+def play_game(game: Tuple[str, int, int]) -> Dict:
+    """This function plays one game in a worker process
+
+    Args:
+        game (Tuple[str, int, int]): the opening and the indices of the two engines, see schedule
+
+    Returns:
+        Dict: the engines, all moves played, the winner (1 or 2, 0 for a draw) and the seconds every move of each
+              engine took
+    """
+    opening, first, second = game
+    game_state: GameState = GameState.from_moves(opening)
+    players: Tuple[Engine, Engine] = (_engines[first], _engines[second])
+    for engine in players:
+        engine.new_game()
+    latencies: Tuple[List[float], List[float]] = ([], [])
+    moves: str = opening
+    while game_state.end() == -1:
+        turn: int = game_state.current_turn - 1
+        start: float = time.perf_counter()
+        column: int = players[turn].choose(game_state)
+        latencies[turn].append(time.perf_counter() - start)
+        game_state.drop(column)
+        moves += str(column)
+
+    return {'first': first, 'second': second, 'opening': opening, 'moves': moves, 'winner': game_state.end(),
+            'latencies': latencies}
+
+
+def play_tournament(configs: List[EngineConfig], openings: List[str], workers: Optional[int] = None,
+                    table_size: int = TranspositionTable.DEFAULT_SIZE, chunksize: int = 4) -> Iterator[Dict]:
+    """This function plays a round robin across a pool of processes and yields every game as soon as it is over,
+    in no particular order
+
+    Args:
+        configs (List[EngineConfig]): the engines
+        openings (List[str]): the openings every pair plays, see random_openings
+        workers (int, optional): the number of processes, defaults to one per core
+        table_size (int, optional): the number of slots in every engine's transposition table
+        chunksize (int, optional): the number of games handed to a worker at a time
+
+    Yields:
+        Dict: one game, see play_game
+    """
+    with Pool(workers, initializer=init_worker, initargs=(configs, table_size)) as pool:
+        yield from pool.imap_unordered(play_game, schedule(configs, openings), chunksize)
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """This function picks a percentile by the nearest rank method
+
+    Args:
+        ordered (List[float]): the values, sorted
+        fraction (float): the percentile as a fraction, e.g. 0.95
+
+    Returns:
+        float: the value below which that fraction of the values lie, 0 if there are none
+    """
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def elo_ratings(names: List[str], results: Dict[Tuple[int, int], List[int]], iterations: int = 1000) -> List[float]:
+    """This function fits Elo ratings to the results of a round robin with the Bradley-Terry model, counting a
+    draw as half a win for each side. Every pair gets one extra draw, so an engine that won or lost every game
+    still gets a finite rating
+
+    Args:
+        names (List[str]): the engines
+        results (Dict[Tuple[int, int], List[int]]): wins, draws and losses of the first engine of each pair
+                                                    against the second
+        iterations (int, optional): the most rounds of the fitting algorithm
+
+    Returns:
+        List[float]: the rating of every engine, the first one rated 0
+    """
+    count: int = len(names)
+    games: List[List[float]] = [[0.0] * count for _ in range(count)]
+    points: List[float] = [0.0] * count
+    for (a, b), (wins, draws, losses) in results.items():
+        games[a][b] += wins + draws + losses + 1
+        games[b][a] += wins + draws + losses + 1
+        points[a] += wins + (draws + 1) / 2
+        points[b] += losses + (draws + 1) / 2
+
+    strengths: List[float] = [1.0] * count
+    for _ in range(iterations):
+        updated: List[float] = []
+        for i in range(count):
+            played: float = sum(games[i][j] / (strengths[i] + strengths[j]) for j in range(count) if games[i][j])
+            updated.append(points[i] / played if played else strengths[i])
+        converged: bool = all(abs(new - old) <= 1e-9 * old for new, old in zip(updated, strengths))
+        strengths = updated
+        if converged:
+            break
+
+    return [400 * math.log10(strength / strengths[0]) for strength in strengths]
+
+
+def summarize(configs: List[EngineConfig], games: Iterable[Dict]) -> Dict:
+    """This function tallies the games of a tournament
+
+    Args:
+        configs (List[EngineConfig]): the engines
+        games (Iterable[Dict]): the games, see play_game. They are read once, so a running tournament can be
+                                summarized as it streams by
+
+    Returns:
+        Dict: per engine its results, score, Elo and move latency percentiles in milliseconds, and per pair the
+              wins, draws and losses of the first engine
+    """
+    names: List[str] = [config.name for config in configs]
+    results: Dict[Tuple[int, int], List[int]] = {pair: [0, 0, 0] for pair in combinations(range(len(configs)), 2)}
+    latencies: List[List[float]] = [[] for _ in configs]
+    for game in games:
+        first, second = game['first'], game['second']
+        latencies[first].extend(game['latencies'][0])
+        latencies[second].extend(game['latencies'][1])
+        # results are kept from the point of view of the engine listed first
+        pair: Tuple[int, int] = (min(first, second), max(first, second))
+        if game['winner'] == 0:
+            results[pair][1] += 1
+        elif (game['winner'] == 1) == (first == pair[0]):
+            results[pair][0] += 1
+        else:
+            results[pair][2] += 1
+
+    ratings: List[float] = elo_ratings(names, results)
+    engines: Dict[str, Dict] = {}
+    for index, config in enumerate(configs):
+        wins = draws = losses = 0
+        for (a, b), (pair_wins, pair_draws, pair_losses) in results.items():
+            if index == a:
+                wins, draws, losses = wins + pair_wins, draws + pair_draws, losses + pair_losses
+            elif index == b:
+                wins, draws, losses = wins + pair_losses, draws + pair_draws, losses + pair_wins
+        played: int = wins + draws + losses
+        ordered: List[float] = sorted(latencies[index])
+        engines[config.name] = {
+            'config': config._asdict(),
+            'games': played,
+            'wins': wins,
+            'draws': draws,
+            'losses': losses,
+            'score': (wins + draws / 2) / played if played else 0.0,
+            'elo': round(ratings[index], 1),
+            'latency_ms': {
+                'moves': len(ordered),
+                'mean': 1000 * sum(ordered) / len(ordered) if ordered else 0.0,
+                'p50': 1000 * percentile(ordered, 0.50),
+                'p95': 1000 * percentile(ordered, 0.95),
+                'p99': 1000 * percentile(ordered, 0.99),
+                'max': 1000 * ordered[-1] if ordered else 0.0,
+            },
+        }
+
+    return {
+        'engines': engines,
+        'pairs': {f'{names[a]} vs {names[b]}': dict(zip(('wins', 'draws', 'losses'), counts))
+                  for (a, b), counts in results.items()},
+    }
+
+
+def recorded(games: Iterable[Dict], fp: BinaryIO) -> Iterator[Dict]:
+    """This function appends every game to a game record file on its way through
+
+    Args:
+        games (Iterable[Dict]): the games, see play_game
+        fp (BinaryIO): the record file opened for binary writing
+
+    Yields:
+        Dict: the same games
+    """
+    for game in games:
+        yield game
+        write_records(fp, [game['moves']], GAMES, header=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play engine configurations against each other')
+    parser.add_argument('engines', nargs='+',
+                        help="two or more engines as name[:option,...] with the options time=SECONDS, depth=MOVES, "
+                             "nodes=COUNT and plain (no heuristic), e.g. d6:depth=6 fast:time=0.05. An engine "
+                             "without limits solves every position exactly")
+    parser.add_argument('--openings', type=int, default=50,
+                        help='the number of random openings, every pair plays each of them twice')
+    parser.add_argument('--plies', type=int, default=8, help='the number of moves in every opening')
+    parser.add_argument('--seed', type=int, default=0, help='the seed the openings are drawn with')
+    parser.add_argument('--workers', type=int, default=None, help='the number of processes, one per core by default')
+    parser.add_argument('--table-size', type=int, default=TranspositionTable.DEFAULT_SIZE,
+                        help='the number of transposition table slots per engine')
+    parser.add_argument('--record', default=None, help='a game record file to write every game to')
+    parser.add_argument('--json', default=None, help='write the report to this file instead of stdout')
+    args = parser.parse_args()
+
+    configs: List[EngineConfig] = [parse_engine(spec) for spec in args.engines]
+    if len(configs) < 2 or len({config.name for config in configs}) != len(configs):
+        parser.error('a tournament needs at least two engines with different names')
+    openings: List[str] = random_openings(args.openings, args.plies, args.seed)
+    games: Iterator[Dict] = play_tournament(configs, openings, args.workers, args.table_size)
+    record = None
+    if args.record is not None:
+        record = open(args.record, 'wb')
+        write_records(record, [], GAMES)
+        games = recorded(games, record)
+    try:
+        report: Dict = summarize(configs, games)
+    finally:
+        if record is not None:
+            record.close()
+    report.update({'openings': args.openings, 'plies': args.plies, 'seed': args.seed})
+
+    if args.json is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.json, 'w') as fp:
+            json.dump(report, fp, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# This is the unittest script for the self-play tournament
+
+import io
+import time
+import signal
+import unittest
+from tournament import *
+from game_records import read_records
+
+
+class TestTournament(unittest.TestCase):
+
+    def test_parse_engine(self):
+        self.assertTrue(parse_engine('solver').exact)
+        self.assertEqual(parse_engine('fast:time=0.05,depth=8,plain'),
+                         EngineConfig('fast', max_time=0.05, max_depth=8, heuristic=False))
+        self.assertEqual(parse_engine('n:nodes=2000').max_nodes, 2000)
+        with self.assertRaises(ValueError):
+            parse_engine('bad:speed=3')
+        with self.assertRaises(ValueError):
+            parse_engine(':depth=3')
+
+    def test_random_openings(self):
+        openings = random_openings(20, 6, seed=3)
+        self.assertEqual(openings, random_openings(20, 6, seed=3))
+        self.assertEqual(len(set(openings)), 20)
+        for opening in openings:
+            self.assertEqual(len(opening), 6)
+            self.assertEqual(GameState.from_moves(opening).end(), -1)
+        with self.assertRaises(ValueError):
+            random_openings(8, 1)  # there are only 7 openings of one move
+
+    def test_schedule(self):
+        configs = [EngineConfig('a'), EngineConfig('b'), EngineConfig('c')]
+        games = list(schedule(configs, ['33', '34']))
+        self.assertEqual(len(games), 3 * 2 * 2)
+        self.assertIn(('34', 2, 1), games)
+        self.assertIn(('34', 1, 2), games)
+
+    def test_percentile(self):
+        values = [float(value) for value in range(1, 101)]
+        self.assertEqual(percentile(values, 0.5), 50.0)
+        self.assertEqual(percentile(values, 0.99), 99.0)
+        self.assertEqual(percentile([3.0], 0.95), 3.0)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_elo_ratings(self):
+        self.assertAlmostEqual(elo_ratings(['a', 'b'], {(0, 1): [5, 0, 5]})[1], 0.0)
+        # two losses and three draws with the extra one is a 70% score for b, a gap of 147 points
+        self.assertAlmostEqual(elo_ratings(['a', 'b'], {(0, 1): [0, 2, 2]})[1], 147.2, places=1)
+        ratings = elo_ratings(['a', 'b', 'c'], {(0, 1): [10, 0, 0], (0, 2): [10, 0, 0], (1, 2): [10, 0, 0]})
+        self.assertTrue(ratings[0] > ratings[1] > ratings[2])
+
+    def test_summarize(self):
+        configs = [EngineConfig('a'), EngineConfig('b', max_depth=2)]
+        games = [
+            {'first': 0, 'second': 1, 'winner': 1, 'latencies': ([0.001, 0.003], [0.002])},
+            {'first': 1, 'second': 0, 'winner': 1, 'latencies': ([0.004], [0.002])},
+            {'first': 1, 'second': 0, 'winner': 0, 'latencies': ([], [])},
+        ]
+        report = summarize(configs, games)
+        self.assertEqual(report['pairs']['a vs b'], {'wins': 1, 'draws': 1, 'losses': 1})
+        self.assertEqual(report['engines']['b']['score'], 0.5)
+        self.assertEqual(report['engines']['a']['latency_ms']['moves'], 3)
+        self.assertAlmostEqual(report['engines']['a']['latency_ms']['p50'], 2.0)
+        self.assertAlmostEqual(report['engines']['b']['latency_ms']['max'], 4.0)
+
+    def test_play_tournament(self):
+        configs = [parse_engine('solver'), parse_engine('d2:depth=2,plain')]
+        openings = random_openings(2, 16, seed=1)
+        fp = io.BytesIO()
+        write_records(fp, [], GAMES)
+        games = list(recorded(play_tournament(configs, openings, workers=2, table_size=10007), fp))
+        self.assertEqual(len(games), 4)
+        for game in games:
+            self.assertTrue(game['moves'].startswith(game['opening']))
+            self.assertEqual(GameState.from_moves(game['moves']).end(), game['winner'])
+        fp.seek(0)
+        self.assertEqual(sorted(read_records(fp)), sorted(game['moves'] for game in games))
+        report = summarize(configs, games)
+        # the solver never loses a position it can win or draw, so it does at least as well as the other engine
+        self.assertGreaterEqual(report['engines']['solver']['score'], 0.5)
+
+    def test_inherited_sigterm_handler(self):
+        # pygame catches SIGTERM in the game process, the pool must still stop the workers forked from it
+        configs = [parse_engine('solver'), parse_engine('d2:depth=2,plain')]
+        previous = signal.signal(signal.SIGTERM, lambda *_: None)
+        try:
+            # the solver takes far too long from the empty board, so the workers are still busy when the games are
+            # dropped
+            games = play_tournament(configs, ['3333332410221220000041116565', ''], workers=2, table_size=10007,
+                                    chunksize=1)
+            self.assertGreater(len(next(games)['moves']), 28)
+            start = time.perf_counter()
+            games.close()
+            self.assertLess(time.perf_counter() - start, 10)
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+
+
+if __name__ == '__main__':
+    unittest.main()